@@ -0,0 +1,166 @@
+"""
+Column store en disco para el dataset de molinos
+================================================
+
+Cada columna se guarda como un arreglo numpy contiguo (.npy) y un manifiesto
+JSON describe tipos y categorías. Al abrir el store las columnas se mapean en
+memoria (np.load con mmap_mode='r'): varios kernels o procesos comparten la misma
+copia en el page cache del sistema operativo y la carga es prácticamente inmediata.
+"""
+
+from pathlib import Path
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+from utils import cached_data, ensure_cache, molinos_filename
+
+MANIFEST_NAME = 'manifest.json'
+STORE_VERSION = 1
+
+
+def write_column_store(data, path, metadata=None):
+    """
+    Escribe un DataFrame como column store (un .npy por columna + manifiesto)
+    Args:
+        data: DataFrame a guardar
+        path: Carpeta destino (se reemplaza si existe)
+        metadata: Diccionario adicional a registrar en el manifiesto
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+
+    columns = {}
+    for i, (col, series) in enumerate(data.items()):
+        entry = {'file': f'{i:03d}.npy'}
+        if isinstance(series.dtype, pd.CategoricalDtype) or series.dtype == object:
+            categorical = series.astype('category')
+            values = categorical.cat.codes.to_numpy()
+            entry.update(kind='category',
+                         categories=categorical.cat.categories.tolist(),
+                         ordered=bool(categorical.cat.ordered))
+        elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+            values = series.to_numpy(dtype='datetime64[ns]')
+            entry['kind'] = 'datetime'
+        else:
+            values = series.to_numpy()
+            entry['kind'] = 'numeric'
+        entry['dtype'] = values.dtype.str
+        np.save(tmp_path / entry['file'], np.ascontiguousarray(values))
+        columns[col] = entry
+
+    manifest = {'version': STORE_VERSION, 'n_rows': len(data),
+                'columns': columns, 'metadata': metadata or {}}
+    (tmp_path / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, default=str))
+
+    # Reemplazo por renombres: el store anterior se aparta antes de mover el nuevo,
+    # así una interrupción nunca deja la ruta sin un store completo
+    old_path = path.with_name(path.name + '.old')
+    if old_path.exists():
+        shutil.rmtree(old_path)
+    if path.exists():
+        path.rename(old_path)
+    tmp_path.rename(path)
+    if old_path.exists():
+        shutil.rmtree(old_path)
+    return path
+
+
+class ColumnStore:
+    """
+    Vista tipo DataFrame sobre un column store mapeado en memoria.
+    Las columnas se abren bajo demanda y solo se materializan al convertirlas a pandas.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.manifest = json.loads((self.path / MANIFEST_NAME).read_text())
+        self._arrays = {}
+
+    @property
+    def columns(self):
+        return list(self.manifest['columns'])
+
+    @property
+    def metadata(self):
+        return self.manifest['metadata']
+
+    @property
+    def shape(self):
+        return (self.manifest['n_rows'], len(self.manifest['columns']))
+
+    def __len__(self):
+        return self.manifest['n_rows']
+
+    def __contains__(self, col):
+        return col in self.manifest['columns']
+
+    def __repr__(self):
+        return f"ColumnStore('{self.path}', filas={len(self):,}, columnas={len(self.columns)})"
+
+    def array(self, col):
+        """Arreglo numpy mapeado en memoria (solo lectura, sin copia)"""
+        if col not in self._arrays:
+            entry = self.manifest['columns'][col]
+            self._arrays[col] = np.load(self.path / entry['file'], mmap_mode='r')
+        return self._arrays[col]
+
+    def _series(self, col, rows=None):
+        """Columna como pd.Series; sin copia para columnas numéricas y de fecha"""
+        entry = self.manifest['columns'][col]
+        values = self.array(col)
+        if rows is not None:
+            values = values[rows]
+        if entry['kind'] == 'category':
+            dtype = pd.CategoricalDtype(entry['categories'], ordered=entry['ordered'])
+            return pd.Series(pd.Categorical.from_codes(values, dtype=dtype), name=col)
+        return pd.Series(values, name=col, copy=False)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._series(key)
+        return self.to_pandas(columns=list(key))
+
+    def to_pandas(self, columns=None, rows=None):
+        """
+        Columnas como DataFrame (sin copia para columnas numéricas y de fecha:
+        cada columna queda como su propio bloque sobre el arreglo mapeado)
+        Args:
+            columns: Columnas a incluir (None = todas)
+            rows: Slice o índice de filas (None = todas)
+        """
+        columns = self.columns if columns is None else columns
+        return pd.DataFrame({col: self._series(col, rows) for col in columns}, copy=False)
+
+    def head(self, n=5):
+        return self.to_pandas(rows=slice(0, n))
+
+
+def molinos_store(refresh=False):
+    """
+    Abre el column store del dataset de molinos (data/.cache/<dataset>.columns),
+    reconstruyéndolo desde la caché Parquet si cambió el archivo fuente
+
+    Utilidad independiente del reporte (el EDA lee vía utils.molinos_data): sirve
+    para compartir el dataset entre kernels o procesos sin duplicarlo en memoria.
+    """
+    filename = molinos_filename()
+    cache_path, source_manifest = ensure_cache(filename, refresh=refresh)
+    store_path = cache_path.with_suffix('.columns')
+    old_path = store_path.with_name(store_path.name + '.old')
+    if not store_path.exists() and old_path.exists():
+        old_path.rename(store_path)  # reemplazo interrumpido: recuperar el store anterior
+
+    if not refresh and (store_path / MANIFEST_NAME).exists():
+        store = ColumnStore(store_path)
+        if store.metadata.get('sha256') == source_manifest['sha256']:
+            return store
+
+    print(f"🗃️  Construyendo column store de {filename}...")
+    write_column_store(cached_data(filename), store_path,
+                       metadata={'source': filename, 'sha256': source_manifest['sha256']})
+    return ColumnStore(store_path)
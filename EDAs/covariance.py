@@ -0,0 +1,328 @@
+"""
+Covarianzas y correlaciones en streaming
+========================================
+
+CovarianceAccumulator mantiene, para cada par de variables, el conteo de filas
+con ambos valores presentes, las medias y momentos de segundo orden de cada
+variable sobre esas filas y el co-momento centrado. Los bloques se agregan con
+la fórmula de combinación de Chan et al. (centrado por bloque, sin restar sumas
+grandes), así que dos acumuladores de distintos procesos o particiones se
+combinan exactamente. Con faltantes, el resultado coincide con
+DataFrame.corr() / cov() (pares completos).
+
+CovarianceCube guarda un acumulador por partición (molino, mes): las matrices
+de flota o por molino se obtienen combinando particiones, y al llegar meses
+nuevos solo se leen y agregan las filas posteriores a la última hora de cada
+molino, previa verificación de la huella (conteo y hash) del mes frontera de
+cada molino y del total de filas; si el dataset fue regenerado, el cubo se
+reconstruye.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import json
+import numpy as np
+import pandas as pd
+
+from utils import MANIFEST_NAME, cached_cube, molinos_filename, partition_files
+
+STATE_STATS = ['count', 'mean', 'm2', 'comoment']
+COVARIANCE_VERSION = 1
+
+
+class CovarianceAccumulator:
+    """
+    Conteos, medias y co-momentos por par de variables (faltantes por pares)
+
+    Para el par (i, j), mean[i, j] y m2[i, j] son la media y la suma de
+    cuadrados centrada de la variable i sobre las filas donde i y j están presentes.
+    """
+
+    def __init__(self, variables, state=None):
+        """
+        Args:
+            variables: Variables acumuladas
+            state: {estadístico: matriz (p, p)} (None = acumulador vacío)
+        """
+        self.variables = list(variables)
+        p = len(self.variables)
+        state = state or {stat: np.zeros((p, p)) for stat in STATE_STATS}
+        self.count = state['count']
+        self.mean = state['mean']
+        self.m2 = state['m2']
+        self.comoment = state['comoment']
+
+    def __repr__(self):
+        return f"CovarianceAccumulator(variables={len(self.variables)}, filas={int(self.count.diagonal().max(initial=0)):,})"
+
+    @property
+    def state(self):
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2, 'comoment': self.comoment}
+
+    @classmethod
+    def from_values(cls, variables, values):
+        """Acumulador de un bloque (matriz filas × variables, NaN = faltante)"""
+        values = np.asarray(values, dtype=float)
+        valid = (~np.isnan(values)).astype(float)
+        # Centrado por la media del bloque: los momentos no dependen del desplazamiento
+        present = valid.sum(axis=0)
+        shift = np.divide(np.nansum(values, axis=0), present, out=np.zeros(values.shape[1]), where=present > 0)
+        centered = np.where(valid > 0, values - shift, 0.0)
+
+        count = valid.T @ valid
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sums = centered.T @ valid                    # sums[i, j]: Σ x_i sobre filas con i y j
+            offset = np.where(count > 0, sums / count, 0.0)
+            m2 = (centered ** 2).T @ valid - count * offset ** 2
+            comoment = centered.T @ centered - count * offset * offset.T
+        state = {'count': count, 'mean': offset + shift[:, None], 'm2': np.maximum(m2, 0.0), 'comoment': comoment}
+        return cls(variables, state)
+
+    def update(self, frame):
+        """Agrega un bloque de filas (DataFrame con las variables)"""
+        return self.merge(self.from_values(self.variables, frame[self.variables].to_numpy(dtype=float)))
+
+    def merge(self, other):
+        """Combina otro acumulador con las mismas variables (Chan et al.)"""
+        if other.variables != self.variables:
+            raise ValueError("Los acumuladores deben tener las mismas variables")
+        n_a, n_b = self.count, other.count
+        n = n_a + n_b
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(n > 0, n_a * n_b / n, 0.0)
+            delta = other.mean - self.mean
+            self.mean = self.mean + np.where(n > 0, delta * n_b / n, 0.0)
+        self.m2 = self.m2 + other.m2 + delta ** 2 * weight
+        self.comoment = self.comoment + other.comoment + delta * delta.T * weight
+        self.count = n
+        return self
+
+    def subset(self, variables):
+        """Acumulador restringido a un subconjunto de variables (sin recalcular)"""
+        idx = [self.variables.index(var) for var in variables]
+        return CovarianceAccumulator(variables, {stat: matrix[np.ix_(idx, idx)].copy()
+                                                 for stat, matrix in self.state.items()})
+
+    def cov(self, ddof=1):
+        """Matriz de covarianzas (pares completos)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = self.comoment / (self.count - ddof)
+        cov[self.count - ddof <= 0] = np.nan
+        return pd.DataFrame(cov, index=self.variables, columns=self.variables)
+
+    def corr(self):
+        """Matriz de correlaciones de Pearson (pares completos, como DataFrame.corr)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.clip(self.comoment / np.sqrt(self.m2 * self.m2.T), -1.0, 1.0)
+        corr[self.count < 2] = np.nan
+        diagonal = np.diag_indices_from(corr)
+        corr[diagonal] = np.where(self.m2[diagonal] > 0, 1.0, np.nan)
+        return pd.DataFrame(corr, index=self.variables, columns=self.variables)
+
+
+def _month_keys(data):
+    """Mes de cada fila (YYYY-MM), mismo formato que las particiones mes=<YYYY-MM>"""
+    return data['timestamp'].dt.strftime('%Y-%m')
+
+
+class CovarianceCube:
+    """
+    Acumuladores de covarianza por partición (molino, mes), actualizables con filas nuevas
+    """
+
+    def __init__(self, variables, partitions=None, watermark=None):
+        """
+        Args:
+            variables: Variables acumuladas
+            partitions: {(molino, mes): CovarianceAccumulator} (None = cubo vacío)
+            watermark: Última hora agregada de cada molino
+        """
+        self.variables = list(variables)
+        self.partitions = dict(partitions or {})
+        self.watermark = dict(watermark or {})
+        self.source_sha256 = None  # versión del dataset fuente que refleja el cubo
+
+    @classmethod
+    def build(cls, data, variables=None):
+        """
+        Construye el cubo desde un DataFrame de filas horarias
+        Args:
+            variables: Variables a acumular (None = todas las numéricas)
+        """
+        if variables is None:
+            variables = list(data.select_dtypes(include=[np.number]).columns)
+        cube = cls(variables)
+        cube.update(data)
+        return cube
+
+    def __repr__(self):
+        return (f"CovarianceCube(variables={len(self.variables)}, molinos={len(self.molinos)}, "
+                f"particiones={len(self.partitions)})")
+
+    @property
+    def molinos(self):
+        return sorted({mill for mill, _ in self.partitions})
+
+    def update(self, rows):
+        """
+        Agrega filas nuevas a sus particiones; las horas ya incluidas de cada molino se ignoran
+        Returns:
+            Número de filas agregadas
+        """
+        mills = rows['molino_id'].astype(str)
+        last = pd.to_datetime(mills.map(self.watermark))
+        keep = (last.isna() | (rows['timestamp'] > last)).to_numpy()
+        rows, mills = rows[keep], mills[keep]
+        if not len(rows):
+            return 0
+
+        values = rows[self.variables].to_numpy(dtype=float)
+        keys = pd.MultiIndex.from_arrays([mills.to_numpy(), _month_keys(rows).to_numpy()])
+        codes, partitions = pd.factorize(keys, sort=True)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(partitions) + 1))
+        for key, lo, hi in zip(partitions, bounds[:-1], bounds[1:]):
+            block = CovarianceAccumulator.from_values(self.variables, values[order[lo:hi]])
+            if key in self.partitions:
+                self.partitions[key].merge(block)
+            else:
+                self.partitions[key] = block
+
+        latest = rows.groupby(mills)['timestamp'].max()
+        self.watermark.update({mill: max(ts, self.watermark.get(mill, ts)) for mill, ts in latest.items()})
+        return len(rows)
+
+    def merge(self, other):
+        """Combina otro cubo (p.ej. construido en otro proceso sobre otras particiones)"""
+        if other.variables != self.variables:
+            raise ValueError("Los cubos deben tener las mismas variables")
+        for key, accumulator in other.partitions.items():
+            if key in self.partitions:
+                self.partitions[key].merge(accumulator)
+            else:
+                self.partitions[key] = CovarianceAccumulator(self.variables, dict(accumulator.state))
+        for mill, ts in other.watermark.items():
+            self.watermark[mill] = max(ts, self.watermark.get(mill, ts))
+        return self
+
+    def accumulator(self, variables=None, molinos=None, start=None, end=None):
+        """
+        Acumulador combinado de las particiones seleccionadas
+        Args:
+            variables: Variables a incluir (None = todas)
+            molinos: Molinos a incluir (None = todos)
+            start, end: Meses 'YYYY-MM' inclusive (None = sin límite)
+        """
+        variables = self.variables if variables is None else list(variables)
+        molinos = None if molinos is None else {str(m) for m in molinos}
+        result = CovarianceAccumulator(variables)
+        for (mill, month), accumulator in sorted(self.partitions.items()):
+            if ((molinos is None or mill in molinos) and (start is None or month >= start)
+                    and (end is None or month <= end)):
+                result.merge(accumulator.subset(variables))
+        return result
+
+    def corr(self, variables=None, molinos=None, start=None, end=None, by_mill=False):
+        """
+        Matriz de correlaciones de la flota, o por molino con by_mill=True
+        (DataFrame indexado por (molino_id, variable))
+        """
+        if not by_mill:
+            return self.accumulator(variables, molinos, start, end).corr()
+        selected = self.molinos if molinos is None else [str(m) for m in molinos]
+        return pd.concat({mill: self.accumulator(variables, [mill], start, end).corr() for mill in selected},
+                         names=['molino_id', 'variable'])
+
+    def cov(self, variables=None, molinos=None, start=None, end=None, ddof=1):
+        """Matriz de covarianzas de las particiones seleccionadas"""
+        return self.accumulator(variables, molinos, start, end).cov(ddof=ddof)
+
+    def save(self, path):
+        """Guarda el cubo como carpeta (estado de cada partición en formato largo + manifiesto)"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        frames = {(mill, month, stat): pd.DataFrame(matrix, index=pd.Index(self.variables, name='variable'),
+                                                    columns=self.variables)
+                  for (mill, month), accumulator in self.partitions.items()
+                  for stat, matrix in accumulator.state.items()}
+        if frames:
+            long = pd.concat(frames, names=['molino_id', 'mes', 'stat']).reset_index()
+            long.to_parquet(path / 'partitions.parquet', compression='zstd', index=False)
+        manifest = {'version': COVARIANCE_VERSION, 'variables': self.variables,
+                    'watermark': {mill: ts.isoformat() for mill, ts in self.watermark.items()}}
+        (path / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Carga un cubo guardado con save()"""
+        path = Path(path)
+        manifest = json.loads((path / MANIFEST_NAME).read_text())
+        if manifest.get('version') != COVARIANCE_VERSION:
+            raise ValueError(f"Versión de cubo no soportada: {manifest.get('version')}")
+        variables = manifest['variables']
+        partitions = {}
+        if (path / 'partitions.parquet').exists():
+            long = pd.read_parquet(path / 'partitions.parquet')
+            for (mill, month), frame in long.groupby(['molino_id', 'mes'], sort=True):
+                state = {stat: frame.loc[frame['stat'] == stat, variables].to_numpy() for stat in STATE_STATS}
+                partitions[(mill, month)] = CovarianceAccumulator(variables, state)
+        watermark = {mill: pd.Timestamp(ts) for mill, ts in manifest['watermark'].items()}
+        return cls(variables, partitions, watermark)
+
+
+def _covariance_task(path, row_group, mill_id, variables):
+    """Cubo de covarianzas de un archivo o row group Parquet (se ejecuta en el pool)"""
+    import pyarrow.parquet as pq
+
+    columns = ['timestamp', 'molino_id'] + variables
+    if row_group is None:
+        # Parte de una partición: molino_id no está dentro del archivo
+        frame = pd.read_parquet(path, columns=[col for col in columns if col != 'molino_id'])
+        frame['molino_id'] = mill_id
+    else:
+        frame = pq.ParquetFile(path).read_row_group(row_group, columns=columns).to_pandas()
+    return CovarianceCube.build(frame, variables)
+
+
+def covariance_parquet(path, variables, n_workers=None):
+    """
+    Construye un CovarianceCube en una pasada sobre un store Parquet
+    Args:
+        path: Archivo Parquet (se procesa por row group) o carpeta particionada
+              molino_id=<id>/mes=<mes>/part-*.parquet
+        variables: Variables numéricas
+        n_workers: Procesos en paralelo (None = os.cpu_count(), 1 = sin pool)
+    Returns:
+        CovarianceCube combinado de todas las particiones
+    """
+    import pyarrow.parquet as pq
+
+    path = Path(path)
+    if path.is_dir():
+        tasks = [(str(part), None, mill_id) for part, mill_id, _ in partition_files(path)]
+    else:
+        tasks = [(str(path), rg, None) for rg in range(pq.ParquetFile(path).num_row_groups)]
+
+    variables = list(variables)
+    result = CovarianceCube(variables)
+    if n_workers == 1:
+        for task in tasks:
+            result.merge(_covariance_task(*task, variables))
+        return result
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        for partial in pool.map(_covariance_task, *zip(*tasks), [variables] * len(tasks)):
+            result.merge(partial)
+    return result
+
+
+def molinos_covariance(refresh=False, incremental=True):
+    """
+    Cubo de covarianzas del dataset de molinos (data/.cache/<dataset>.covariance)
+    Args:
+        refresh: Reconstruye el cubo desde cero
+        incremental: Si cambió el archivo fuente, acumula solo las horas nuevas de cada
+                     molino (ver utils.cached_cube); si no, reconstruye el cubo
+    """
+    return cached_cube(molinos_filename(), 'covariance', CovarianceCube, ['timestamp', 'molino_id'],
+                       'Cubo de covarianzas', '🔗', refresh=refresh, incremental=incremental)
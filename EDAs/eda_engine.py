@@ -0,0 +1,234 @@
+"""
+Motor de cálculo del EDA de molinos
+===================================
+
+Concentra los cálculos del reporte (outliers, screening de predictores,
+correlaciones, estadísticas por grupo, tests entre turnos, perfiles temporales
+y PCA) fuera de las celdas de Quarto. Cada resultado se guarda en
+data/.cache/<dataset>.eda/ con una clave que combina la huella del dataset
+(sha256 del archivo fuente) con el análisis y sus parámetros:
+
+- si el dataset no cambió, el reporte lee resultados ya calculados
+- si cambia, solo se recalculan los análisis que se vuelven a pedir, leyendo
+  únicamente las columnas que necesitan
+
+Los perfiles temporales, las correlaciones y el PCA se apoyan además en sus
+propios almacenes incrementales (rollups, covariance, incremental_pca); la
+clave de sus resultados incluye además la versión del cubo consultado, y el
+PCA se reajusta si fue ajustado sobre otra versión del dataset.
+
+Uso:
+    eda = EDAEngine()
+    outliers_df = eda.outliers(['feed_rate', 'corriente_motor'])
+"""
+
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from utils import cached_data, ensure_cache, molinos_filename
+from outliers import detect_outliers
+from predictor_screening import TARGET_PREFIX, screen_predictors
+from covariance import COVARIANCE_VERSION, molinos_covariance
+from rollups import ROLLUP_VERSION, molinos_rollups
+from incremental_pca import molinos_pca
+
+INDEX_NAME = 'index.json'
+# Cambiar la versión de un análisis invalida sus resultados guardados
+ANALYSIS_VERSIONS = {
+    'outliers': 1, 'predictors': 1, 'correlations': 1, 'group_stats': 1, 'kruskal': 1, 'profile': 1,
+}
+
+
+def _json_default(value):
+    """Serialización estable de parámetros (tuplas, conjuntos, numpy)"""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class EDAEngine:
+    """
+    Análisis del dataset de molinos con resultados cacheados en disco
+    """
+
+    def __init__(self, refresh=False):
+        """
+        Args:
+            refresh: Ignora los resultados guardados y recalcula cada análisis pedido
+        """
+        self.filename = molinos_filename()
+        cache_path, manifest = ensure_cache(self.filename)
+        self.fingerprint = manifest['sha256']
+        self.cache_dir = cache_path.with_suffix('.eda')
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._columns = None
+        self._cache_path = cache_path
+
+    def __repr__(self):
+        return (f"EDAEngine(dataset={self.filename!r}, huella={self.fingerprint[:12]}, "
+                f"aciertos={self.hits}, calculados={self.misses})")
+
+    @property
+    def columns(self):
+        """Columnas del dataset (desde el esquema de la caché, sin leer datos)"""
+        if self._columns is None:
+            import pyarrow.parquet as pq
+            self._columns = pq.read_schema(self._cache_path).names
+        return self._columns
+
+    def data(self, columns=None):
+        """Lee el dataset (solo las columnas pedidas) desde la caché Parquet"""
+        return cached_data(self.filename, columns=columns)
+
+    def _key(self, analysis, params):
+        """Clave del resultado: huella del dataset + análisis + parámetros"""
+        payload = json.dumps({'dataset': self.fingerprint, 'analysis': analysis,
+                              'version': ANALYSIS_VERSIONS[analysis], 'params': params},
+                             sort_keys=True, default=_json_default)
+        return hashlib.sha256(payload.encode()).hexdigest()[:20]
+
+    def _read_index(self):
+        index_path = self.cache_dir / INDEX_NAME
+        return json.loads(index_path.read_text()) if index_path.exists() else {}
+
+    def cached(self, analysis, params, compute):
+        """
+        Devuelve el resultado guardado de un análisis o lo calcula y lo guarda
+        Args:
+            analysis: Nombre del análisis (clave de ANALYSIS_VERSIONS)
+            params: Parámetros que definen el resultado (serializables a JSON)
+            compute: Función sin argumentos que calcula el DataFrame o Series
+        """
+        key = self._key(analysis, params)
+        path = self.cache_dir / f'{analysis}-{key}.parquet'
+        index = self._read_index()
+
+        if not self.refresh and key in index and path.exists():
+            self.hits += 1
+            result = pd.read_parquet(path)
+            return result.iloc[:, 0].rename(index[key]['name']) if index[key]['kind'] == 'series' else result
+
+        result = compute()
+        self.misses += 1
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        kind = 'series' if isinstance(result, pd.Series) else 'frame'
+        stored = result.to_frame(name='value') if kind == 'series' else result
+        stored.to_parquet(path, compression='zstd')
+        index[key] = {'analysis': analysis, 'params': json.loads(json.dumps(params, default=_json_default)),
+                      'dataset': self.fingerprint, 'kind': kind,
+                      'name': result.name if kind == 'series' else None}
+        (self.cache_dir / INDEX_NAME).write_text(json.dumps(index, indent=2))
+        return result
+
+    def prune(self):
+        """
+        Borra resultados calculados sobre versiones anteriores del dataset
+        Returns:
+            Número de resultados eliminados
+        """
+        index = self._read_index()
+        stale = {key: entry for key, entry in index.items() if entry['dataset'] != self.fingerprint}
+        for key, entry in stale.items():
+            (self.cache_dir / f"{entry['analysis']}-{key}.parquet").unlink(missing_ok=True)
+            del index[key]
+        if stale:
+            (self.cache_dir / INDEX_NAME).write_text(json.dumps(index, indent=2))
+        return len(stale)
+
+    # ------------------------------------------------------------------
+    # Análisis
+    # ------------------------------------------------------------------
+
+    def outliers(self, columns, by=None, k=1.5):
+        """Resumen de outliers por IQR (ver outliers.detect_outliers)"""
+        columns = list(columns)
+
+        def compute():
+            data = self.data(columns + ([by] if by else []))
+            return detect_outliers(data, columns, by=by, k=k)
+
+        return self.cached('outliers', {'columns': columns, 'by': by, 'k': k}, compute)
+
+    def predictors(self, features, targets=None, by=None, alpha=0.05):
+        """Screening de predictores de falla (ver predictor_screening.screen_predictors)"""
+        features = list(features)
+        targets = list(targets or [col for col in self.columns if col.startswith(TARGET_PREFIX)])
+
+        def compute():
+            data = self.data(features + targets + ([by] if by else []))
+            return screen_predictors(data, features=features, targets=targets, by=by, alpha=alpha)
+
+        return self.cached('predictors', {'features': features, 'targets': targets, 'by': by, 'alpha': alpha},
+                           compute)
+
+    def correlations(self, variables, molinos=None):
+        """Matriz de correlaciones desde el cubo de covarianzas (flota o molinos elegidos)"""
+        variables = list(variables)
+        cube = molinos_covariance()
+        params = {'variables': variables, 'molinos': molinos,
+                  'cube_sha256': cube.source_sha256, 'cube_version': COVARIANCE_VERSION}
+        return self.cached('correlations', params, lambda: cube.corr(variables, molinos=molinos))
+
+    def group_stats(self, variables, by, stats='mean'):
+        """
+        Estadísticas por grupo
+        Args:
+            variables: Variable o lista de variables
+            by: 'molino_id', 'turno' o 'month' (mes 'YYYY-MM' del timestamp)
+            stats: Estadístico o lista (como DataFrame.agg)
+        Returns:
+            Igual que data.groupby(by)[variables].agg(stats)
+        """
+        columns = [variables] if isinstance(variables, str) else list(variables)
+
+        def compute():
+            data = self.data(columns + ['timestamp' if by == 'month' else by])
+            keys = data['timestamp'].dt.to_period('M').astype(str).rename('month') if by == 'month' else data[by]
+            grouped = data.groupby(keys, observed=True, sort=True)[variables]
+            return grouped.agg(stats)
+
+        return self.cached('group_stats', {'variables': variables, 'by': by, 'stats': stats}, compute)
+
+    def kruskal(self, variables, by='turno'):
+        """
+        Test de Kruskal-Wallis entre grupos para cada variable
+        Returns:
+            DataFrame indexado por variable con statistic y p_value
+        """
+        variables = list(variables)
+
+        def compute():
+            data = self.data(variables + [by])
+            results = {}
+            for var in variables:
+                groups = [values.dropna() for _, values in data.groupby(by, observed=True)[var]]
+                statistic, p_value = stats.kruskal(*groups)
+                results[var] = {'statistic': statistic, 'p_value': p_value}
+            return pd.DataFrame(results).T.rename_axis('variable')
+
+        return self.cached('kruskal', {'variables': variables, 'by': by}, compute)
+
+    def profile(self, variables, level, stats='mean', by_mill=False):
+        """Perfil temporal desde el cubo de agregados (ver rollups.RollupCube.query)"""
+        variables = list(variables)
+        cube = molinos_rollups()
+        params = {'variables': variables, 'level': level, 'stats': stats, 'by_mill': by_mill,
+                  'cube_sha256': cube.source_sha256, 'cube_version': ROLLUP_VERSION}
+        return self.cached('profile', params,
+                           lambda: cube.query(variables, level=level, stats=stats, by_mill=by_mill))
+
+    def pca(self, variables, n_components=None, reuse_stale=False):
+        """
+        Modelo PCA persistido (ver incremental_pca.molinos_pca); se reajusta si fue
+        ajustado sobre otra versión del dataset
+        Args:
+            reuse_stale: Acepta un modelo ajustado sobre otra versión del dataset
+        """
+        return molinos_pca(variables, n_components=n_components, refresh=self.refresh, reuse_stale=reuse_stale)
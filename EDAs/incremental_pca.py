@@ -0,0 +1,234 @@
+"""
+PCA fuera de memoria
+====================
+
+Ajusta un PCA sobre variables estandarizadas recorriendo el dataset por bloques,
+con memoria acotada por el tamaño del bloque:
+
+1. Primera pasada: media y desviación de cada variable (combinación por bloques
+   de Chan et al.; desviación poblacional, como StandardScaler)
+2. Segunda pasada: SVD incremental de los bloques estandarizados; se mantiene
+   solo diag(S)·Vt (variables × variables) y se re-descompone junto a cada
+   bloque. Las componentes se truncan recién al final, así el resultado es
+   exacto (mismos valores que StandardScaler + PCA de sklearn, salvo el signo
+   de cada componente)
+
+El modelo ajustado (media, escala, componentes y varianzas) se guarda en disco;
+transform() proyecta datos nuevos (p.ej. un mes recién llegado) sin reajustar.
+molinos_pca() reajusta si cambió el dataset, salvo con reuse_stale=True.
+"""
+
+from pathlib import Path
+import json
+import numpy as np
+import pandas as pd
+
+from utils import ensure_cache, molinos_filename
+
+MANIFEST_NAME = 'manifest.json'
+PCA_VERSION = 1
+DEFAULT_BATCH_SIZE = 50_000
+
+
+def iter_chunks(source, columns, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Bloques de una fuente con solo las columnas pedidas
+    Args:
+        source: DataFrame, archivo CSV, o archivo/carpeta Parquet (particionado o no)
+        columns: Columnas a leer
+        batch_size: Filas por bloque
+    """
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), batch_size):
+            yield source[columns].iloc[start:start + batch_size]
+        return
+
+    path = Path(source)
+    if path.suffix == '.csv':
+        yield from pd.read_csv(path, usecols=columns, chunksize=batch_size)
+        return
+
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+class StreamingPCA:
+    """
+    PCA de variables estandarizadas ajustado por bloques (dos pasadas)
+    """
+
+    def __init__(self, variables, n_components=None):
+        """
+        Args:
+            variables: Variables numéricas del modelo
+            n_components: Componentes a conservar (None = todas)
+        """
+        self.variables = list(variables)
+        self.n_components = n_components or len(self.variables)
+        self.mean_ = None
+        self.scale_ = None
+        self.components_ = None
+        self.singular_values_ = None
+        self.explained_variance_ = None
+        self.explained_variance_ratio_ = None
+        self.n_samples_seen_ = 0
+        self.source_sha256 = None  # versión del dataset sobre la que se ajustó
+
+    def __repr__(self):
+        fitted = f", filas={self.n_samples_seen_:,}" if self.components_ is not None else ''
+        return f"StreamingPCA(variables={len(self.variables)}, n_components={self.n_components}{fitted})"
+
+    def _complete(self, chunk):
+        """Matriz del bloque sin filas con faltantes (como dropna)"""
+        values = chunk[self.variables].to_numpy(dtype=float)
+        return values[~np.isnan(values).any(axis=1)]
+
+    def _standardize(self, values):
+        return (values - self.mean_) / self.scale_
+
+    def fit(self, source, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Ajusta el modelo en dos pasadas sobre la fuente
+        Args:
+            source: DataFrame o ruta (ver iter_chunks); se recorre dos veces
+            batch_size: Filas por bloque (define la memoria usada)
+        """
+        # Pasada 1: media y varianza por combinación de bloques
+        count, mean, m2 = 0, np.zeros(len(self.variables)), np.zeros(len(self.variables))
+        for chunk in iter_chunks(source, self.variables, batch_size):
+            values = self._complete(chunk)
+            if not len(values):
+                continue
+            n_b, mean_b = len(values), values.mean(axis=0)
+            m2_b = ((values - mean_b) ** 2).sum(axis=0)
+            n = count + n_b
+            delta = mean_b - mean
+            mean = mean + delta * n_b / n
+            m2 = m2 + m2_b + delta ** 2 * count * n_b / n
+            count = n
+        if count < 2:
+            raise ValueError("Se necesitan al menos 2 filas completas para ajustar el PCA")
+        std = np.sqrt(m2 / count)
+        self.mean_ = mean
+        self.scale_ = np.where(std > 0, std, 1.0)
+
+        # Pasada 2: SVD incremental de los bloques estandarizados (ya centrados).
+        # Truncar en cada bloque pierde varianza cuando el espectro es plano: se
+        # arrastra la base completa (variables × variables) y se trunca al final
+        basis = np.zeros((0, len(self.variables)))   # diag(S) · Vt acumulado
+        total_ss = 0.0
+        for chunk in iter_chunks(source, self.variables, batch_size):
+            values = self._standardize(self._complete(chunk))
+            if not len(values):
+                continue
+            total_ss += (values ** 2).sum()
+            _, s, vt = np.linalg.svd(np.vstack([basis, values]), full_matrices=False)
+            basis = s[:, None] * vt
+
+        basis = basis[:self.n_components]
+        singular = np.linalg.norm(basis, axis=1)
+        components = basis / np.where(singular > 0, singular, 1.0)[:, None]
+        # Signo determinista: el loading de mayor magnitud de cada componente es positivo
+        signs = np.sign(components[np.arange(len(components)), np.abs(components).argmax(axis=1)])
+        self.components_ = components * np.where(signs == 0, 1.0, signs)[:, None]
+        self.singular_values_ = singular
+        self.explained_variance_ = singular ** 2 / (count - 1)
+        self.explained_variance_ratio_ = singular ** 2 / total_ss
+        self.n_samples_seen_ = count
+        return self
+
+    def transform(self, data):
+        """
+        Proyecta datos en las componentes (filas con faltantes quedan en NaN)
+        Args:
+            data: DataFrame con las variables del modelo
+        Returns:
+            Matriz (filas, n_components)
+        """
+        if self.components_ is None:
+            raise ValueError("El modelo no está ajustado: usar fit() o load()")
+        values = data[self.variables].to_numpy(dtype=float)
+        return self._standardize(values) @ self.components_.T
+
+    def iter_transform(self, source, batch_size=DEFAULT_BATCH_SIZE, keep=()):
+        """
+        Proyección por bloques de una fuente en disco
+        Args:
+            keep: Columnas adicionales a conservar junto a las componentes (p.ej. molino_id)
+        Returns:
+            Generador de DataFrames con columnas keep + PC1..PCk
+        """
+        names = [f'PC{i + 1}' for i in range(len(self.components_))]
+        for chunk in iter_chunks(source, list(keep) + self.variables, batch_size):
+            scores = pd.DataFrame(self.transform(chunk), columns=names, index=chunk.index)
+            yield pd.concat([chunk[list(keep)], scores], axis=1)
+
+    def save(self, path):
+        """Guarda el modelo como carpeta (componentes en Parquet + manifiesto)"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        components = pd.DataFrame(self.components_, columns=self.variables)
+        components.to_parquet(path / 'components.parquet', index=False)
+        manifest = {
+            'version': PCA_VERSION, 'variables': self.variables, 'n_components': self.n_components,
+            'n_samples_seen': int(self.n_samples_seen_), 'mean': self.mean_.tolist(),
+            'scale': self.scale_.tolist(), 'singular_values': self.singular_values_.tolist(),
+            'explained_variance_ratio': self.explained_variance_ratio_.tolist(),
+            'sha256': self.source_sha256,
+        }
+        (path / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Carga un modelo guardado con save()"""
+        path = Path(path)
+        manifest = json.loads((path / MANIFEST_NAME).read_text())
+        if manifest.get('version') != PCA_VERSION:
+            raise ValueError(f"Versión de modelo no soportada: {manifest.get('version')}")
+        model = cls(manifest['variables'], manifest['n_components'])
+        model.components_ = pd.read_parquet(path / 'components.parquet')[model.variables].to_numpy()
+        model.mean_ = np.array(manifest['mean'])
+        model.scale_ = np.array(manifest['scale'])
+        model.singular_values_ = np.array(manifest['singular_values'])
+        model.n_samples_seen_ = manifest['n_samples_seen']
+        model.explained_variance_ = model.singular_values_ ** 2 / (model.n_samples_seen_ - 1)
+        model.explained_variance_ratio_ = np.array(manifest['explained_variance_ratio'])
+        model.source_sha256 = manifest.get('sha256')
+        return model
+
+
+def molinos_pca(variables, n_components=None, refresh=False, reuse_stale=False, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    PCA del dataset de molinos ajustado sobre la caché Parquet (data/.cache/<dataset>.pca)
+
+    El modelo se reajusta si cambió el dataset (sha256), las variables o las
+    componentes. Con reuse_stale=True se conserva el modelo guardado aunque el
+    dataset haya cambiado, para proyectar meses nuevos con transform() sin reajustar.
+    Args:
+        refresh: Reajusta siempre
+        reuse_stale: Reutiliza un modelo ajustado sobre otra versión del dataset
+    """
+    filename = molinos_filename()
+    cache_path, source_manifest = ensure_cache(filename)
+    model_path = cache_path.with_suffix('.pca')
+    variables = list(variables)
+
+    if not refresh and (model_path / MANIFEST_NAME).exists():
+        model = StreamingPCA.load(model_path)
+        if model.variables == variables and model.n_components == (n_components or len(variables)):
+            if model.source_sha256 == source_manifest['sha256']:
+                return model
+            if reuse_stale:
+                print("ℹ️  PCA ajustado sobre una versión anterior del dataset (reuse_stale=True)")
+                return model
+
+    print(f"🧭 Ajustando PCA por bloques sobre {filename}...")
+    model = StreamingPCA(variables, n_components).fit(cache_path, batch_size=batch_size)
+    model.source_sha256 = source_manifest['sha256']
+    model.save(model_path)
+    return model
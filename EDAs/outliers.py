@@ -0,0 +1,393 @@
+"""
+Detección de outliers por IQR, exacta o con sketches de cuantiles
+=================================================================
+
+- iqr_bounds / detect_outliers: cuartiles de todas las columnas (por molino si
+  se indica) en una sola llamada vectorizada y conteo de outliers con una
+  comparación matricial, sin recorrer columnas en Python.
+- KLLSketch: sketch de cuantiles combinable (estilo KLL) con memoria acotada;
+  estima cuantiles y rangos con error relativo al rango de ~1/k.
+- OutlierSketch: sketches por (molino, columna). Se construyen por partición
+  en paralelo (sketch_parquet), se combinan con merge() y entregan IQR y conteo
+  de outliers de la flota completa en una sola pasada sobre el store Parquet.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from utils import partition_files
+
+QUARTILES = [0.25, 0.75]
+
+
+def _bounds_frame(q1, q3, k):
+    """Tabla de cuartiles y límites IQR"""
+    iqr = q3 - q1
+    return pd.DataFrame({'q1': q1, 'q3': q3, 'iqr': iqr,
+                         'lower_bound': q1 - k * iqr, 'upper_bound': q3 + k * iqr})
+
+
+def iqr_bounds(data, columns, by=None, k=1.5):
+    """
+    Cuartiles y límites IQR de todas las columnas en una sola llamada
+    Args:
+        data: DataFrame
+        columns: Columnas numéricas
+        by: Columna de agrupación (p.ej. 'molino_id'); None = dataset completo
+        k: Multiplicador del IQR
+    Returns:
+        DataFrame indexado por columna (o por (grupo, columna)) con q1, q3, iqr y límites
+    """
+    if by is None:
+        values = data[columns].to_numpy(dtype=float)
+        q1, q3 = np.nanquantile(values, QUARTILES, axis=0)
+        return _bounds_frame(pd.Series(q1, index=columns), pd.Series(q3, index=columns), k)
+
+    quartiles = data.groupby(by, observed=True)[columns].quantile(QUARTILES)
+    quartiles = quartiles.stack().unstack(level=1)  # índice (grupo, columna), columnas 0.25 / 0.75
+    return _bounds_frame(quartiles[QUARTILES[0]], quartiles[QUARTILES[1]], k)
+
+
+def detect_outliers(data, columns, by=None, k=1.5):
+    """
+    Conteo de outliers IQR de todas las columnas
+    Args:
+        by: Columna de agrupación; los límites y conteos son por grupo
+    Returns:
+        DataFrame con count, percentage, lower_bound y upper_bound (más q1, q3, iqr)
+    """
+    bounds = iqr_bounds(data, columns, by=by, k=k)
+    values = data[columns].to_numpy(dtype=float)
+
+    if by is None:
+        lower = bounds['lower_bound'].to_numpy()
+        upper = bounds['upper_bound'].to_numpy()
+        counts = ((values < lower) | (values > upper)).sum(axis=0)
+        sizes = np.full(len(columns), len(data))
+    else:
+        # Límites de cada fila según su grupo: matriz (filas, columnas) por indexación
+        groups = pd.Categorical(data[by])
+        lower = bounds['lower_bound'].unstack().reindex(index=groups.categories, columns=columns).to_numpy()
+        upper = bounds['upper_bound'].unstack().reindex(index=groups.categories, columns=columns).to_numpy()
+        codes = groups.codes
+        flags = (values < lower[codes]) | (values > upper[codes])
+        counts = pd.DataFrame(flags, columns=columns).groupby(codes).sum()
+        counts.index = groups.categories[counts.index]
+        counts = counts.stack().reindex(bounds.index).to_numpy()
+        sizes = pd.Series(codes).value_counts().reindex(range(len(groups.categories))).to_numpy()
+        sizes = pd.Series(sizes, index=groups.categories).reindex(bounds.index.get_level_values(0)).to_numpy()
+
+    summary = pd.DataFrame({'count': counts, 'percentage': counts / sizes * 100}, index=bounds.index)
+    return pd.concat([summary, bounds[['lower_bound', 'upper_bound', 'q1', 'q3', 'iqr']]], axis=1)
+
+
+class KLLSketch:
+    """
+    Sketch de cuantiles combinable: compactadores por nivel donde cada ítem del
+    nivel h representa 2**h valores; al desbordar un nivel se ordena y se
+    promueve uno de cada dos ítems (desfase aleatorio) al nivel siguiente.
+
+    Además cuenta exactamente los valores iguales al mínimo y al máximo: en
+    variables recortadas (clip) esa masa no se reparte entre ítems vecinos.
+    """
+
+    def __init__(self, k=200, seed=None):
+        """
+        Args:
+            k: Capacidad del nivel superior (más k = más precisión y memoria)
+            seed: Semilla del desfase aleatorio de las compactaciones
+        """
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.n_min = 0  # valores iguales al mínimo
+        self.n_max = 0  # valores iguales al máximo
+        self._rng = np.random.default_rng(seed)
+        self._sorted = None
+
+    def __len__(self):
+        return self.n
+
+    def __repr__(self):
+        return f"KLLSketch(n={self.n:,}, k={self.k}, ítems={self.size})"
+
+    @property
+    def size(self):
+        """Ítems retenidos"""
+        return sum(len(level) for level in self.levels)
+
+    def _capacity(self, level):
+        # Los niveles inferiores son más pequeños (factor 2/3 por nivel, como KLL)
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        # Compactación perezosa (como KLL): mientras el total exceda la capacidad
+        # total, se compacta el nivel más bajo que desborda su propia capacidad
+        while self.size > sum(self._capacity(level) for level in range(len(self.levels))):
+            level = next(h for h in range(len(self.levels)) if len(self.levels[h]) > self._capacity(h))
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            # Con cantidad impar, el último ítem queda en su nivel (se conserva el peso total)
+            leftover, items = items[len(items) - len(items) % 2:], items[:len(items) - len(items) % 2]
+            promoted = items[self._rng.integers(2)::2]
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            self.levels[level] = leftover
+        self._sorted = None
+
+    def update(self, values):
+        """Agrega un arreglo de valores (los NaN se ignoran)"""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.n += len(values)
+        self._update_extremes(values.min(), int((values == values.min()).sum()),
+                              values.max(), int((values == values.max()).sum()))
+        # Compactación gradual: un lote grande entra en tramos de k valores, así los
+        # niveles inferiores conservan ítems en vez de colapsar todo en el superior
+        for start in range(0, len(values), self.k):
+            self.levels[0] = np.concatenate([self.levels[0], values[start:start + self.k]])
+            self._compress()
+        return self
+
+    def _update_extremes(self, new_min, count_min, new_max, count_max):
+        """Actualiza mínimo/máximo y la cantidad exacta de valores en cada extremo"""
+        if new_min < self.min:
+            self.min, self.n_min = new_min, count_min
+        elif new_min == self.min:
+            self.n_min += count_min
+        if new_max > self.max:
+            self.max, self.n_max = new_max, count_max
+        elif new_max == self.max:
+            self.n_max += count_max
+
+    def merge(self, other):
+        """Combina otro sketch en este (en el lugar)"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._update_extremes(other.min, other.n_min, other.max, other.n_max)
+        self._compress()
+        return self
+
+    def _weighted(self):
+        """Ítems ordenados con su peso acumulado"""
+        if self._sorted is None:
+            items = np.concatenate(self.levels)
+            weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+            order = np.argsort(items, kind='stable')
+            self._sorted = (items[order], np.cumsum(weights[order]))
+        return self._sorted
+
+    def quantile(self, q):
+        """Cuantiles estimados (exactos mientras no hubo compactación)"""
+        q = np.asarray(q, dtype=float)
+        if not self.n:
+            return np.full(q.shape, np.nan)
+        if len(self.levels) == 1:
+            return np.quantile(self.levels[0], q)
+        xp, fp = self._rank_points()
+        return np.interp(q * self.n, fp, xp)
+
+    def _rank_points(self):
+        """
+        Puntos (valor, rango) de la función de rango interpolada: G(min) = n_min,
+        G(max) = n - n_max y, entre medio, el centro de masa de cada ítem interior
+        (los ítems iguales a min/max se reemplazan por sus conteos exactos)
+        """
+        items, cumulative = self._weighted()
+        weights = np.diff(cumulative, prepend=0.0)
+        interior = (items > self.min) & (items < self.max)
+        items, weights = items[interior], weights[interior]
+        inner_mass = self.n - self.n_min - (self.n_max if self.max > self.min else 0)
+        if len(weights):
+            weights = weights * inner_mass / weights.sum()
+        centers = self.n_min + np.cumsum(weights) - weights / 2
+        xp = np.concatenate([[self.min], items, [self.max]])
+        fp = np.concatenate([[self.n_min], centers, [self.n_min + inner_mass]])
+        return xp, fp
+
+    def _rank(self, x):
+        """Cantidad interpolada de valores por debajo de x (entre min y max)"""
+        xp, fp = self._rank_points()
+        return np.interp(x, xp, fp)
+
+    def count_below(self, x):
+        """Cantidad estimada de valores < x (los iguales a x no cuentan)"""
+        x = np.asarray(x, dtype=float)
+        if not self.n:
+            return np.zeros(x.shape)
+        if len(self.levels) == 1:
+            return (self.levels[0] < x[..., None]).sum(axis=-1).astype(float)
+        return np.where(x <= self.min, 0.0, np.where(x > self.max, float(self.n), self._rank(x)))
+
+    def count_above(self, x):
+        """Cantidad estimada de valores > x (los iguales a x no cuentan)"""
+        x = np.asarray(x, dtype=float)
+        if not self.n:
+            return np.zeros(x.shape)
+        if len(self.levels) == 1:
+            return (self.levels[0] > x[..., None]).sum(axis=-1).astype(float)
+        return np.where(x >= self.max, 0.0, np.where(x < self.min, float(self.n), self.n - self._rank(x)))
+
+
+class OutlierSketch:
+    """
+    Sketches KLL por (grupo, columna) para IQR y conteo de outliers en streaming
+    """
+
+    def __init__(self, columns, by='molino_id', k=200, seed=None):
+        """
+        Args:
+            columns: Columnas numéricas
+            by: Columna de agrupación (None = un solo grupo)
+            k: Precisión de cada sketch
+            seed: Semilla (o SeedSequence) de las compactaciones
+        """
+        self.columns = list(columns)
+        self.by = by
+        self.k = k
+        self.sketches = {}
+        self.rows = {}
+        self._seeds = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+    def __repr__(self):
+        return f"OutlierSketch(grupos={len(self.rows)}, columnas={len(self.columns)}, filas={sum(self.rows.values()):,})"
+
+    def _sketch(self, group, column):
+        key = (group, column)
+        if key not in self.sketches:
+            self.sketches[key] = KLLSketch(self.k, seed=self._seeds.spawn(1)[0])
+        return self.sketches[key]
+
+    def update(self, frame, group=None):
+        """
+        Agrega un bloque de filas
+        Args:
+            group: Grupo de todo el bloque (p.ej. molino de una partición); None = columna `by`
+        """
+        if group is not None or self.by is None:
+            blocks = [(group if group is not None else 'all', frame)]
+        else:
+            blocks = frame.groupby(self.by, observed=True, sort=False)
+        for name, block in blocks:
+            values = block[self.columns].to_numpy(dtype=float)
+            for j, column in enumerate(self.columns):
+                self._sketch(name, column).update(values[:, j])
+            self.rows[name] = self.rows.get(name, 0) + len(block)
+        return self
+
+    def merge(self, other):
+        """Combina otro OutlierSketch (p.ej. de otra partición) en este"""
+        for key, sketch in other.sketches.items():
+            if key in self.sketches:
+                self.sketches[key].merge(sketch)
+            else:
+                self.sketches[key] = sketch
+        for group, rows in other.rows.items():
+            self.rows[group] = self.rows.get(group, 0) + rows
+        return self
+
+    @property
+    def groups(self):
+        return sorted(self.rows)
+
+    def _fleet_sketch(self, column):
+        """Sketch de la columna para la flota completa (combinación de los grupos)"""
+        fleet = KLLSketch(self.k, seed=0)
+        for group in self.groups:
+            if (group, column) in self.sketches:
+                fleet.merge(self.sketches[(group, column)])
+        return fleet
+
+    def bounds(self, k=1.5, per_group=False):
+        """
+        Cuartiles y límites IQR estimados
+        Args:
+            per_group: Límites por grupo (índice (grupo, columna)) en vez de la flota
+        """
+        if per_group:
+            keys = [(g, c) for g in self.groups for c in self.columns if (g, c) in self.sketches]
+            quartiles = np.array([self.sketches[key].quantile(QUARTILES) for key in keys]).reshape(-1, 2)
+            index = pd.MultiIndex.from_tuples(keys, names=[self.by or 'grupo', None])
+        else:
+            quartiles = np.array([self._fleet_sketch(c).quantile(QUARTILES) for c in self.columns])
+            index = pd.Index(self.columns)
+        return _bounds_frame(pd.Series(quartiles[:, 0], index=index), pd.Series(quartiles[:, 1], index=index), k)
+
+    def summary(self, k=1.5, per_group=False):
+        """
+        Conteo estimado de outliers (mismas columnas que detect_outliers)
+        """
+        bounds = self.bounds(k=k, per_group=per_group)
+        counts = []
+        for key, row in bounds.iterrows():
+            keys = [key] if per_group else [(g, key) for g in self.groups if (g, key) in self.sketches]
+            counts.append(sum(self.sketches[s].count_below(row['lower_bound']) +
+                              self.sketches[s].count_above(row['upper_bound']) for s in keys))
+        sizes = (bounds.index.get_level_values(0).map(self.rows).to_numpy(dtype=float) if per_group
+                 else np.full(len(bounds), float(sum(self.rows.values()))))
+        counts = np.asarray(counts, dtype=float)
+        summary = pd.DataFrame({'count': np.round(counts), 'percentage': counts / sizes * 100}, index=bounds.index)
+        return pd.concat([summary, bounds[['lower_bound', 'upper_bound', 'q1', 'q3', 'iqr']]], axis=1)
+
+
+def _parquet_tasks(path):
+    """Unidades de trabajo de un store Parquet: (archivo, row group, grupo)"""
+    import pyarrow.parquet as pq
+
+    path = Path(path)
+    if path.is_dir():
+        # Dataset particionado molino_id=<id>/mes=<mes>/part-*.parquet
+        for part, mill_id, _ in partition_files(path):
+            yield str(part), None, mill_id
+    else:
+        for row_group in range(pq.ParquetFile(path).num_row_groups):
+            yield str(path), row_group, None
+
+
+def _sketch_task(task, columns, by, k, seed):
+    """Construye el OutlierSketch de una unidad de trabajo (se ejecuta en el pool)"""
+    import pyarrow.parquet as pq
+
+    path, row_group, group = task
+    if row_group is None:
+        frame = pd.read_parquet(path, columns=columns)
+    else:
+        read_columns = columns + ([by] if by else [])
+        frame = pq.ParquetFile(path).read_row_group(row_group, columns=read_columns).to_pandas()
+    return OutlierSketch(columns, by=by, k=k, seed=seed).update(frame, group=group)
+
+
+def sketch_parquet(path, columns, by='molino_id', k=200, n_workers=None, seed=0):
+    """
+    Construye un OutlierSketch en una pasada sobre un store Parquet
+    Args:
+        path: Archivo Parquet (se procesa por row group) o carpeta particionada por molino_id
+        columns: Columnas numéricas
+        n_workers: Procesos en paralelo (None = os.cpu_count(), 1 = sin pool)
+    Returns:
+        OutlierSketch combinado de todas las particiones
+    """
+    tasks = list(_parquet_tasks(path))
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    args = [(task, list(columns), by, k, task_seed) for task, task_seed in zip(tasks, seeds)]
+
+    result = OutlierSketch(columns, by=by, k=k, seed=seed)
+    if n_workers == 1:
+        partials = (_sketch_task(*arg) for arg in args)
+        for partial in partials:
+            result.merge(partial)
+        return result
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        for partial in pool.map(_sketch_task, *zip(*args)):
+            result.merge(partial)
+    return result
@@ -0,0 +1,184 @@
+"""
+Screening de predictores de falla por lotes
+===========================================
+
+Compara casos con y sin falla para todas las variables numéricas, todos los
+horizontes (falla_en_7d / 14d / 30d) y cada molino a la vez. Por molino, las
+sumas por grupo salen de productos matriciales (targets × variables) y los
+rangos de un único argsort sobre la matriz completa:
+
+- medias, desviaciones y diferencia porcentual por grupo
+- tamaño de efecto (d de Cohen con varianza combinada)
+- test t de Welch
+- AUC (estadístico U de Mann-Whitney / n0·n1) y su p-valor asintótico con
+  corrección por empates y por continuidad (como scipy.stats.mannwhitneyu)
+
+Los molinos se reparten en lotes entre procesos (ProcessPoolExecutor).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+TARGET_PREFIX = 'falla_en_'
+EXCLUDED_FEATURES = ['dias_hasta_falla', 'severidad_falla', 'horas_operacion_acumuladas']
+RESULT_COLUMNS = [
+    'n_no_failure', 'n_failure', 'mean_no_failure', 'mean_with_failure', 'std_no_failure',
+    'std_with_failure', 'mean_difference', 'mean_diff_percentage', 'cohen_d',
+    't_statistic', 'welch_df', 'p_value_welch', 'auc', 'p_value', 'significant',
+]
+
+
+def _average_ranks(values):
+    """
+    Rangos promedio por columna (empates comparten rango; NaN = 0) y término de
+    empates Σ(t³ - t) de cada columna, con un solo argsort sobre la matriz traspuesta
+    """
+    by_column = np.ascontiguousarray(values.T)  # ordenar filas contiguas es mucho más rápido
+    c, n = by_column.shape
+    order = np.argsort(by_column, axis=1)  # NaN al final; el orden entre empates no importa
+    ordered = np.take_along_axis(by_column, order, axis=1)
+
+    new_run = np.ones((c, n), dtype=bool)
+    new_run[:, 1:] = ordered[:, 1:] != ordered[:, :-1]  # NaN != NaN: cada NaN es su propio grupo
+    run_id = (np.cumsum(new_run, axis=1) - 1 + np.arange(c)[:, None] * n).ravel()
+    sizes = np.bincount(run_id, minlength=c * n).astype(float)
+    starts = np.zeros(c * n)
+    starts[run_id[new_run.ravel()]] = np.tile(np.arange(n), c)[new_run.ravel()]
+
+    ranks = np.empty((c, n))
+    np.put_along_axis(ranks, order, (starts + (sizes + 1) / 2)[run_id].reshape(c, n), axis=1)
+    ranks[np.isnan(by_column)] = 0.0
+    ties = (sizes ** 3 - sizes).reshape(c, n).sum(axis=1)
+    return ranks.T, ties
+
+
+def screen_block(values, targets, alpha=0.05):
+    """
+    Estadísticos de todas las variables contra todos los targets para un bloque
+    Args:
+        values: Matriz (filas, variables) con NaN como faltantes
+        targets: Matriz booleana (filas, targets)
+        alpha: Nivel de significancia (sobre el p-valor de Mann-Whitney)
+    Returns:
+        Diccionario {estadístico: matriz (targets, variables)}
+    """
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    with_failure = targets.astype(float)
+    no_failure = (~targets).astype(float)
+
+    # Conteos y sumas por grupo: un producto matricial por estadístico
+    n1 = with_failure.T @ valid
+    n0 = no_failure.T @ valid
+    n = n0 + n1
+    center = filled.sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+    centered = np.where(valid, values - center, 0.0)
+    s1, s0 = with_failure.T @ centered, no_failure.T @ centered
+    q1, q0 = with_failure.T @ centered ** 2, no_failure.T @ centered ** 2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1, d0 = s1 / n1, s0 / n0                 # medias centradas
+        mean1, mean0 = d1 + center, d0 + center
+        var1 = (q1 - n1 * d1 ** 2) / (n1 - 1)
+        var0 = (q0 - n0 * d0 ** 2) / (n0 - 1)
+        diff = mean1 - mean0
+
+        pooled = np.sqrt(((n1 - 1) * var1 + (n0 - 1) * var0) / (n - 2))
+        cohen_d = diff / pooled
+
+        # Welch
+        se2_1, se2_0 = var1 / n1, var0 / n0
+        t_stat = diff / np.sqrt(se2_1 + se2_0)
+        welch_df = (se2_1 + se2_0) ** 2 / (se2_1 ** 2 / (n1 - 1) + se2_0 ** 2 / (n0 - 1))
+        p_welch = 2 * stats.t.sf(np.abs(t_stat), welch_df)
+
+        # Mann-Whitney / AUC con rangos promedio (empates) por columna
+        ranks, ties = _average_ranks(values)
+        u1 = with_failure.T @ ranks - n1 * (n1 + 1) / 2
+        auc = u1 / (n1 * n0)
+        n_valid = valid.sum(axis=0)
+        tie_factor = ties / (n_valid * (n_valid - 1))
+        sigma = np.sqrt(n1 * n0 / 12 * ((n + 1) - tie_factor))
+        z = (np.abs(u1 - n1 * n0 / 2) - 0.5) / sigma
+        p_mw = np.minimum(2 * stats.norm.sf(z), 1.0)
+
+        diff_pct = np.where(mean0 != 0, diff / mean0 * 100, 0.0)
+
+    return {
+        'n_no_failure': n0, 'n_failure': n1,
+        'mean_no_failure': mean0, 'mean_with_failure': mean1,
+        'std_no_failure': np.sqrt(var0), 'std_with_failure': np.sqrt(var1),
+        'mean_difference': diff, 'mean_diff_percentage': diff_pct, 'cohen_d': cohen_d,
+        't_statistic': t_stat, 'welch_df': welch_df, 'p_value_welch': p_welch,
+        'auc': auc, 'p_value': p_mw, 'significant': p_mw < alpha,
+    }
+
+
+def _screen_groups(blocks, alpha):
+    """Screening de varios molinos (se ejecuta en un proceso del pool)"""
+    return [screen_block(values, targets, alpha) for values, targets in blocks]
+
+
+def _default_features(data, targets):
+    """Variables numéricas candidatas (sin targets ni columnas derivadas de la falla)"""
+    return [col for col in data.select_dtypes(include=[np.number]).columns
+            if col not in targets and col not in EXCLUDED_FEATURES]
+
+
+def screen_predictors(data, features=None, targets=None, by=None, n_workers=None, alpha=0.05,
+                      groups_per_task=None):
+    """
+    Screening de predictores para todas las variables, horizontes y molinos
+    Args:
+        data: DataFrame con variables y targets booleanos
+        features: Variables a evaluar (None = todas las numéricas)
+        targets: Columnas target (None = todas las falla_en_*)
+        by: Columna de agrupación (p.ej. 'molino_id'); None = dataset completo
+        n_workers: Procesos para repartir los molinos (None = os.cpu_count(), 1 = sin pool)
+        alpha: Nivel de significancia
+        groups_per_task: Molinos por tarea del pool (None = reparto parejo entre procesos)
+    Returns:
+        DataFrame indexado por ([grupo,] target, variable) con RESULT_COLUMNS
+    """
+    targets = targets or [col for col in data.columns if col.startswith(TARGET_PREFIX)]
+    features = features or _default_features(data, targets)
+    values = data[features].to_numpy(dtype=float)
+    labels = data[targets].to_numpy(dtype=bool)
+
+    if by is None:
+        names, results = [None], [screen_block(values, labels, alpha)]
+    else:
+        # Separar molinos con un único ordenamiento
+        codes, names = pd.factorize(data[by], sort=True)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+        blocks = [(values[order[lo:hi]], labels[order[lo:hi]]) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+        n_workers = n_workers or os.cpu_count() or 1
+        if n_workers == 1 or len(blocks) == 1:
+            results = _screen_groups(blocks, alpha)
+        else:
+            size = groups_per_task or max(1, int(np.ceil(len(blocks) / n_workers)))
+            tasks = [blocks[i:i + size] for i in range(0, len(blocks), size)]
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                results = [result for chunk in pool.map(_screen_groups, tasks, [alpha] * len(tasks))
+                           for result in chunk]
+
+    # Resultado largo: (grupo, target, variable) × estadístico
+    n_cells = len(targets) * len(features)
+    columns = {stat: np.concatenate([result[stat].ravel() for result in results]) for stat in RESULT_COLUMNS}
+    frame = pd.DataFrame(columns)
+    frame['n_no_failure'] = frame['n_no_failure'].astype(int)
+    frame['n_failure'] = frame['n_failure'].astype(int)
+    target_index = np.tile(np.repeat(targets, len(features)), len(results))
+    feature_index = np.tile(features, len(targets) * len(results))
+    if by is None:
+        frame.index = pd.MultiIndex.from_arrays([target_index, feature_index], names=['target', 'variable'])
+    else:
+        group_index = np.repeat(np.asarray(names), n_cells)
+        frame.index = pd.MultiIndex.from_arrays([group_index, target_index, feature_index],
+                                                names=[by, 'target', 'variable'])
+    return frame
@@ -0,0 +1,236 @@
+"""
+Cubo de agregados multi-resolución por molino
+=============================================
+
+Precalcula count, sum, sum de cuadrados, min y max de cada variable por molino
+en varias resoluciones temporales (turno, día, semana, mes) y perfiles
+(hora del día, etiqueta de turno). Media, varianza y desviación se derivan de
+esos agregados, así que los gráficos de tendencias, turnos y patrones horarios
+consultan unas pocas miles de filas en vez de reagrupar el dataset horario.
+
+Los agregados son sumables: al llegar horas nuevas solo se leen y agregan las
+filas posteriores a la última hora registrada de cada molino y se combinan con
+el cubo. Antes se verifica la huella (conteo y hash) del mes frontera de cada
+molino y el total de filas; si el dataset fue regenerado, el cubo se reconstruye.
+"""
+
+from pathlib import Path
+import json
+import numpy as np
+import pandas as pd
+
+from utils import MANIFEST_NAME, cached_cube, molinos_filename
+
+STATS = ['count', 'sum', 'sumsq', 'min', 'max']
+ADDITIVE_STATS = ['count', 'sum', 'sumsq']
+DERIVED_STATS = ['count', 'sum', 'mean', 'var', 'std', 'min', 'max']
+
+# Resoluciones temporales (inicio del período) y perfiles (clave cíclica)
+RESOLUTIONS = ['shift', 'day', 'week', 'month']
+PROFILES = ['hour', 'turno']
+LEVELS = RESOLUTIONS + PROFILES
+
+ID_COLUMNS = ['timestamp', 'molino_id', 'turno']
+SHIFTS = pd.CategoricalDtype(['A', 'B', 'C'])  # Turnos A 00:00, B 08:00, C 16:00
+ROLLUP_VERSION = 1
+
+
+def _level_keys(data, level):
+    """Clave de agrupación de cada fila para una resolución o perfil"""
+    timestamps = data['timestamp']
+    if level == 'shift':
+        # Inicio nominal del turno: códigos sobre categorías fijas, no las presentes en el bloque
+        codes = data['turno'].astype(str).astype(SHIFTS).cat.codes.to_numpy()
+        return timestamps.dt.floor('D') + pd.to_timedelta(codes * 8, unit='h')
+    if level == 'day':
+        return timestamps.dt.floor('D')
+    if level == 'week':
+        return timestamps.dt.to_period('W').dt.start_time
+    if level == 'month':
+        return timestamps.dt.to_period('M').dt.start_time
+    if level == 'hour':
+        return timestamps.dt.hour
+    if level == 'turno':
+        return data['turno'].astype(str)
+    raise ValueError(f"Nivel no soportado: {level} (opciones: {', '.join(LEVELS)})")
+
+
+def _aggregate(data, variables):
+    """
+    Agregados de un bloque de filas en todos los niveles
+    Returns:
+        {nivel: {estadístico: DataFrame indexado por (molino_id, clave)}}
+    """
+    values = data[variables].astype(float)
+    squares = values ** 2
+    mills = data['molino_id'].astype(str).rename('molino_id')
+
+    tables = {}
+    for level in LEVELS:
+        keys = [mills, _level_keys(data, level).rename('clave')]
+        grouped = values.groupby(keys, sort=True)
+        tables[level] = {
+            'count': grouped.count().astype(float),
+            'sum': grouped.sum(),
+            'sumsq': squares.groupby(keys, sort=True).sum(),
+            'min': grouped.min(),
+            'max': grouped.max(),
+        }
+    return tables
+
+
+def _combine(stat, left, right):
+    """Combina dos tablas de un mismo estadístico (suma o min/max por clave)"""
+    if stat in ADDITIVE_STATS:
+        return left.add(right, fill_value=0).sort_index()
+    combined = pd.concat([left, right]).groupby(level=[0, 1], sort=True)
+    return combined.min() if stat == 'min' else combined.max()
+
+
+def _derive(stats, stat):
+    """Estadístico derivado a partir de los agregados (varianza muestral, ddof=1)"""
+    count = stats['count']
+    if stat in ('count', 'sum', 'min', 'max'):
+        return stats[stat]
+    mean = stats['sum'] / count.where(count > 0)
+    if stat == 'mean':
+        return mean
+    var = (stats['sumsq'] - count * mean ** 2) / (count - 1).where(count > 1)
+    var = var.clip(lower=0)
+    return var if stat == 'var' else np.sqrt(var)
+
+
+class RollupCube:
+    """
+    Agregados por molino y nivel temporal, actualizables con filas nuevas
+    """
+
+    def __init__(self, variables, tables=None, watermark=None):
+        """
+        Args:
+            variables: Variables agregadas
+            tables: {nivel: {estadístico: DataFrame}} (None = cubo vacío)
+            watermark: Última hora agregada de cada molino
+        """
+        self.variables = list(variables)
+        self.tables = tables or {}
+        self.watermark = dict(watermark or {})
+        self.source_sha256 = None  # versión del dataset fuente que refleja el cubo
+
+    @classmethod
+    def build(cls, data, variables=None):
+        """
+        Construye el cubo desde un DataFrame de filas horarias
+        Args:
+            variables: Variables a agregar (None = todas las numéricas y booleanas)
+        """
+        if variables is None:
+            variables = [col for col in data.columns if col not in ID_COLUMNS and
+                         (pd.api.types.is_numeric_dtype(data[col]) or pd.api.types.is_bool_dtype(data[col]))]
+        cube = cls(variables)
+        cube.update(data)
+        return cube
+
+    def __repr__(self):
+        return (f"RollupCube(variables={len(self.variables)}, molinos={len(self.watermark)}, "
+                f"niveles={list(self.tables)})")
+
+    @property
+    def molinos(self):
+        return sorted(self.watermark)
+
+    def update(self, rows):
+        """
+        Agrega filas nuevas; las horas ya incluidas de cada molino se ignoran
+        Returns:
+            Número de filas agregadas
+        """
+        last = pd.to_datetime(rows['molino_id'].astype(str).map(self.watermark))
+        rows = rows[(last.isna() | (rows['timestamp'] > last)).to_numpy()]
+        if not len(rows):
+            return 0
+
+        partial = _aggregate(rows, self.variables)
+        for level, stats in partial.items():
+            if level not in self.tables:
+                self.tables[level] = stats
+            else:
+                self.tables[level] = {stat: _combine(stat, self.tables[level][stat], table)
+                                      for stat, table in stats.items()}
+
+        latest = rows.groupby(rows['molino_id'].astype(str))['timestamp'].max()
+        self.watermark.update({mill: max(ts, self.watermark.get(mill, ts)) for mill, ts in latest.items()})
+        return len(rows)
+
+    def query(self, variables=None, level='month', stats='mean', molinos=None, by_mill=True):
+        """
+        Consulta el cubo
+        Args:
+            variables: Variables a incluir (None = todas)
+            level: Resolución ('shift', 'day', 'week', 'month') o perfil ('hour', 'turno')
+            stats: Estadístico o lista (count, sum, mean, var, std, min, max)
+            molinos: Molinos a incluir (None = todos)
+            by_mill: False combina los molinos (índice solo por la clave del nivel)
+        Returns:
+            DataFrame indexado por (molino_id, clave) o por clave; columnas por variable
+            si stats es un texto, o (variable, estadístico) si es una lista
+        """
+        if level not in self.tables:
+            raise ValueError(f"Nivel no disponible: {level} (opciones: {', '.join(self.tables)})")
+        variables = self.variables if variables is None else list(variables)
+        stat_list = [stats] if isinstance(stats, str) else list(stats)
+        unknown = set(stat_list) - set(DERIVED_STATS)
+        if unknown:
+            raise ValueError(f"Estadísticos no soportados: {sorted(unknown)}")
+
+        tables = {stat: table[variables] for stat, table in self.tables[level].items()}
+        if molinos is not None:
+            mask = tables['count'].index.get_level_values('molino_id').isin([str(m) for m in molinos])
+            tables = {stat: table[mask] for stat, table in tables.items()}
+        if not by_mill:
+            grouped = {stat: table.groupby(level='clave', sort=True) for stat, table in tables.items()}
+            tables = {stat: getattr(group, 'sum' if stat in ADDITIVE_STATS else stat)()
+                      for stat, group in grouped.items()}
+
+        result = {stat: _derive(tables, stat) for stat in stat_list}
+        if isinstance(stats, str):
+            return result[stats]
+        return pd.concat(result, axis=1).swaplevel(axis=1)[variables]
+
+    def save(self, path):
+        """Guarda el cubo como carpeta (un Parquet por nivel + manifiesto)"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for level, stats in self.tables.items():
+            long = pd.concat(stats, names=['stat']).reset_index()
+            long.to_parquet(path / f'{level}.parquet', compression='zstd', index=False)
+        manifest = {'version': ROLLUP_VERSION, 'variables': self.variables, 'levels': list(self.tables),
+                    'watermark': {mill: ts.isoformat() for mill, ts in self.watermark.items()}}
+        (path / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Carga un cubo guardado con save()"""
+        path = Path(path)
+        manifest = json.loads((path / MANIFEST_NAME).read_text())
+        if manifest.get('version') != ROLLUP_VERSION:
+            raise ValueError(f"Versión de cubo no soportada: {manifest.get('version')}")
+        tables = {}
+        for level in manifest['levels']:
+            long = pd.read_parquet(path / f'{level}.parquet').set_index(['stat', 'molino_id', 'clave'])
+            tables[level] = {stat: long.xs(stat, level='stat') for stat in STATS}
+        watermark = {mill: pd.Timestamp(ts) for mill, ts in manifest['watermark'].items()}
+        return cls(manifest['variables'], tables, watermark)
+
+
+def molinos_rollups(refresh=False, incremental=True):
+    """
+    Cubo de agregados del dataset de molinos (data/.cache/<dataset>.rollups)
+    Args:
+        refresh: Reconstruye el cubo desde cero
+        incremental: Si cambió el archivo fuente, agrega solo las horas nuevas de cada
+                     molino (ver utils.cached_cube); si no, reconstruye el cubo
+    """
+    return cached_cube(molinos_filename(), 'rollups', RollupCube, ID_COLUMNS, 'Cubo de agregados', '🧮',
+                       refresh=refresh, incremental=incremental)
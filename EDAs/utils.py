@@ -1,6 +1,16 @@
 from pathlib import Path
+import hashlib
+import json
+import sys
+import numpy as np
 import pandas as pd
 
+# Caché binaria de datasets parseados (data/.cache/)
+CACHE_DIR_NAME = '.cache'
+CACHE_ROW_GROUP_SIZE = 8760  # ~1 año horario de un molino por row group
+CATEGORICAL_COLUMNS = ['molino_id', 'turno', 'tipo_falla']
+MANIFEST_NAME = 'manifest.json'  # Manifiesto de los cubos persistidos junto a la caché
+
 def get_project_root():
     """Obtiene la ruta raíz del proyecto"""
     current = Path(__file__).parent
@@ -10,13 +20,214 @@ def get_project_root():
         current = current.parent
     raise FileNotFoundError("No se encontró la raíz del proyecto")
 
+# Layout del dataset particionado: se comparte con los scripts de generación
+sys.path.append(str(get_project_root() / 'generacion_data'))
+from partitioned_store import partition_files  # noqa: E402
+
 def load_data(filename):
-    """Carga datos desde la carpeta data/"""
+    """Carga datos desde la carpeta data/ (CSV, Parquet o Feather)"""
     project_root = get_project_root()
     data_path = project_root / 'data' / filename
+    if data_path.suffix == '.parquet':
+        return pd.read_parquet(data_path)
+    if data_path.suffix == '.feather':
+        return pd.read_feather(data_path)
     return pd.read_csv(data_path)
 
+def _file_hash(path, block_size=1 << 20):
+    """Hash SHA-256 del contenido de un archivo (lectura por bloques)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _build_cache(source_path, cache_path):
+    """Parsea el archivo fuente y lo guarda como Parquet ordenado por molino y tiempo"""
+    if source_path.suffix == '.csv':
+        data = pd.read_csv(source_path, parse_dates=['timestamp'])
+    else:
+        data = load_data(source_path.name)
+
+    for col in CATEGORICAL_COLUMNS:
+        if col in data.columns:
+            data[col] = data[col].astype('category')
+    for col in [c for c in data.columns if c.startswith('falla_en_')]:
+        data[col] = data[col].astype(bool)
+
+    # Orden molino/tiempo: los row groups permiten descartar molinos y rangos al filtrar
+    data = data.sort_values(['molino_id', 'timestamp'])
+    data.to_parquet(cache_path, compression='zstd', index=False, row_group_size=CACHE_ROW_GROUP_SIZE)
+
+def ensure_cache(filename, refresh=False):
+    """
+    Garantiza que la caché Parquet de un archivo de data/ esté vigente
+
+    La caché se invalida si cambia el archivo fuente: se compara mtime y tamaño,
+    y solo si difieren se recalcula el hash del contenido.
+    Returns:
+        Tupla (ruta de la caché, manifiesto con mtime, tamaño y sha256 de la fuente)
+    """
+    source_path = get_project_root() / 'data' / filename
+    cache_dir = source_path.parent / CACHE_DIR_NAME
+    cache_path = cache_dir / f'{source_path.stem}.parquet'
+    manifest_path = cache_dir / f'{source_path.stem}.json'
+
+    stat = source_path.stat()
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    unchanged = (manifest.get('mtime_ns') == stat.st_mtime_ns and manifest.get('size') == stat.st_size)
+
+    if refresh or not cache_path.exists() or not unchanged:
+        source_hash = _file_hash(source_path)
+        if refresh or not cache_path.exists() or manifest.get('sha256') != source_hash:
+            print(f"🗃️  Construyendo caché de {filename}...")
+            cache_dir.mkdir(exist_ok=True)
+            _build_cache(source_path, cache_path)
+        manifest = {'source': filename, 'mtime_ns': stat.st_mtime_ns,
+                    'size': stat.st_size, 'sha256': source_hash}
+        manifest_path.write_text(json.dumps(manifest, indent=2))
+
+    return cache_path, manifest
+
+def cached_data(filename, columns=None, molinos=None, start=None, end=None, refresh=False):
+    """
+    Carga un dataset de data/ a través de una caché Parquet en data/.cache/
+    Args:
+        filename: Archivo fuente dentro de data/
+        columns: Columnas a leer (None = todas)
+        molinos: Molinos a incluir, p.ej. {'M1', 'M3'} (None = todos)
+        start, end: Rango temporal [start, end) sobre 'timestamp'
+        refresh: Fuerza la reconstrucción de la caché
+    """
+    cache_path, _ = ensure_cache(filename, refresh=refresh)
+
+    # Filtros aplicados al leer (solo se leen los row groups necesarios)
+    filters = []
+    if molinos is not None:
+        filters.append(('molino_id', 'in', sorted(molinos)))
+    if start is not None:
+        filters.append(('timestamp', '>=', pd.Timestamp(start)))
+    if end is not None:
+        filters.append(('timestamp', '<', pd.Timestamp(end)))
+
+    # Las columnas de orden se leen siempre, aunque no se pidan
+    order = ['timestamp', 'molino_id']
+    read_columns = None if columns is None else list(columns) + [col for col in order if col not in columns]
+    data = pd.read_parquet(cache_path, columns=read_columns, filters=filters or None)
+
+    # Restaurar siempre el orden original (timestamp, molino), sin importar las columnas pedidas
+    data = data.sort_values(order, kind='stable').reset_index(drop=True)
+    return data if columns is None else data[list(columns)]
+
+def covered_rows(data, watermark):
+    """Máscara de las filas ya incluidas en un agregado incremental (hasta la última hora de cada molino)"""
+    last = pd.to_datetime(data['molino_id'].astype(str).map(watermark))
+    return (last.notna() & (data['timestamp'] <= last)).to_numpy()
+
+def partition_fingerprints(data, columns):
+    """
+    Huella de las filas de cada partición (molino, mes): conteo y suma de hashes por fila
+    Returns:
+        {molino: {'YYYY-MM': 'conteo:hash'}}
+    """
+    hashes = pd.util.hash_pandas_object(data[columns], index=False).to_numpy()
+    months = data['timestamp'].dt.year.to_numpy() * 100 + data['timestamp'].dt.month.to_numpy()
+    keys = pd.MultiIndex.from_arrays([data['molino_id'].astype(str).to_numpy(), months])
+    codes, partitions = pd.factorize(keys, sort=True)
+    totals = np.zeros(len(partitions), dtype=np.uint64)
+    np.add.at(totals, codes, hashes)
+    counts = np.bincount(codes, minlength=len(partitions))
+
+    fingerprints = {}
+    for (mill, month), count, total in zip(partitions, counts, totals):
+        fingerprints.setdefault(mill, {})[f'{month // 100}-{month % 100:02d}'] = f'{count}:{total:016x}'
+    return fingerprints
+
+def rows_since(filename, since):
+    """
+    Filas de la caché desde un instante por molino (los molinos no listados se leen completos)
+    Args:
+        since: {molino: timestamp inicial inclusive}
+    """
+    cache_path, _ = ensure_cache(filename)
+    # Filtro disyuntivo empujado al lector Parquet: solo se leen los row groups necesarios
+    filters = [[('molino_id', '=', mill), ('timestamp', '>=', pd.Timestamp(ts))] for mill, ts in since.items()]
+    filters.append([('molino_id', 'not in', sorted(since))])
+    data = pd.read_parquet(cache_path, filters=filters)
+    return data.sort_values(['timestamp', 'molino_id'], kind='stable').reset_index(drop=True)
+
+def _fingerprint_rows(partitions):
+    """Filas totales registradas en una huella {molino: {mes: 'conteo:hash'}}"""
+    return sum(int(value.split(':', 1)[0]) for months in partitions.values() for value in months.values())
+
+def cached_cube(filename, kind, cube_cls, id_columns, title, icon, refresh=False, incremental=True):
+    """
+    Cubo incremental persistido en data/.cache/<dataset>.<kind> (RollupCube, CovarianceCube)
+
+    Si cambió el archivo fuente se leen solo las filas desde el mes de la última
+    hora de cada molino (y los molinos nuevos). Antes de agregar las horas nuevas
+    se verifican la huella del mes frontera de cada molino y el total de filas de
+    la caché (metadatos Parquet); si no coinciden, el dataset fue regenerado y el
+    cubo se reconstruye.
+    Args:
+        cube_cls: Clase del cubo (build, update, save, load, watermark, variables)
+        id_columns: Columnas de identificación incluidas en la huella junto a las variables
+        title, icon: Nombre del cubo y emoji de los mensajes
+        refresh: Reconstruye el cubo desde cero
+        incremental: False reconstruye ante cualquier cambio del archivo fuente
+    """
+    cache_path, source_manifest = ensure_cache(filename)
+    cube_path = cache_path.with_suffix(f'.{kind}')
+
+    if not refresh and (cube_path / MANIFEST_NAME).exists():
+        cube = cube_cls.load(cube_path)
+        manifest = json.loads((cube_path / MANIFEST_NAME).read_text())
+        cube.source_sha256 = manifest.get('sha256')
+        if cube.source_sha256 == source_manifest['sha256']:
+            return cube
+        stored = manifest.get('partitions')
+        if incremental and cube.watermark and stored:
+            import pyarrow.parquet as pq
+
+            columns = id_columns + cube.variables
+            since = {mill: ts.to_period('M').start_time for mill, ts in cube.watermark.items()}
+            data = rows_since(filename, since)
+            covered = covered_rows(data, cube.watermark)
+            # Filas ya incluidas dentro de lo leído: solo el mes frontera de cada molino
+            boundary = partition_fingerprints(data[covered], columns)
+            recent = partition_fingerprints(data, columns)
+            partitions = {mill: {**stored.get(mill, {}), **recent.get(mill, {})}
+                          for mill in sorted(set(stored) | set(recent))}
+            unchanged = all(boundary.get(mill, {}).get(f'{ts:%Y-%m}') == stored.get(mill, {}).get(f'{ts:%Y-%m}')
+                            for mill, ts in cube.watermark.items())
+            if unchanged and pq.ParquetFile(cache_path).metadata.num_rows == _fingerprint_rows(partitions):
+                added = cube.update(data[~covered])
+                print(f"{icon} {title} actualizado con {added:,} filas nuevas")
+                return _save_cube(cube, cube_path, source_manifest, partitions)
+            print(f"{icon} Cambiaron filas ya incluidas en el {title.lower()}: se reconstruye")
+
+    print(f"{icon} Construyendo {title.lower()} de {filename}...")
+    data = cached_data(filename)
+    cube = cube_cls.build(data)
+    return _save_cube(cube, cube_path, source_manifest, partition_fingerprints(data, id_columns + cube.variables))
+
+def _save_cube(cube, path, source_manifest, partitions):
+    """Guarda el cubo registrando el hash del archivo fuente y la huella de las filas incluidas"""
+    cube.save(path)
+    manifest = json.loads((path / MANIFEST_NAME).read_text())
+    manifest['sha256'] = source_manifest['sha256']
+    manifest['partitions'] = partitions
+    (path / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+    cube.source_sha256 = source_manifest['sha256']
+    return cube
+
 # Función específica para tus datos
-def molinos_data():
-    """Carga el dataset principal de molinos"""
-    return load_data('molinos_mineraperu_dataset.csv')
+def molinos_filename():
+    """Archivo fuente del dataset de molinos en data/ (Parquet si existe, si no CSV)"""
+    if (get_project_root() / 'data' / 'molinos_mineraperu_dataset.parquet').exists():
+        return 'molinos_mineraperu_dataset.parquet'
+    return 'molinos_mineraperu_dataset.csv'
+
+def molinos_data(columns=None, molinos=None, start=None, end=None):
+    """Carga el dataset principal de molinos vía caché"""
+    return cached_data(molinos_filename(), columns=columns, molinos=molinos, start=start, end=end)
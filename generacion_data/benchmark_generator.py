@@ -0,0 +1,225 @@
+"""
+Benchmark por etapas del generador de molinos
+=============================================
+
+Mide tiempo y memoria (pico de tracemalloc) de cada etapa de
+RealisticMillDataGenerator sobre una grilla de tamaños de flota, duraciones y
+frecuencias de muestreo, y guarda los resultados en JSON. El modo de comparación
+contrasta dos corridas y marca las etapas que empeoraron más que un umbral.
+
+Uso:
+    python benchmark_generator.py --mills 6 60 600 --years 0.25 1 --freqs h -o bench.json
+    python benchmark_generator.py --compare base.json bench.json --threshold 0.15
+
+Autor: GRUPO 1 - BREIT
+Fecha: 2025
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from maquina_bolas_data_generator import RealisticMillDataGenerator
+
+# Métodos internos medidos durante generate_complete_dataset
+GENERATION_STAGES = [
+    '_generate_base_conditions',
+    '_schedule_failures',
+    '_apply_degradation_effects',
+    '_generate_failure_targets',
+    '_apply_sensor_noise',
+    '_add_derived_features',
+]
+STAGES = GENERATION_STAGES + ['save_dataset', 'create_specialized_views']
+
+
+class StageTimer:
+    """Acumula tiempo, llamadas y pico de memoria por etapa"""
+
+    def __init__(self, track_memory=True):
+        self.track_memory = track_memory
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def measure(self, stage):
+        entry = self.stages.setdefault(stage, {'seconds': 0.0, 'calls': 0, 'peak_mb': 0.0})
+        if self.track_memory:
+            start_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry['seconds'] += time.perf_counter() - start
+            entry['calls'] += 1
+            if self.track_memory:
+                peak = (tracemalloc.get_traced_memory()[1] - start_memory) / 1024**2
+                entry['peak_mb'] = max(entry['peak_mb'], peak)
+
+    def wrap(self, obj, method_name):
+        """Reemplaza un método de la instancia por una versión medida"""
+        method = getattr(obj, method_name)
+
+        def timed(*args, **kwargs):
+            with self.measure(method_name):
+                return method(*args, **kwargs)
+
+        setattr(obj, method_name, timed)
+
+
+def run_case(n_mills, years, freq, seed=42, track_memory=True):
+    """
+    Ejecuta una configuración completa y mide cada etapa
+    Returns:
+        Diccionario con la configuración, filas generadas y métricas por etapa
+    """
+    generator = RealisticMillDataGenerator(start_date='2023-01-01', duration_years=years,
+                                           n_mills=n_mills, seed=seed, freq=freq)
+    timer = StageTimer(track_memory=track_memory)
+    for stage in GENERATION_STAGES:
+        timer.wrap(generator, stage)
+
+    if track_memory:
+        tracemalloc.start()
+    total_start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            dataset = generator.generate_complete_dataset()
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                with timer.measure('save_dataset'):
+                    generator.save_dataset(dataset, Path(tmp_dir) / 'dataset.parquet')
+            with timer.measure('create_specialized_views'):
+                generator.create_specialized_views(dataset)
+    finally:
+        if track_memory:
+            tracemalloc.stop()
+
+    return {
+        'mills': n_mills, 'years': years, 'freq': freq, 'rows': len(dataset),
+        'total_seconds': time.perf_counter() - total_start,
+        'stages': {stage: timer.stages[stage] for stage in STAGES if stage in timer.stages},
+    }
+
+
+def best_of(results):
+    """Combina repeticiones de una configuración: menor tiempo y menor pico por etapa"""
+    best = dict(results[0])
+    best['total_seconds'] = min(r['total_seconds'] for r in results)
+    best['stages'] = {
+        stage: {
+            'seconds': min(r['stages'][stage]['seconds'] for r in results),
+            'calls': results[0]['stages'][stage]['calls'],
+            'peak_mb': min(r['stages'][stage]['peak_mb'] for r in results),
+        }
+        for stage in results[0]['stages']
+    }
+    return best
+
+
+def environment_info():
+    """Versiones y commit para contextualizar los resultados"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'platform': platform.platform(), 'commit': commit, 'date': pd.Timestamp.now().isoformat()}
+
+
+def run_grid(mills, years, freqs, repeat=1, track_memory=True):
+    """Ejecuta la grilla completa de configuraciones"""
+    results = []
+    for freq in freqs:
+        for duration in years:
+            for n_mills in mills:
+                print(f"⏱️  {n_mills} molinos · {duration} años · {freq} ...", end=' ', flush=True)
+                case = best_of([run_case(n_mills, duration, freq, track_memory=track_memory)
+                                for _ in range(repeat)])
+                print(f"{case['rows']:,} filas en {case['total_seconds']:.2f} s")
+                results.append(case)
+    return {'environment': environment_info(), 'results': results}
+
+
+def compare_runs(baseline, current, threshold=0.10, min_seconds=0.01):
+    """
+    Compara dos corridas por configuración y etapa
+    Args:
+        threshold: Aumento relativo tolerado (0.10 = 10%)
+        min_seconds: Etapas más rápidas que esto en ambas corridas se ignoran (ruido)
+    Returns:
+        DataFrame con tiempos, memoria, razón y marca de regresión
+    """
+    def index(run):
+        return {(r['mills'], r['years'], r['freq']): r for r in run['results']}
+
+    base_cases, current_cases = index(baseline), index(current)
+    rows = []
+    for key in base_cases.keys() & current_cases.keys():
+        for stage in STAGES + ['total']:
+            if stage == 'total':
+                base = {'seconds': base_cases[key]['total_seconds'], 'peak_mb': np.nan}
+                new = {'seconds': current_cases[key]['total_seconds'], 'peak_mb': np.nan}
+            elif stage in base_cases[key]['stages'] and stage in current_cases[key]['stages']:
+                base, new = base_cases[key]['stages'][stage], current_cases[key]['stages'][stage]
+            else:
+                continue
+            ratio = new['seconds'] / base['seconds'] if base['seconds'] > 0 else np.nan
+            memory_ratio = new['peak_mb'] / base['peak_mb'] if base['peak_mb'] > 0 else np.nan
+            significant = max(base['seconds'], new['seconds']) >= min_seconds
+            rows.append({
+                'mills': key[0], 'years': key[1], 'freq': key[2], 'stage': stage,
+                'base_s': base['seconds'], 'new_s': new['seconds'], 'ratio': ratio,
+                'base_mb': base['peak_mb'], 'new_mb': new['peak_mb'], 'memory_ratio': memory_ratio,
+                'regression': bool(significant and (ratio > 1 + threshold or memory_ratio > 1 + threshold)),
+            })
+    columns = ['mills', 'years', 'freq', 'stage', 'base_s', 'new_s', 'ratio',
+               'base_mb', 'new_mb', 'memory_ratio', 'regression']
+    return pd.DataFrame(rows, columns=columns).sort_values(['freq', 'years', 'mills']).reset_index(drop=True)
+
+
+def main():
+    """
+    Benchmark desde línea de comandos
+    """
+    parser = argparse.ArgumentParser(description="Benchmark por etapas del generador de molinos")
+    parser.add_argument('--mills', type=int, nargs='+', default=[6, 60, 600])
+    parser.add_argument('--years', type=float, nargs='+', default=[0.25])
+    parser.add_argument('--freqs', nargs='+', default=['h'])
+    parser.add_argument('--repeat', type=int, default=1, help="Repeticiones por configuración (se toma la mejor)")
+    parser.add_argument('--no-memory', action='store_true', help="Desactiva tracemalloc (menos overhead)")
+    parser.add_argument('-o', '--output', default='benchmark_generator.json')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NUEVO'), help="Compara dos archivos JSON")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Regresión tolerada (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    if args.compare:
+        baseline, current = (json.loads(Path(path).read_text()) for path in args.compare)
+        comparison = compare_runs(baseline, current, threshold=args.threshold)
+        with pd.option_context('display.max_rows', None, 'display.width', 160):
+            print(comparison.round(3).to_string(index=False))
+        regressions = comparison[comparison['regression']]
+        if len(regressions):
+            print(f"\n❌ {len(regressions)} regresiones sobre el umbral de {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"\n✅ Sin regresiones sobre el umbral de {args.threshold:.0%}")
+        return
+
+    report = run_grid(args.mills, args.years, args.freqs, repeat=args.repeat, track_memory=not args.no_memory)
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"💾 Resultados guardados en: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
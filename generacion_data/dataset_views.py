@@ -0,0 +1,232 @@
+"""
+Vistas declarativas del dataset de molinos
+==========================================
+
+Una vista se declara con ViewSpec: proyección de columnas más una regla de
+remuestreo opcional (p.ej. promedios por turno de 8 horas por molino). Las
+vistas no copian el dataset:
+
+- compute(): proyección sin copia sobre un DataFrame en memoria; el remuestreo
+  es un único groupby (molino, intervalo) sobre las columnas proyectadas
+- LazyView: evalúa la vista recién al recorrerla, leyendo solo las columnas
+  proyectadas desde un archivo o un dataset Parquet particionado (un mes a la vez)
+- ViewStream / ViewWriter: aplican la vista a los tramos de la generación en
+  streaming; las filas del último intervalo de cada molino esperan al tramo
+  siguiente, así los intervalos que cruzan tramos se agregan completos
+
+Uso:
+    spec = ViewSpec('process_optimization', columns, resample='8h')
+    vista = LazyView(spec, 'molinos_mineraperu_dataset').collect()
+
+Autor: GRUPO 1 - BREIT
+Fecha: 2025
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from partitioned_store import iter_months
+
+
+class ViewSpec:
+    """
+    Definición de una vista: columnas proyectadas y remuestreo opcional por molino
+    """
+
+    def __init__(self, name, columns, resample=None, key='molino_id', time_col='timestamp',
+                 first_columns=('timestamp', 'turno')):
+        """
+        Args:
+            name: Nombre de la vista (archivo de salida)
+            columns: Columnas proyectadas, en el orden de la vista
+            resample: Regla de remuestreo (p.ej. '8h'); None = vista fila a fila
+            key: Columna de agrupación del remuestreo
+            time_col: Columna temporal que define los intervalos
+            first_columns: Columnas que toman el primer valor del intervalo (el resto, el promedio)
+        """
+        self.name = name
+        self.columns = list(columns)
+        self.resample = resample
+        self.key = key
+        self.time_col = time_col
+        self.first_columns = [col for col in first_columns if col in self.columns]
+        self.mean_columns = [col for col in self.columns
+                             if col not in (key, *self.first_columns)]
+
+    def __repr__(self):
+        return f"ViewSpec({self.name!r}, columnas={len(self.columns)}, resample={self.resample!r})"
+
+    def project(self, frame):
+        """Proyección de columnas sin copiar los datos"""
+        return pd.DataFrame({col: frame[col] for col in self.columns}, copy=False)
+
+    def bins(self, frame):
+        """Inicio del intervalo de cada fila (alineado a la época, como dt.floor)"""
+        return frame[self.time_col].dt.floor(self.resample)
+
+    def aggregate(self, frame, bins=None):
+        """
+        Remuestreo agrupado por (molino, intervalo): promedio de las columnas
+        numéricas y primer valor de first_columns, en una sola pasada de groupby
+        """
+        bins = self.bins(frame) if bins is None else bins
+        grouped = frame.groupby([frame[self.key], bins.rename('_intervalo')], sort=True, observed=True)
+        means = grouped[self.mean_columns].mean()
+        firsts = grouped[self.first_columns].first()
+        result = pd.concat([means, firsts], axis=1).reset_index(level='_intervalo', drop=True)
+        return result.reset_index()
+
+    def compute(self, frame):
+        """Vista completa de un DataFrame en memoria"""
+        projected = self.project(frame)
+        return projected if self.resample is None else self.aggregate(projected)
+
+
+class ViewStream:
+    """
+    Aplica una vista a bloques sucesivos de datos (tramos de generación o meses
+    del dataset particionado)
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self._pending = None
+
+    def push(self, frame):
+        """
+        Procesa un bloque
+        Returns:
+            Filas de la vista ya completas (los intervalos abiertos quedan pendientes)
+        """
+        projected = self.spec.project(frame)
+        if self.spec.resample is None:
+            return projected
+        if self._pending is not None:
+            projected = pd.concat([self._pending, projected], ignore_index=True)
+        bins = self.spec.bins(projected)
+        # El último intervalo de cada molino puede continuar en el bloque siguiente
+        open_bin = bins.groupby(projected[self.spec.key].to_numpy()).transform('max')
+        pending = (bins == open_bin).to_numpy()
+        self._pending = projected[pending]
+        return self.spec.aggregate(projected[~pending], bins[~pending])
+
+    def flush(self):
+        """Cierra los intervalos pendientes"""
+        if self._pending is None or self.spec.resample is None or not len(self._pending):
+            return None
+        pending, self._pending = self._pending, None
+        return self.spec.aggregate(pending)
+
+
+class ViewWriter:
+    """
+    Escribe una vista en streaming como dataset Parquet (un archivo por tramo)
+    """
+
+    def __init__(self, spec, output_dir, transform=None):
+        """
+        Args:
+            spec: ViewSpec a escribir
+            output_dir: Carpeta de la vista (se crea; los part-*.parquet se reemplazan)
+            transform: Función aplicada a cada parte antes de escribir (p.ej. esquema de salida)
+        """
+        self.spec = spec
+        self.output_dir = Path(output_dir)
+        self.transform = transform
+        self.stream = ViewStream(spec)
+        self.rows = 0
+        self.bytes = 0
+        self._buffer = []
+        self._parts = 0
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        for old_part in self.output_dir.glob('part-*.parquet'):
+            old_part.unlink()
+
+    def push(self, frame):
+        """Agrega un bloque de datos (se escribe al llamar a flush_part)"""
+        rows = self.stream.push(frame)
+        if len(rows):
+            self._buffer.append(rows)
+
+    def flush_part(self):
+        """Escribe las filas acumuladas como una nueva parte"""
+        if not self._buffer:
+            return
+        part = pd.concat(self._buffer, ignore_index=True)
+        self._buffer = []
+        if self.transform is not None:
+            part = self.transform(part)
+        part_path = self.output_dir / f'part-{self._parts:05d}.parquet'
+        part.to_parquet(part_path, compression='zstd', index=False)
+        self._parts += 1
+        self.rows += len(part)
+        self.bytes += part_path.stat().st_size
+
+    def close(self):
+        """Cierra intervalos pendientes y escribe la última parte"""
+        rows = self.stream.flush()
+        if rows is not None and len(rows):
+            self._buffer.append(rows)
+        self.flush_part()
+        return self.output_dir
+
+
+class LazyView:
+    """
+    Vista evaluada bajo demanda sobre un DataFrame o un dataset en disco
+    """
+
+    def __init__(self, spec, source):
+        """
+        Args:
+            spec: ViewSpec
+            source: DataFrame, archivo Parquet/Feather/CSV o carpeta Parquet
+                    particionada por molino_id/mes
+        """
+        self.spec = spec
+        self.source = source
+
+    def __repr__(self):
+        source = 'DataFrame' if isinstance(self.source, pd.DataFrame) else str(self.source)
+        return f"LazyView({self.spec.name!r}, fuente={source})"
+
+    def _read_blocks(self):
+        """Bloques de la fuente con solo las columnas proyectadas"""
+        if isinstance(self.source, pd.DataFrame):
+            yield self.source
+            return
+
+        path = Path(self.source)
+        if path.is_dir():
+            yield from iter_months(path, self.spec.columns, time_col=self.spec.time_col, key=self.spec.key)
+        elif path.suffix == '.csv':
+            yield pd.read_csv(path, usecols=self.spec.columns, parse_dates=[self.spec.time_col])
+        elif path.suffix == '.feather':
+            yield pd.read_feather(path, columns=self.spec.columns)
+        else:
+            yield pd.read_parquet(path, columns=self.spec.columns)
+
+    def iter_blocks(self):
+        """Recorre la vista por bloques (memoria acotada a un bloque de la fuente)"""
+        stream = ViewStream(self.spec)
+        for block in self._read_blocks():
+            rows = stream.push(block)
+            if len(rows):
+                yield rows
+        rows = stream.flush()
+        if rows is not None and len(rows):
+            yield rows
+
+    def collect(self):
+        """Materializa la vista completa"""
+        if isinstance(self.source, pd.DataFrame):
+            return self.spec.compute(self.source)
+        blocks = list(self.iter_blocks())
+        if not blocks:
+            return self.spec.project(pd.DataFrame(columns=self.spec.columns))
+        view = pd.concat(blocks, ignore_index=True)
+        if self.spec.resample is not None:
+            # Mismo orden que compute(): por molino y luego por intervalo
+            view = view.sort_values([self.spec.key, self.spec.time_col], kind='stable', ignore_index=True)
+        return view
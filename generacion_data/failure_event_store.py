@@ -0,0 +1,177 @@
+"""
+Almacén de eventos de falla indexado por molino y tiempo
+========================================================
+
+Guarda la tabla de eventos de FailureScheduler ordenada por (molino, tiempo) y
+responde consultas con búsqueda binaria dentro del tramo de cada molino:
+
+- próxima / anterior falla para pares (molino, timestamp)
+- eventos en una ventana temporal
+- as-of join de eventos sobre filas de sensores
+
+Cada consulta cuesta O(log n) por fila: búsqueda binaria vectorizada sobre una
+clave entera (molino, tiempo), por lo que se pueden unir eventos a millones de
+filas sin recorrer timestamps.
+La tabla se persiste en Parquet junto al dataset.
+
+Autor: GRUPO 1 - BREIT
+Fecha: 2025
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Columnas de la tabla de eventos (también FailureScheduler.EVENT_COLUMNS)
+EVENT_COLUMNS = ['mill_id', 'failure_time', 'failure_type', 'severity', 'downtime_hours']
+
+
+class FailureEventStore:
+    """
+    Eventos de falla ordenados por (molino, tiempo) con índice de tramos por molino
+    """
+
+    def __init__(self, events):
+        """
+        Args:
+            events: Tabla de eventos (mill_id, failure_time, failure_type, severity, downtime_hours)
+        """
+        events = events[EVENT_COLUMNS].copy()
+        events['mill_id'] = events['mill_id'].astype('category')
+        events['failure_time'] = events['failure_time'].astype('datetime64[ns]')
+        self.events = events.sort_values(['mill_id', 'failure_time'], kind='stable').reset_index(drop=True)
+
+        # Tramo [bounds[i], bounds[i+1]) de cada molino dentro de la tabla ordenada
+        self.mill_ids = self.events['mill_id'].cat.categories
+        codes = self.events['mill_id'].cat.codes.to_numpy()
+        self.bounds = np.searchsorted(codes, np.arange(len(self.mill_ids) + 1))
+        self.times = self.events['failure_time'].to_numpy(dtype='datetime64[ns]')
+
+        # Clave compuesta entera (molino, rango del tiempo): el rango de cada tiempo
+        # dentro de los tiempos únicos conserva el orden y evita desbordes de int64
+        self.unique_times, time_rank = np.unique(self.times, return_inverse=True)
+        self.keys = codes.astype(np.int64) * (len(self.unique_times) + 1) + time_rank
+
+    @classmethod
+    def from_generator(cls, generator):
+        """Store con las fallas programadas de un RealisticMillDataGenerator"""
+        return cls(generator.scheduled_failures)
+
+    def __len__(self):
+        return len(self.events)
+
+    def __repr__(self):
+        return f"FailureEventStore(eventos={len(self):,}, molinos={len(self.mill_ids)})"
+
+    def _mill_codes(self, mill_ids):
+        """Código de cada molino consultado (-1 si el molino no tiene eventos)"""
+        if isinstance(getattr(mill_ids, 'dtype', None), pd.CategoricalDtype):
+            # Columna categórica: se recodifican solo las categorías, no cada fila
+            mapping = np.append(self.mill_ids.get_indexer(mill_ids.cat.categories), -1)
+            return mapping[np.asarray(mill_ids.cat.codes)]
+        return pd.Categorical(np.asarray(mill_ids, dtype=object), categories=self.mill_ids).codes
+
+    def _search(self, mill_ids, timestamps, side):
+        """
+        Posición de inserción de cada (molino, timestamp) dentro del tramo de su molino
+        Returns:
+            Tupla (posiciones globales, inicio y fin del tramo de cada consulta)
+        """
+        codes = self._mill_codes(mill_ids).astype(np.int64)
+        ts_values = np.asarray(timestamps, dtype='datetime64[ns]')
+
+        # Un evento queda antes de la consulta si su rango es menor al rango de la
+        # consulta (tiempos únicos < t, o <= t con side='right'): una sola búsqueda
+        query_rank = np.searchsorted(self.unique_times, ts_values, side=side)
+        positions = np.searchsorted(self.keys, codes * (len(self.unique_times) + 1) + query_rank)
+
+        known = codes >= 0
+        lo = np.where(known, self.bounds[np.maximum(codes, 0)], positions)
+        hi = np.where(known, self.bounds[np.maximum(codes, 0) + 1], positions)
+        return positions, lo, hi
+
+    def _take(self, positions, valid, timestamps, delta_name, sign):
+        """Columnas de los eventos en `positions` (NaT/NaN donde no hay evento)"""
+        # La posición len(events) apunta a un centinela vacío al final de cada columna
+        idx = np.where(valid, positions, len(self.events))
+        failure_time = np.append(self.times, np.datetime64('NaT', 'ns'))[idx]
+        type_codes = np.append(self.events['failure_type'].cat.codes.to_numpy(), -1)[idx]
+        severity = np.append(self.events['severity'].to_numpy(dtype=np.int8), 0)[idx]
+        downtime = np.append(self.events['downtime_hours'].to_numpy(dtype=float), np.nan)[idx]
+        delta = sign * (failure_time - np.asarray(timestamps, dtype='datetime64[ns]')) / np.timedelta64(1, 'h')
+        return pd.DataFrame({
+            'failure_time': failure_time,
+            'failure_type': pd.Categorical.from_codes(type_codes, dtype=self.events['failure_type'].dtype),
+            'severity': pd.arrays.IntegerArray(severity, mask=~valid),
+            'downtime_hours': downtime,
+            delta_name: delta,
+        })
+
+    def next_failure(self, mill_ids, timestamps, inclusive=False):
+        """
+        Próxima falla de cada par (molino, timestamp)
+        Args:
+            inclusive: Incluir una falla exactamente en el timestamp
+        Returns:
+            DataFrame alineado con la consulta (failure_time, failure_type, severity,
+            downtime_hours, horas_hasta_falla)
+        """
+        positions, _, hi = self._search(mill_ids, timestamps, side='left' if inclusive else 'right')
+        return self._take(positions, positions < hi, timestamps, 'horas_hasta_falla', 1)
+
+    def previous_failure(self, mill_ids, timestamps, inclusive=True):
+        """
+        Falla anterior de cada par (molino, timestamp)
+        Returns:
+            DataFrame alineado con la consulta (..., horas_desde_falla)
+        """
+        positions, lo, _ = self._search(mill_ids, timestamps, side='right' if inclusive else 'left')
+        return self._take(positions - 1, positions > lo, timestamps, 'horas_desde_falla', -1)
+
+    def events_in_window(self, start, end, mill_ids=None):
+        """
+        Eventos con failure_time en [start, end)
+        Args:
+            mill_ids: Molinos a incluir (None = todos)
+        """
+        start, end = np.datetime64(pd.Timestamp(start), 'ns'), np.datetime64(pd.Timestamp(end), 'ns')
+        codes = range(len(self.mill_ids)) if mill_ids is None else self._mill_codes(mill_ids)
+        slices = []
+        for code in codes:
+            if code < 0:
+                continue
+            first, last = self.bounds[code], self.bounds[code + 1]
+            times = self.times[first:last]
+            slices.append(np.arange(first + np.searchsorted(times, start), first + np.searchsorted(times, end)))
+        rows = np.concatenate(slices) if slices else np.array([], dtype=np.int64)
+        return self.events.iloc[rows].reset_index(drop=True)
+
+    def asof_join(self, rows, on='timestamp', by='molino_id', direction='backward', prefix=None):
+        """
+        Une a cada fila el evento anterior ('backward') o siguiente ('forward') de su molino
+        Args:
+            rows: DataFrame de sensores con columnas `by` y `on`
+            prefix: Prefijo de las columnas agregadas (por defecto 'prev_' o 'next_')
+        Returns:
+            Copia de rows con las columnas del evento
+        """
+        if direction == 'backward':
+            matched = self.previous_failure(rows[by], rows[on])
+        elif direction == 'forward':
+            matched = self.next_failure(rows[by], rows[on])
+        else:
+            raise ValueError(f"Dirección no soportada: {direction} (opciones: 'backward', 'forward')")
+        prefix = prefix if prefix is not None else ('prev_' if direction == 'backward' else 'next_')
+        matched.index = rows.index
+        return pd.concat([rows, matched.add_prefix(prefix)], axis=1)
+
+    def save(self, path):
+        """Guarda los eventos en Parquet"""
+        self.events.to_parquet(path, compression='zstd', index=False)
+        return Path(path)
+
+    @classmethod
+    def load(cls, path):
+        """Carga un store guardado con save()"""
+        return cls(pd.read_parquet(path))
@@ -1,92 +1,267 @@
+"""
+Generador de datos sintéticos de chancadoras cónicas secundarias
+================================================================
+
+Sensores de proceso por chancadora y anotación de fallas: cada alerta
+(falla_en_7d == 1) recibe tipo, modo, componente y severidad, y la falla se
+confirma entre 6 y 48 horas después con su componente y sistema afectado.
+Las anotaciones se sortean como arreglos y se asignan con indexación
+vectorizada, por lo que el costo no depende de la cantidad de alertas.
+
+Las fallas se guardan normalizadas en una tabla de eventos (una fila por
+alerta) que se une de vuelta a los sensores por (chancadora_id, timestamp).
+Las columnas de falla en línea, si se piden, son categóricas o dispersas, de
+modo que memoria y tamaño de archivo dependen de la cantidad de eventos.
+
+Uso:
+    df, eventos = generate_crusher_data(num_chancadoras=3, freq="30min", seed=42,
+                                        failure_columns="none", return_events=True)
+    df = attach_failure_columns(df, eventos)
+
+Autor: GRUPO 1 - BREIT
+Fecha: 2025
+"""
+
+import argparse
+from pathlib import Path
 
 import pandas as pd
 import numpy as np
 
-# Parámetros
-num_chancadoras = 3
-start_date = "2023-01-01"
-end_date = "2025-01-01"
-freq = "30min"
+# Catálogo de fallas
+TIPO_FALLA_CHOICES = ["Mecánica", "Lubricación", "Eléctrica"]
+MODO_FALLA_CHOICES = ["Desgaste", "Sobrecalentamiento", "Vibración"]
+COMPONENTE_FALLA_CHOICES = ["Forros", "Bocina", "Cojinete", "Piñón", "Tanque de aceite"]
+SEVERIDAD_FALLA_CHOICES = [1, 2, 3]
+SISTEMA_POR_TIPO = {
+    "Mecánica": "Sistema mecánico",
+    "Lubricación": "Sistema de lubricación",
+    "Eléctrica": "Sistema eléctrico",
+}
+
+PROB_ALERTA = 0.035                 # Probabilidad de alerta por registro
+HORAS_OCURRENCIA = (6, 48)          # La falla ocurre entre 6 y 48 horas después de la alerta
+HORAS_CICLO_OPERACION = 720         # Reinicio del contador de horas de operación
+
+EVENT_COLUMNS = ["chancadora_id", "timestamp", "tipo_falla", "modo_falla", "componente_falla",
+                 "severidad_falla", "timestamp_falla", "sistema_afectado"]
+FAILURE_COLUMNS = ["tipo_falla", "modo_falla", "componente_falla", "severidad_falla",
+                   "falla_ocurrida", "componente_falla_confirmado", "sistema_afectado"]
 
-# Crear timestamps cada 30 minutos por 2 años
-timestamps = pd.date_range(start=start_date, end=end_date, freq=freq, inclusive="left")
 
-# Inicializar lista para guardar los DataFrames
-data = []
+def _categorical(codes, categories):
+    """Columna categórica desde códigos (-1 = sin valor)"""
+    return pd.Categorical.from_codes(codes, categories=categories)
 
-for cid in range(1, num_chancadoras + 1):
+
+def _generate_crusher(cid, timestamps, step_hours, rng):
+    """
+    Sensores y fallas de una chancadora
+    Args:
+        cid: Identificador de la chancadora
+        timestamps: DatetimeIndex de la simulación
+        step_hours: Horas entre registros
+        rng: Generator de numpy propio de la chancadora
+    """
     n = len(timestamps)
-    turno = np.where((timestamps.hour >= 6) & (timestamps.hour < 18), "Día", "Noche")
+    turno = np.where((timestamps.hour >= 6) & (timestamps.hour < 18), 0, 1)
     df = pd.DataFrame({
         "timestamp": timestamps,
         "chancadora_id": cid,
-        "turno": turno,
-        "feed_rate_tph": np.clip(np.random.normal(700, 50, size=n), 400, 1000),
-        "corriente_motor": np.clip(np.random.normal(220, 10, size=n), 180, 260),
-        "potencia_motor_kw": np.clip(np.random.normal(280, 20, size=n), 180, 350),
-        "temp_aceite": np.clip(np.random.normal(55, 5, size=n), 40, 70),
-        "temp_motor": np.clip(np.random.normal(60, 7, size=n), 40, 80),
-        "temp_eje_principal": np.clip(np.random.normal(60, 6, size=n), 45, 75),
-        "temp_bocina_conica": np.clip(np.random.normal(58, 6, size=n), 40, 75),
-        "vibracion_bowl": np.clip(np.random.normal(1.8, 0.4, size=n), 0.5, 4.5),
-        "vibracion_eje_principal": np.clip(np.random.normal(2.0, 0.5, size=n), 0.5, 5.0),
-        "vibracion_manto": np.clip(np.random.normal(2.2, 0.6, size=n), 0.5, 5.5),
-        "vibracion_pinion": np.clip(np.random.normal(1.7, 0.3, size=n), 0.5, 4.0),
-        "voltaje_motor": np.clip(np.random.normal(420, 10, size=n), 380, 460),
-        "factor_potencia": np.round(np.random.uniform(0.85, 1.0, size=n), 3),
-        "abrasividad_ai": np.round(np.random.uniform(0.1, 0.6, size=n), 2),
-        "dureza_mineral": np.random.randint(1, 6, size=n),
-        "horas_operacion_acumuladas": np.mod(np.arange(n) / 2, 720),
-        "ciclos_arranque_parada": np.random.poisson(lam=0.005, size=n).cumsum(),
-        "falla_en_7d": np.random.choice([0, 1], size=n, p=[0.965, 0.035])
+        "turno": _categorical(turno, ["Día", "Noche"]),
+        "feed_rate_tph": np.clip(rng.normal(700, 50, size=n), 400, 1000),
+        "corriente_motor": np.clip(rng.normal(220, 10, size=n), 180, 260),
+        "potencia_motor_kw": np.clip(rng.normal(280, 20, size=n), 180, 350),
+        "temp_aceite": np.clip(rng.normal(55, 5, size=n), 40, 70),
+        "temp_motor": np.clip(rng.normal(60, 7, size=n), 40, 80),
+        "temp_eje_principal": np.clip(rng.normal(60, 6, size=n), 45, 75),
+        "temp_bocina_conica": np.clip(rng.normal(58, 6, size=n), 40, 75),
+        "vibracion_bowl": np.clip(rng.normal(1.8, 0.4, size=n), 0.5, 4.5),
+        "vibracion_eje_principal": np.clip(rng.normal(2.0, 0.5, size=n), 0.5, 5.0),
+        "vibracion_manto": np.clip(rng.normal(2.2, 0.6, size=n), 0.5, 5.5),
+        "vibracion_pinion": np.clip(rng.normal(1.7, 0.3, size=n), 0.5, 4.0),
+        "voltaje_motor": np.clip(rng.normal(420, 10, size=n), 380, 460),
+        "factor_potencia": np.round(rng.uniform(0.85, 1.0, size=n), 3),
+        "abrasividad_ai": np.round(rng.uniform(0.1, 0.6, size=n), 2),
+        "dureza_mineral": rng.integers(1, 6, size=n),
+        "horas_operacion_acumuladas": np.mod(np.arange(n) * step_hours, HORAS_CICLO_OPERACION),
+        "ciclos_arranque_parada": rng.poisson(lam=0.005, size=n).cumsum(),
+        "falla_en_7d": (rng.random(n) < PROB_ALERTA).astype(np.int64),
     })
 
-    # Inicializar columnas de falla
-    df["tipo_falla"] = None
-    df["modo_falla"] = None
-    df["componente_falla"] = None
-    df["severidad_falla"] = None
-    df["falla_ocurrida"] = 0
-    df["componente_falla_confirmado"] = None
-    df["sistema_afectado"] = None
-
-    # Aplicar lógica de fallas condicional
-    tipo_falla_choices = ["Mecánica", "Lubricación", "Eléctrica"]
-    modo_falla_choices = ["Desgaste", "Sobrecalentamiento", "Vibración"]
-    componente_falla_choices = ["Forros", "Bocina", "Cojinete", "Piñón", "Tanque de aceite"]
-    severidad_falla_choices = [1, 2, 3]
-
-    idxs_alerta = df[df["falla_en_7d"] == 1].index
-    for idx in idxs_alerta:
-        tipo = np.random.choice(tipo_falla_choices)
-        modo = np.random.choice(modo_falla_choices)
-        componente = np.random.choice(componente_falla_choices)
-        severidad = np.random.choice(severidad_falla_choices)
-
-        df.at[idx, "tipo_falla"] = tipo
-        df.at[idx, "modo_falla"] = modo
-        df.at[idx, "componente_falla"] = componente
-        df.at[idx, "severidad_falla"] = severidad
-
-        # Simular ocurrencia real de la falla
-        idx_ocurrencia = min(idx + np.random.randint(12, 96), n - 1)
-        df.at[idx_ocurrencia, "falla_ocurrida"] = 1
-        df.at[idx_ocurrencia, "componente_falla_confirmado"] = componente
-
-        if tipo == "Mecánica":
-            sistema = "Sistema mecánico"
-        elif tipo == "Lubricación":
-            sistema = "Sistema de lubricación"
-        elif tipo == "Eléctrica":
-            sistema = "Sistema eléctrico"
+    # Anotación de todas las alertas de una vez
+    alertas = np.flatnonzero(df["falla_en_7d"].to_numpy())
+    k = len(alertas)
+    tipo = rng.integers(len(TIPO_FALLA_CHOICES), size=k)
+    modo = rng.integers(len(MODO_FALLA_CHOICES), size=k)
+    componente = rng.integers(len(COMPONENTE_FALLA_CHOICES), size=k)
+    severidad = np.asarray(SEVERIDAD_FALLA_CHOICES, dtype=np.int8)[rng.integers(len(SEVERIDAD_FALLA_CHOICES), size=k)]
+
+    # Simular ocurrencia real de la falla (desfase en registros según la frecuencia)
+    min_pasos = max(int(round(HORAS_OCURRENCIA[0] / step_hours)), 1)
+    max_pasos = max(int(round(HORAS_OCURRENCIA[1] / step_hours)), min_pasos + 1)
+    ocurrencia = np.minimum(alertas + rng.integers(min_pasos, max_pasos, size=k), n - 1)
+
+    eventos = pd.DataFrame({
+        "chancadora_id": np.full(k, cid),
+        "timestamp": timestamps[alertas],
+        "tipo_falla": _categorical(tipo, TIPO_FALLA_CHOICES),
+        "modo_falla": _categorical(modo, MODO_FALLA_CHOICES),
+        "componente_falla": _categorical(componente, COMPONENTE_FALLA_CHOICES),
+        "severidad_falla": severidad,
+        "timestamp_falla": timestamps[ocurrencia],
+        "sistema_afectado": _categorical(tipo, [SISTEMA_POR_TIPO[t] for t in TIPO_FALLA_CHOICES]),
+    })
+    return df, eventos
+
+
+def attach_failure_columns(df, eventos, sparse=False):
+    """
+    Agrega a los sensores las columnas de falla en línea desde la tabla de eventos
+    Args:
+        df: Sensores con chancadora_id y timestamp
+        eventos: Tabla de eventos (EVENT_COLUMNS), ordenada por alerta dentro de cada chancadora
+        sparse: Usar dtypes dispersos para falla_ocurrida y severidad_falla
+    Returns:
+        Copia de df con FAILURE_COLUMNS (categóricas; sin valor fuera de los eventos)
+    """
+    df = df.copy()
+    n = len(df)
+    keys = pd.MultiIndex.from_arrays([df["chancadora_id"], df["timestamp"]])
+    filas_alerta = keys.get_indexer(pd.MultiIndex.from_arrays([eventos["chancadora_id"], eventos["timestamp"]]))
+    filas_falla = keys.get_indexer(pd.MultiIndex.from_arrays([eventos["chancadora_id"], eventos["timestamp_falla"]]))
+    en_alerta, en_falla = filas_alerta >= 0, filas_falla >= 0
+
+    def scatter(rows, found, column, fill=-1):
+        # Códigos por fila; si dos alertas caen en el mismo registro de ocurrencia, prevalece la última
+        values = eventos[column]
+        codes = values.cat.codes.to_numpy() if isinstance(values.dtype, pd.CategoricalDtype) else values.to_numpy()
+        out = np.full(n, fill, dtype=codes.dtype)
+        out[rows[found]] = codes[found]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return pd.Categorical.from_codes(out, dtype=values.dtype)
+        return out
+
+    for column in ["tipo_falla", "modo_falla", "componente_falla"]:
+        df[column] = scatter(filas_alerta, en_alerta, column)
+    severidad = scatter(filas_alerta, en_alerta, "severidad_falla", fill=0)
+    ocurrida = np.zeros(n, dtype=np.int8)
+    ocurrida[filas_falla[en_falla]] = 1
+    if sparse:
+        df["severidad_falla"] = pd.arrays.SparseArray(np.where(severidad > 0, severidad, np.nan), dtype=pd.SparseDtype(np.float32, np.nan))
+        df["falla_ocurrida"] = pd.arrays.SparseArray(ocurrida, fill_value=0)
+    else:
+        df["severidad_falla"] = pd.arrays.IntegerArray(severidad, mask=severidad == 0)
+        df["falla_ocurrida"] = ocurrida
+    df["componente_falla_confirmado"] = scatter(filas_falla, en_falla, "componente_falla")
+    df["sistema_afectado"] = scatter(filas_falla, en_falla, "sistema_afectado")
+    return df
+
+
+def iter_crusher_tables(num_chancadoras=3, start_date="2023-01-01", end_date="2025-01-01",
+                        freq="30min", seed=None):
+    """
+    Genera sensores y tabla de eventos chancadora por chancadora (memoria acotada a una chancadora)
+    Args:
+        num_chancadoras: Número de chancadoras
+        start_date, end_date: Rango [start_date, end_date) de la simulación
+        freq: Frecuencia de muestreo (p.ej. '30min', '1min', 'h')
+        seed: Semilla (None = aleatoria); cada chancadora usa su propio stream
+    Yields:
+        Tupla (sensores con falla_en_7d, eventos de falla)
+    """
+    timestamps = pd.date_range(start=start_date, end=end_date, freq=freq, inclusive="left")
+    step_hours = pd.Timedelta(pd.tseries.frequencies.to_offset(freq)) / pd.Timedelta(hours=1)
+    streams = np.random.SeedSequence(seed).spawn(num_chancadoras)
+    for cid, stream in enumerate(streams, start=1):
+        yield _generate_crusher(cid, timestamps, step_hours, np.random.default_rng(stream))
+
+
+def _with_failure_columns(df, eventos, failure_columns):
+    """Aplica el modo de columnas de falla en línea ('categorical', 'sparse' o 'none')"""
+    if failure_columns == "none":
+        return df
+    if failure_columns not in ("categorical", "sparse"):
+        raise ValueError(f"Modo no soportado: {failure_columns} (opciones: 'categorical', 'sparse', 'none')")
+    return attach_failure_columns(df, eventos, sparse=failure_columns == "sparse")
+
+
+def iter_crusher_data(num_chancadoras=3, start_date="2023-01-01", end_date="2025-01-01",
+                      freq="30min", seed=None, failure_columns="categorical"):
+    """
+    Genera los datos chancadora por chancadora con las columnas de falla en línea
+    Args:
+        failure_columns: 'categorical', 'sparse' o 'none' (solo sensores y falla_en_7d)
+        Resto: ver iter_crusher_tables
+    """
+    for df, eventos in iter_crusher_tables(num_chancadoras, start_date, end_date, freq, seed):
+        yield _with_failure_columns(df, eventos, failure_columns)
+
+
+def generate_crusher_data(num_chancadoras=3, start_date="2023-01-01", end_date="2025-01-01",
+                          freq="30min", seed=None, failure_columns="categorical", return_events=False):
+    """
+    Dataset completo de chancadoras
+    Args:
+        failure_columns: 'categorical', 'sparse' o 'none'
+        return_events: Devolver también la tabla de eventos
+    Returns:
+        DataFrame de sensores (y tabla de eventos si return_events)
+    """
+    tables = list(iter_crusher_tables(num_chancadoras, start_date, end_date, freq, seed))
+    df = pd.concat([_with_failure_columns(d, e, failure_columns) for d, e in tables], ignore_index=True)
+    if not return_events:
+        return df
+    return df, pd.concat([e for _, e in tables], ignore_index=True)
+
+
+def save_crusher_csv(path="datos_sinteticos_chancadoras_2anios.csv", events_path=None,
+                     failure_columns="categorical", **kwargs):
+    """
+    Escribe el CSV chancadora por chancadora (no mantiene la flota completa en memoria)
+    Args:
+        events_path: Archivo de la tabla de eventos (.parquet o .csv; None = no se guarda)
+        failure_columns: Columnas de falla en línea del CSV ('none' = solo la tabla de eventos)
+        kwargs: Parámetros de iter_crusher_tables
+    """
+    path = Path(path)
+    events = []
+    for i, (df, eventos) in enumerate(iter_crusher_tables(**kwargs)):
+        df = _with_failure_columns(df, eventos, failure_columns)
+        df.to_csv(path, index=False, mode="w" if i == 0 else "a", header=i == 0)
+        events.append(eventos)
+
+    if events_path is not None:
+        events = pd.concat(events, ignore_index=True)
+        if Path(events_path).suffix == ".parquet":
+            events.to_parquet(events_path, index=False)
         else:
-            sistema = None
-        df.at[idx_ocurrencia, "sistema_afectado"] = sistema
+            events.to_csv(events_path, index=False)
+    return path
+
+
+def main():
+    """
+    Genera el CSV de sensores y la tabla de eventos de falla
+    """
+    parser = argparse.ArgumentParser(description="Datos sintéticos de chancadoras cónicas")
+    parser.add_argument("-o", "--output", default="datos_sinteticos_chancadoras_2anios.csv")
+    parser.add_argument("--events", default="datos_sinteticos_chancadoras_2anios_fallas.csv",
+                        help="Tabla de eventos de falla (.csv o .parquet)")
+    parser.add_argument("--failure-columns", choices=["categorical", "sparse", "none"], default="categorical",
+                        help="Columnas de falla en el CSV de sensores ('none' = solo tabla de eventos)")
+    parser.add_argument("--chancadoras", type=int, default=3)
+    parser.add_argument("--start", default="2023-01-01")
+    parser.add_argument("--end", default="2025-01-01")
+    parser.add_argument("--freq", default="30min")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
 
-    data.append(df)
+    save_crusher_csv(args.output, events_path=args.events, failure_columns=args.failure_columns,
+                     num_chancadoras=args.chancadoras, start_date=args.start, end_date=args.end,
+                     freq=args.freq, seed=args.seed)
 
-# Concatenar todos los datos
-df_final = pd.concat(data, ignore_index=True)
 
-# Guardar a CSV
-df_final.to_csv("datos_sinteticos_chancadoras_2anios.csv", index=False)
+if __name__ == "__main__":
+    # Guardar a CSV (por defecto 3 chancadoras, 2 años cada 30 minutos)
+    main()
@@ -15,11 +15,49 @@ Fecha: 2025
 import numpy as np
 import pandas as pd
 import datetime as dt
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from dataset_views import LazyView, ViewSpec, ViewWriter
+from failure_event_store import EVENT_COLUMNS, FailureEventStore
+from online_anomaly import OnlineAnomalyScorer
+from partitioned_store import partition_dir
+from profiling_hooks import GenerationProfiler, frame_nbytes
 from scipy import stats
 from scipy.interpolate import interp1d
 import warnings
 warnings.filterwarnings('ignore')
 
+# Features de tendencia: (columna destino, columna origen, ventana en horas, mínimo de registros)
+TREND_FEATURES = [
+    ('vibracion_trend_7d', 'vibracion_cojinete_feed_h', 168, 24),
+    ('temperatura_trend_7d', 'temp_cojinete_feed', 168, 24),
+    ('energia_trend_24h', 'consumo_energetico_especifico', 24, 12),
+    ('throughput_trend_24h', 'throughput_real', 24, 12),
+]
+
+# Scores de anomalía: (columna destino, columnas promediadas en la señal compuesta)
+ANOMALY_FEATURES = [
+    ('anomaly_score_vibration', ['vibracion_cojinete_feed_h', 'vibracion_cojinete_discharge_h']),
+    ('anomaly_score_electrical', ['corriente_motor']),
+]
+
+# Esquema declarado de salida (dataset principal y vistas).
+# Columnas numéricas no listadas (sensores y features) se guardan como float32;
+# los targets falla_en_Nd siempre son booleanos.
+OUTPUT_SCHEMA = {
+    'timestamp': 'datetime64[ns]',
+    'molino_id': 'category',
+    'turno': pd.CategoricalDtype(['A', 'B', 'C'], ordered=True),
+    'tipo_falla': 'category',
+    'severidad_falla': 'int8',
+    'horas_operacion_acumuladas': 'int32',
+    'ciclos_arranque_parada': 'int16',
+}
+DEFAULT_NUMERIC_DTYPE = 'float32'
+PARQUET_ROW_GROUP_SIZE = 65_536  # Filas por row group (~256 KB por columna float32)
+
 class MillPhysicsEngine:
     """
     Motor de física que implementa correlaciones fundamentales de molienda
@@ -128,29 +166,75 @@ class DegradationModels:
             }
         }
     
-    def generate_bearing_degradation(self, base_vibration, hours_to_failure, failure_type='bearing_outer_race'):
+    def generate_bearing_degradation(self, base_vibration, hours_to_failure, failure_type='bearing_outer_race',
+                                     rng=None):
         """
         Genera patrón de degradación realista para rodamientos
         """
+        rng = rng if rng is not None else np.random.default_rng()
         pattern = self.degradation_patterns[failure_type]
-        precursor_hours = np.random.uniform(*pattern['precursor_days']) * 24
+        precursor_hours = rng.uniform(*pattern['precursor_days']) * 24
         
         if hours_to_failure > precursor_hours:
             # Operación normal
-            return base_vibration * np.random.normal(1.0, 0.05)
+            return base_vibration * rng.normal(1.0, 0.05)
         else:
             # Fase de degradación
             progress = (precursor_hours - hours_to_failure) / precursor_hours
             
-            if pattern['growth_pattern'] == 'exponential':
-                # Crecimiento exponencial típico de fallas de rodamientos
-                multiplier = 1.0 + 4.0 * (np.exp(3 * progress) - 1) / (np.exp(3) - 1)
-            else:
-                # Crecimiento lineal
-                multiplier = 1.0 + 2.0 * progress
-                
-            return base_vibration * multiplier * np.random.normal(1.0, 0.1)
-    
+            multiplier = self._growth_multiplier(progress, pattern['growth_pattern'])
+            return base_vibration * multiplier * rng.normal(1.0, 0.1)
+
+    def generate_bearing_degradation_batch(self, base_vibration, hours_to_failure,
+                                           failure_type='bearing_outer_race', rng=None):
+        """
+        Versión vectorizada de generate_bearing_degradation para una ventana completa
+        Args:
+            base_vibration: Señal base de vibración (array, una entrada por hora)
+            hours_to_failure: Horas restantes hasta la falla (array, mismo largo)
+            failure_type: Tipo de falla (define patrón de crecimiento)
+            rng: Generador aleatorio (np.random.Generator)
+        Returns:
+            Tupla (vibración horizontal, vibración vertical) degradadas
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        pattern = self.degradation_patterns[failure_type]
+        base_vibration = np.asarray(base_vibration, dtype=float)
+        hours_to_failure = np.asarray(hours_to_failure, dtype=float)
+        n = len(hours_to_failure)
+
+        # Igual que la versión escalar: un horizonte de precursores por hora
+        precursor_hours = rng.uniform(*pattern['precursor_days'], n) * 24
+        degrading = hours_to_failure <= precursor_hours
+
+        # Operación normal por defecto
+        multiplier = np.ones(n)
+        noise = rng.normal(1.0, 0.05, n)
+
+        # Fase de degradación
+        progress = (precursor_hours[degrading] - hours_to_failure[degrading]) / precursor_hours[degrading]
+        multiplier[degrading] = self._growth_multiplier(progress, pattern['growth_pattern'])
+        noise[degrading] = rng.normal(1.0, 0.1, degrading.sum())
+
+        signal_h = base_vibration * multiplier * noise
+        signal_v = signal_h * rng.normal(0.98, 0.03, n)
+        return signal_h, signal_v
+
+    @staticmethod
+    def _growth_multiplier(progress, growth_pattern):
+        """
+        Multiplicador de la señal según progreso de degradación (0-1)
+        """
+        if growth_pattern == 'exponential':
+            # Crecimiento exponencial típico de fallas de rodamientos
+            return 1.0 + 4.0 * (np.exp(3 * progress) - 1) / (np.exp(3) - 1)
+        elif growth_pattern == 'sudden':
+            # Falla súbita: señal estable hasta el último 20% y luego salto abrupto
+            return 1.0 + 4.0 * np.clip((progress - 0.8) / 0.2, 0, 1)
+        else:
+            # Crecimiento lineal
+            return 1.0 + 2.0 * progress
+
     def generate_liner_wear_effect(self, base_power, wear_percentage):
         """
         Genera efecto del desgaste de liners en consumo energético
@@ -176,7 +260,9 @@ class IndustrialNoiseModels:
     Modelos de ruido realistas para sensores industriales en ambiente minero
     """
     
-    def __init__(self):
+    OUTLIER_PROBABILITY = 0.01  # Outliers ocasionales (1% de las lecturas)
+    
+    def __init__(self, dtype=np.float64):
         # Parámetros de ruido por tipo de sensor (basado en especificaciones técnicas)
         self.noise_params = {
             'vibration': {'base_noise': 0.05, 'seasonal': 0.02, 'random': 0.03},
@@ -184,29 +270,338 @@ class IndustrialNoiseModels:
             'electrical': {'base_noise': 0.01, 'seasonal': 0.005, 'random': 0.02},
             'process': {'base_noise': 0.03, 'seasonal': 0.01, 'random': 0.025}
         }
+        self.dtype = dtype  # np.float32 reduce a la mitad memoria y ancho de banda
     
-    def add_sensor_noise(self, signal, sensor_type, timestamp):
+    @staticmethod
+    def seasonal_wave(timestamp):
+        """Onda estacional anual sin(2π·día/365), común a todos los sensores"""
+        day_of_year = pd.DatetimeIndex(timestamp).dayofyear.to_numpy()
+        return np.sin(2 * np.pi * day_of_year / 365)
+    
+    def add_sensor_noise(self, signal, sensor_type, timestamp, rng=None):
         """
         Agrega ruido realista específico del tipo de sensor
         """
+        noisy = self.add_sensor_noise_batch(
+            np.asarray(signal, dtype=float)[:, None], sensor_type, self.seasonal_wave(timestamp), rng
+        )[:, 0]
+        if isinstance(signal, pd.Series):
+            return pd.Series(noisy, index=signal.index, name=signal.name)
+        return noisy
+    
+    def add_sensor_noise_batch(self, block, sensor_type, seasonal_wave, rng=None, dtype=None):
+        """
+        Agrega ruido a un bloque 2D de sensores del mismo tipo en una pasada
+        Args:
+            block: Arreglo (registros x sensores)
+            sensor_type: 'vibration', 'temperature', 'electrical' o 'process'
+            seasonal_wave: Onda estacional por registro (seasonal_wave), calculada una vez
+            rng: np.random.Generator
+            dtype: Tipo de cálculo (por defecto self.dtype)
+        Returns:
+            Bloque con ruido (nuevo arreglo del tipo indicado)
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        dtype = np.dtype(dtype or self.dtype)
         params = self.noise_params.get(sensor_type, self.noise_params['process'])
         
-        # Ruido base del sensor
-        base_noise = np.random.normal(0, params['base_noise'], len(signal))
-        
-        # Ruido estacional (variaciones ambientales)
-        day_of_year = timestamp.dt.dayofyear
-        seasonal_noise = params['seasonal'] * np.sin(2 * np.pi * day_of_year / 365)
-        
-        # Ruido aleatorio de alta frecuencia
-        random_noise = np.random.normal(0, params['random'], len(signal))
-        
-        # Outliers ocasionales (1% de probabilidad)
-        outlier_mask = np.random.random(len(signal)) < 0.01
-        outlier_noise = np.where(outlier_mask, 
-                                np.random.normal(0, params['base_noise'] * 5), 0)
-        
-        return signal * (1 + base_noise + seasonal_noise + random_noise + outlier_noise)
+        # Ruido base + aleatorio de alta frecuencia: gaussianas independientes,
+        # se combinan en un solo sorteo con la desviación conjunta
+        sigma = np.hypot(params['base_noise'], params['random'])
+        factor = rng.standard_normal(block.shape, dtype=dtype)
+        factor *= sigma
+        factor += 1
+        
+        # Ruido estacional (variaciones ambientales), compartido por todas las columnas
+        factor += (params['seasonal'] * np.asarray(seasonal_wave)).astype(dtype)[:, None]
+        
+        # Outliers ocasionales: posiciones por saltos geométricos (solo ~1% de sorteos)
+        n_values = factor.size
+        expected = n_values * self.OUTLIER_PROBABILITY
+        gaps = rng.geometric(self.OUTLIER_PROBABILITY, int(expected + 6 * np.sqrt(expected) + 16))
+        positions = np.cumsum(gaps) - 1
+        positions = positions[positions < n_values]
+        factor.reshape(-1)[positions] += rng.normal(0, params['base_noise'] * 5, len(positions)).astype(dtype)
+        
+        factor *= block
+        return factor
+
+
+class FailureScheduler:
+    """
+    Programador de fallas vectorizado para toda la flota.
+    Sortea en bloques matriciales (molinos x eventos) los tiempos entre fallas
+    (Weibull), la recuperación posterior, el tipo, la severidad y la detención,
+    y entrega una tabla de eventos columnar ordenada por (molino, tiempo).
+    """
+
+    # Probabilidades de falla por tipo basadas en literatura
+    FAILURE_TYPE_PROBS = {
+        'bearing_feed': 0.35,       # 35% de fallas
+        'bearing_discharge': 0.35,  # 35% de fallas
+        'liner_wear': 0.20,         # 20% de fallas
+        'motor_electrical': 0.05,   # 5% de fallas
+        'lubrication': 0.05,        # 5% de fallas
+    }
+    # Multiplicadores según tendencia de falla del molino
+    TENDENCY_FACTORS = {
+        'bearings': {'bearing_feed': 1.5, 'bearing_discharge': 1.5},
+        'liners': {'liner_wear': 2.0},
+        'lubrication': {'lubrication': 3.0},
+    }
+    # Severidad (1=menor, 2=moderada, 3=crítica) por tipo de falla
+    SEVERITY_PROBS = {
+        'bearing_feed': [0.1, 0.6, 0.3],
+        'bearing_discharge': [0.1, 0.6, 0.3],
+        'liner_wear': [0.3, 0.6, 0.1],
+        'motor_electrical': [0.5, 0.4, 0.1],
+        'lubrication': [0.5, 0.4, 0.1],
+    }
+    # Horas de detención por severidad (rango uniforme)
+    DOWNTIME_HOURS = {1: (4, 12), 2: (12, 48), 3: (48, 168)}
+
+    EVENT_COLUMNS = EVENT_COLUMNS  # Esquema único de la tabla de eventos (failure_event_store)
+
+    def __init__(self, base_mtbf_hours=4380, recovery_days=(7, 30), weibull_shape=2.0):
+        self.base_mtbf_hours = base_mtbf_hours  # Horas promedio entre fallas (6 meses)
+        self.recovery_days = recovery_days      # Operación garantizada tras cada falla
+        self.weibull_shape = weibull_shape
+        self.failure_types = list(self.FAILURE_TYPE_PROBS)
+
+    def type_probabilities(self, mill_configs):
+        """Matriz (molinos x tipos) de probabilidades de tipo de falla normalizadas"""
+        probs = np.tile(list(self.FAILURE_TYPE_PROBS.values()), (len(mill_configs), 1))
+        for i, config in enumerate(mill_configs.values()):
+            for failure_type, factor in self.TENDENCY_FACTORS.get(config['failure_tendency'], {}).items():
+                probs[i, self.failure_types.index(failure_type)] *= factor
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def empty_table(self, mill_ids=()):
+        """Tabla de eventos vacía con los tipos declarados"""
+        return self._build_table(mill_ids, np.array([], dtype=int), np.array([], dtype='datetime64[ns]'),
+                                 np.array([], dtype=int), np.array([], dtype=int), np.array([]))
+
+    def _build_table(self, mill_ids, mill_idx, failure_times, type_idx, severity, downtime):
+        return pd.DataFrame({
+            'mill_id': pd.Categorical.from_codes(mill_idx, categories=list(mill_ids)),
+            'failure_time': failure_times,
+            'failure_type': pd.Categorical.from_codes(type_idx, categories=self.failure_types),
+            'severity': severity.astype('int8'),
+            'downtime_hours': downtime.astype('float32'),
+        })
+
+    def schedule(self, mill_configs, start, end, rng):
+        """
+        Programa las fallas de todos los molinos en [start, end)
+        Args:
+            mill_configs: Diccionario {molino: configuración} (condition, failure_tendency)
+            start, end: Período de simulación
+            rng: np.random.Generator de la programación de fallas
+        Returns:
+            DataFrame de eventos (mill_id, failure_time, failure_type, severity, downtime_hours)
+        """
+        mill_ids = list(mill_configs)
+        n_mills = len(mill_ids)
+        if n_mills == 0:
+            return self.empty_table()
+        horizon = (pd.Timestamp(end) - pd.Timestamp(start)) / pd.Timedelta(hours=1)
+        mtbf = self.base_mtbf_hours * np.array([config['condition'] for config in mill_configs.values()])
+
+        # Bloque de eventos por molino según el ciclo medio (falla + recuperación), con margen
+        mean_cycle = mtbf.min() * 0.886 + np.mean(self.recovery_days) * 24  # Γ(1.5) ≈ 0.886
+        block = int(np.ceil(1.5 * horizon / mean_cycle)) + 8
+
+        # Tiempo de cada falla: Σ tiempos a falla + Σ recuperaciones previas
+        offsets = np.zeros((n_mills, 0))
+        last = np.zeros(n_mills)
+        while offsets.shape[1] == 0 or (last < horizon).any():
+            time_to_failure = rng.weibull(self.weibull_shape, (n_mills, block)) * mtbf[:, None]
+            recovery = rng.uniform(*self.recovery_days, (n_mills, block)) * 24
+            cycle = time_to_failure + np.concatenate([np.zeros((n_mills, 1)), recovery[:, :-1]], axis=1)
+            times = last[:, None] + np.cumsum(cycle, axis=1)
+            offsets = np.concatenate([offsets, times], axis=1)
+            last = times[:, -1] + recovery[:, -1]
+
+        # Tipo y severidad por CDF inversa (un uniforme por evento)
+        n_events = offsets.shape[1]
+        type_cdf = np.cumsum(self.type_probabilities(mill_configs), axis=1)
+        type_idx = (rng.random((n_mills, n_events))[..., None] > type_cdf[:, None, :]).sum(axis=-1)
+        type_idx = np.minimum(type_idx, len(self.failure_types) - 1)
+        severity_cdf = np.cumsum([self.SEVERITY_PROBS[t] for t in self.failure_types], axis=1)
+        severity = (rng.random((n_mills, n_events))[..., None] > severity_cdf[type_idx]).sum(axis=-1) + 1
+        severity = np.minimum(severity, 3)
+        downtime_lo, downtime_hi = np.array([self.DOWNTIME_HOURS[s] for s in (1, 2, 3)]).T
+        downtime = rng.uniform(downtime_lo[severity - 1], downtime_hi[severity - 1])
+
+        # Solo eventos dentro del período (orden molino, tiempo)
+        mill_idx, event_idx = np.nonzero(offsets < horizon)
+        failure_times = (np.datetime64(pd.Timestamp(start), 'ns')
+                         + (offsets[mill_idx, event_idx] * 3.6e12).astype('timedelta64[ns]'))
+        return self._build_table(mill_ids, mill_idx, failure_times, type_idx[mill_idx, event_idx],
+                                 severity[mill_idx, event_idx], downtime[mill_idx, event_idx])
+
+    @staticmethod
+    def split_by_mill(events):
+        """Diccionario {molino: eventos} sin filtrar la tabla una vez por molino"""
+        codes = events['mill_id'].cat.codes.to_numpy()
+        categories = events['mill_id'].cat.categories
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+        return {mill_id: events.iloc[order[bounds[i]:bounds[i + 1]]].reset_index(drop=True)
+                for i, mill_id in enumerate(categories)}
+
+
+class FailureLabelEngine:
+    """
+    Motor de etiquetado de fallas basado en búsqueda por intervalos.
+    Ordena las fallas una sola vez y ubica la próxima falla de cada registro
+    con búsqueda binaria: O(filas · log fallas) para cualquier lista de horizontes.
+    """
+
+    def __init__(self, horizons_days=(7, 14, 30), type_window_days=30, no_failure_days=365.0):
+        self.horizons_days = tuple(horizons_days)
+        self.type_window_days = type_window_days  # Ventana para tipo/severidad
+        self.no_failure_days = no_failure_days    # Valor si no hay falla futura
+
+    def target_columns(self):
+        """Nombres de columnas target generadas, en orden"""
+        return ([f'falla_en_{h}d' for h in self.horizons_days] +
+                ['tipo_falla', 'severidad_falla', 'dias_hasta_falla'])
+
+    def label(self, timestamps, failures):
+        """
+        Calcula targets de falla para una serie de timestamps
+        Args:
+            timestamps: Timestamps de los registros (datetime64)
+            failures: Tabla de eventos (failure_time, failure_type, severity) de FailureScheduler
+        Returns:
+            DataFrame con falla_en_Nd, tipo_falla, severidad_falla y dias_hasta_falla
+        """
+        ts_values = np.asarray(timestamps, dtype='datetime64[ns]')
+        n_points = len(ts_values)
+
+        failures = failures.sort_values('failure_time', kind='stable')
+        failure_times = failures['failure_time'].to_numpy(dtype='datetime64[ns]')
+        failure_types = np.concatenate([['normal'], failures['failure_type'].to_numpy(dtype=object)])
+        severities = np.concatenate([[0], failures['severity'].to_numpy(dtype=int)])
+
+        # Próxima falla estrictamente posterior a cada registro
+        next_idx = np.searchsorted(failure_times, ts_values, side='right')
+        has_next = next_idx < len(failure_times)
+
+        # Vida útil remanente (RUL) en días hasta la próxima falla
+        days_to_failure = np.full(n_points, np.inf)
+        days_to_failure[has_next] = (
+            (failure_times[next_idx[has_next]] - ts_values[has_next]) / np.timedelta64(1, 'D')
+        )
+
+        targets = {f'falla_en_{h}d': days_to_failure <= h for h in self.horizons_days}
+
+        # Tipo y severidad de la próxima falla dentro de la ventana (0 = sin falla)
+        in_window = days_to_failure <= self.type_window_days
+        event_code = np.where(in_window, next_idx + 1, 0)
+        targets['tipo_falla'] = failure_types[event_code]
+        targets['severidad_falla'] = severities[event_code]
+        targets['dias_hasta_falla'] = np.where(has_next, days_to_failure, self.no_failure_days)
+
+        return pd.DataFrame(targets, index=getattr(timestamps, 'index', None))
+
+
+class RollingFeatureEngine:
+    """
+    Motor de features de tendencia y anomalía para todos los molinos en una pasada.
+    Agrupa las filas por molino con un único ordenamiento estable (sin copias por
+    molino) y calcula cada media móvil con sumas acumuladas acotadas al grupo.
+    """
+
+    def __init__(self, trend_specs=TREND_FEATURES, anomaly_specs=ANOMALY_FEATURES):
+        self.trend_specs = list(trend_specs)
+        self.anomaly_specs = list(anomaly_specs)
+
+    @property
+    def max_window(self):
+        """Ventana más larga (filas de historia necesarias entre tramos)"""
+        return max(window for _, _, window, _ in self.trend_specs)
+
+    @property
+    def trend_sources(self):
+        """Columnas origen de las tendencias, sin duplicados"""
+        return list(dict.fromkeys(source for _, source, _, _ in self.trend_specs))
+
+    @staticmethod
+    def specs_for_step(trend_specs, step_hours):
+        """Convierte ventanas y mínimos en horas a filas para una frecuencia de muestreo"""
+        return [(feature, source, max(1, round(window / step_hours)), max(1, round(min_periods / step_hours)))
+                for feature, source, window, min_periods in trend_specs]
+
+    @staticmethod
+    def rolling_mean(values, group_starts, window, min_periods):
+        """
+        Media móvil de valores agrupados contiguamente (ignora NaN como pandas)
+        Args:
+            values: Valores ordenados por grupo y tiempo
+            group_starts: Para cada fila, índice de inicio de su grupo
+            window: Tamaño de ventana en filas
+            min_periods: Mínimo de observaciones válidas para emitir valor
+        """
+        valid = ~np.isnan(values)
+        cum_sum = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+        cum_count = np.concatenate([[0], np.cumsum(valid)])
+
+        idx = np.arange(len(values))
+        lo = np.maximum(idx - window + 1, group_starts)
+        total = cum_sum[idx + 1] - cum_sum[lo]
+        count = cum_count[idx + 1] - cum_count[lo]
+        return np.where(count >= min_periods, total / np.maximum(count, 1), np.nan)
+
+    def add_trend_features(self, dataset, group_col='molino_id'):
+        """Agrega todas las tendencias, por molino, respetando el orden temporal de las filas"""
+        codes, _ = pd.factorize(dataset[group_col])
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        group_starts = np.searchsorted(sorted_codes, sorted_codes, side='left')
+
+        for feature, source, window, min_periods in self.trend_specs:
+            values = dataset[source].to_numpy(dtype=float)[order]
+            result = np.empty(len(values))
+            result[order] = self.rolling_mean(values, group_starts, window, min_periods)
+            dataset[feature] = result
+        return dataset
+
+    def add_anomaly_features(self, dataset, group_col='molino_id', scorers=None):
+        """
+        Agrega |z-score| de cada señal compuesta respecto de la historia de su molino
+        Args:
+            scorers: Diccionario {feature: OnlineAnomalyScorer} para scores causales
+                     (cada registro contra su historia previa). Sin scorers se usa
+                     la media y desviación de toda la historia del molino
+        """
+        codes, uniques = pd.factorize(dataset[group_col])
+        n_groups = len(uniques)
+        if scorers is not None:
+            order = np.argsort(codes, kind='stable')
+            group_bounds = np.searchsorted(codes[order], np.arange(n_groups + 1))
+
+        for feature, sources in self.anomaly_specs:
+            composite = dataset[sources].to_numpy(dtype=float).mean(axis=1)
+            if scorers is not None:
+                scores = np.empty(len(composite))
+                for g, group_id in enumerate(uniques):
+                    rows = order[group_bounds[g]:group_bounds[g + 1]]
+                    scores[rows] = scorers[feature].update_batch(group_id, composite[rows])
+                dataset[feature] = scores
+                continue
+            valid = ~np.isnan(composite)
+            filled = np.where(valid, composite, 0.0)
+
+            count = np.bincount(codes, weights=valid, minlength=n_groups)
+            mean = np.bincount(codes, weights=filled, minlength=n_groups) / count
+            deviation = np.where(valid, composite - mean[codes], 0.0)
+            std = np.sqrt(np.bincount(codes, weights=deviation ** 2, minlength=n_groups) / count)
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                dataset[feature] = np.abs((composite - mean[codes]) / std[codes])
+        return dataset
 
 
 class RealisticMillDataGenerator:
@@ -215,28 +610,57 @@ class RealisticMillDataGenerator:
     datos sintéticos realistas de molinos de bolas.
     """
     
-    def __init__(self, start_date='2023-01-01', duration_years=2.5):
+    def __init__(self, start_date='2023-01-01', duration_years=2.5, label_horizons_days=(7, 14, 30),
+                 n_mills=6, seed=None, trend_features=TREND_FEATURES, anomaly_mode='batch', freq='h',
+                 profiler=None, verbose=True):
         self.start_date = pd.to_datetime(start_date)
         self.duration_years = duration_years
         # Convertir años decimales a días para evitar error de pd.DateOffset
         duration_days = int(duration_years * 365.25)
         self.end_date = self.start_date + pd.Timedelta(days=duration_days)
         
+        # Frecuencia de muestreo (por defecto horaria); las ventanas en horas se convierten a filas
+        self.freq = freq
+        self.step_hours = pd.Timedelta(pd.tseries.frequencies.to_offset(freq)) / pd.Timedelta(hours=1)
+        
         # Inicializar motores de física y degradación
         self.physics = MillPhysicsEngine()
         self.degradation = DegradationModels()
         self.noise = IndustrialNoiseModels()
+        self.scheduler = FailureScheduler()
+        self.labels = FailureLabelEngine(horizons_days=label_horizons_days)
+        self.features = RollingFeatureEngine(
+            trend_specs=RollingFeatureEngine.specs_for_step(trend_features, self.step_hours)
+        )
+        
+        # Scores de anomalía: 'batch' (z-score sobre toda la historia del molino) o un
+        # modo de OnlineAnomalyScorer ('cumulative', 'ewm', 'window') sin mirar al futuro
+        self.anomaly_mode = anomaly_mode
+        self.anomaly_scorers = {}
+        
+        # Semilla raíz: cada molino recibe su propio flujo aleatorio derivado de ella
+        self.seed = np.random.SeedSequence(seed).entropy
         
         # Configuración única por molino (heterogeneidad realista)
-        self.mill_configs = self._initialize_mill_configs()
+        self.mill_configs = self._initialize_mill_configs(n_mills)
         
-        # Lista para almacenar eventos de falla programados
-        self.scheduled_failures = []
+        # Tabla de eventos de falla programados (mill_id, failure_time, failure_type, severity, downtime_hours)
+        self.scheduled_failures = self.scheduler.empty_table(self.mill_configs)
         
-    def _initialize_mill_configs(self):
+        # Instrumentación por etapa (tiempos, memoria, filas) y mensajes de progreso
+        self.profiler = profiler or GenerationProfiler()
+        self.verbose = verbose
+    
+    def _log(self, *args):
+        """Mensaje de progreso (silenciado con verbose=False)"""
+        if self.verbose:
+            print(*args)
+        
+    def _initialize_mill_configs(self, n_mills=6):
         """
         Inicializa configuraciones únicas para cada molino
         Simula heterogeneidad real de equipos en operación
+        (flotas de más de 6 molinos reutilizan los perfiles M1-M6 de forma cíclica)
         """
         configs = {}
         base_config = {
@@ -262,47 +686,53 @@ class RealisticMillDataGenerator:
                    'failure_tendency': 'normal', 'liner_condition': 0.75}
         }
         
-        for mill_id, variations in mill_variations.items():
-            configs[mill_id] = {**base_config, **variations}
+        profiles = list(mill_variations.values())
+        for i in range(n_mills):
+            configs[f'M{i + 1}'] = {**base_config, **profiles[i % len(profiles)]}
             
         return configs
     
-    def _generate_base_conditions(self):
+    def _generate_base_conditions(self, rng, timestamps=None, hour_offset=0):
         """
         Genera condiciones base que afectan a todos los molinos
         (mineral, ambiente, etc.)
+        Args:
+            timestamps: Tramo del índice horario a generar (por defecto, período completo)
+            hour_offset: Posición (en registros) del tramo dentro del período (para la estacionalidad)
         """
         # Crear índice temporal horario
-        timestamps = pd.date_range(self.start_date, self.end_date, freq='H')
+        if timestamps is None:
+            timestamps = pd.date_range(self.start_date, self.end_date, freq=self.freq)
         n_points = len(timestamps)
         
         # Características del mineral (varían gradualmente por zonas minadas)
         work_index_base = 14.5  # kWh/t promedio
-        work_index_variation = np.random.normal(0, 0.5, n_points)
-        work_index_seasonal = 1.5 * np.sin(2 * np.pi * np.arange(n_points) / (365*24))
+        work_index_variation = rng.normal(0, 0.5, n_points)
+        hours = np.arange(hour_offset, hour_offset + n_points) * self.step_hours
+        work_index_seasonal = 1.5 * np.sin(2 * np.pi * hours / (365*24))
         work_index = work_index_base + work_index_variation + work_index_seasonal
         work_index = np.clip(work_index, 10, 20)  # Rango realista
         
         # Dureza mineral (correlacionada con work index)
-        hardness = 3.5 + 0.2 * (work_index - 14.5) + np.random.normal(0, 0.3, n_points)
+        hardness = 3.5 + 0.2 * (work_index - 14.5) + rng.normal(0, 0.3, n_points)
         hardness = np.clip(hardness, 3.0, 6.5)
         
         # Humedad mineral (estacional, mayor en temporada lluviosa)
         humidity_base = 8.0  # % promedio
         humidity_seasonal = 3.0 * np.sin(2 * np.pi * timestamps.dayofyear / 365 + np.pi)
-        humidity_random = np.random.normal(0, 1.0, n_points)
+        humidity_random = rng.normal(0, 1.0, n_points)
         humidity = humidity_base + humidity_seasonal + humidity_random
         humidity = np.clip(humidity, 4, 12)
         
         # Condiciones ambientales (típicas de sierra peruana)
         ambient_temp = 18 + 8 * np.sin(2 * np.pi * timestamps.dayofyear / 365) + \
-                      np.random.normal(0, 2, n_points)
+                      rng.normal(0, 2, n_points)
         ambient_humidity = 65 + 15 * np.sin(2 * np.pi * timestamps.dayofyear / 365 + np.pi/2) + \
-                          np.random.normal(0, 5, n_points)
+                          rng.normal(0, 5, n_points)
         
         # Granulometría de alimentación (salida del SAG)
         f80_base = 12500  # μm promedio
-        f80_variation = np.random.normal(0, 1000, n_points)
+        f80_variation = rng.normal(0, 1000, n_points)
         f80 = f80_base + f80_variation
         f80 = np.clip(f80, 9000, 15000)
         
@@ -314,93 +744,35 @@ class RealisticMillDataGenerator:
             'temperatura_ambiente': ambient_temp,
             'humedad_relativa': ambient_humidity,
             'granulometria_feed_p80': f80,
-            'densidad_mineral': np.random.normal(3.2, 0.2, n_points),
-            'contenido_arcillas': np.random.uniform(0, 12, n_points),
-            'abrasividad_ai': np.random.uniform(0.15, 0.65, n_points)
+            'densidad_mineral': rng.normal(3.2, 0.2, n_points),
+            'contenido_arcillas': rng.uniform(0, 12, n_points),
+            'abrasividad_ai': rng.uniform(0.15, 0.65, n_points)
         })
     
-    def _schedule_failures(self, mill_id, mill_config, timestamps):
+    def _schedule_failures(self, timestamps, rng):
         """
-        Programa eventos de falla realistas durante el período de simulación
+        Programa eventos de falla realistas de toda la flota durante el período de simulación
+        Returns:
+            Tabla de eventos (FailureScheduler), también disponible en self.scheduled_failures
         """
-        failures = []
-        current_time = timestamps.iloc[0]  # Usar .iloc para acceder al primer elemento
-        end_time = timestamps.iloc[-1]    # Usar .iloc para acceder al último elemento
-        
-        # Probabilidades de falla por tipo basadas en literatura
-        failure_types = {
-            'bearing_feed': 0.35,      # 35% de fallas
-            'bearing_discharge': 0.35, # 35% de fallas  
-            'liner_wear': 0.20,       # 20% de fallas
-            'motor_electrical': 0.05,  # 5% de fallas
-            'lubrication': 0.05       # 5% de fallas
-        }
-        
-        # Ajustar probabilidades según tendencia del molino
-        if mill_config['failure_tendency'] == 'bearings':
-            failure_types['bearing_feed'] *= 1.5
-            failure_types['bearing_discharge'] *= 1.5
-        elif mill_config['failure_tendency'] == 'liners':
-            failure_types['liner_wear'] *= 2.0
-        elif mill_config['failure_tendency'] == 'lubrication':
-            failure_types['lubrication'] *= 3.0
-        
-        # Normalizar probabilidades
-        total_prob = sum(failure_types.values())
-        failure_types = {k: v/total_prob for k, v in failure_types.items()}
-        
-        # Programar fallas (frecuencia basada en condición del molino)
-        base_mtbf = 4380  # Horas promedio entre fallas (6 meses)
-        mtbf = base_mtbf * mill_config['condition']  # Ajustar por condición
-        
-        while current_time < end_time:
-            # Tiempo hasta próxima falla (distribución Weibull)
-            time_to_failure = np.random.weibull(2) * mtbf
-            failure_time = current_time + pd.Timedelta(hours=time_to_failure)
-            
-            if failure_time < end_time:
-                # Seleccionar tipo de falla
-                failure_type = np.random.choice(
-                    list(failure_types.keys()),
-                    p=list(failure_types.values())
-                )
-                
-                # Severidad de la falla (1=menor, 2=moderada, 3=crítica)
-                if failure_type in ['bearing_feed', 'bearing_discharge']:
-                    severity = np.random.choice([1, 2, 3], p=[0.1, 0.6, 0.3])
-                elif failure_type == 'liner_wear':
-                    severity = np.random.choice([1, 2, 3], p=[0.3, 0.6, 0.1])
-                else:
-                    severity = np.random.choice([1, 2, 3], p=[0.5, 0.4, 0.1])
-                
-                failures.append({
-                    'mill_id': mill_id,
-                    'failure_time': failure_time,
-                    'failure_type': failure_type,
-                    'severity': severity
-                })
-                
-                current_time = failure_time + pd.Timedelta(days=np.random.uniform(7, 30))
-            else:
-                break
-                
-        return failures
+        timestamps = pd.DatetimeIndex(timestamps)
+        self.scheduled_failures = self.scheduler.schedule(
+            self.mill_configs, timestamps[0], timestamps[-1], rng
+        )
+        self._log(f"🚨 Fallas programadas: {len(self.scheduled_failures):,} eventos")
+        return self.scheduled_failures
     
-    def _generate_mill_operation(self, mill_id, base_conditions, mill_config):
+    def _generate_mill_operation(self, mill_id, base_conditions, mill_config, mill_failures, rng, hour_offset=0):
         """
         Genera operación completa de un molino individual
         """
         timestamps = base_conditions['timestamp']
         n_points = len(timestamps)
         
-        # Programar fallas para este molino
-        mill_failures = self._schedule_failures(mill_id, mill_config, timestamps)
-        self.scheduled_failures.extend(mill_failures)
-        
         # Variables operacionales controlables
         # Feed rate: varía por turno y demanda operacional
         feed_rate_base = 280  # t/h promedio
-        feed_rate_variation = np.random.normal(0, 20, n_points)
+        feed_rate_variation = rng.normal(0, 20, n_points)
         
         # Variación por turnos (operadores diferentes)
         hour_of_day = timestamps.dt.hour
@@ -412,16 +784,16 @@ class RealisticMillDataGenerator:
         feed_rate = np.clip(feed_rate, 180, 350)
         
         # Velocidad de rotación (% de velocidad crítica)
-        speed_pct_critical = np.random.normal(76, 2, n_points)  # Óptimo ~76%
+        speed_pct_critical = rng.normal(76, 2, n_points)  # Óptimo ~76%
         speed_pct_critical = np.clip(speed_pct_critical, 70, 85)
         speed_rpm = speed_pct_critical * mill_config['critical_speed'] / 100
         
         # Nivel de carga de bolas
-        ball_charge = np.random.normal(32, 1.5, n_points)  # Óptimo ~32%
+        ball_charge = rng.normal(32, 1.5, n_points)  # Óptimo ~32%
         ball_charge = np.clip(ball_charge, 28, 36)
         
         # Densidad de pulpa
-        pulp_density = np.random.normal(72, 3, n_points)  # % sólidos
+        pulp_density = rng.normal(72, 3, n_points)  # % sólidos
         pulp_density = np.clip(pulp_density, 68, 78)
         
         # Calcular variables derivadas usando física
@@ -434,7 +806,7 @@ class RealisticMillDataGenerator:
         )
         
         # Eficiencia real del molino
-        liner_wear = np.random.uniform(0, 80, n_points)  # % desgaste liners
+        liner_wear = rng.uniform(0, 80, n_points)  # % desgaste liners
         mill_efficiency = self.physics.calculate_mill_efficiency(
             liner_wear, ball_charge, speed_pct_critical
         )
@@ -461,27 +833,29 @@ class RealisticMillDataGenerator:
         temp_motor = 60 + 20 * (power_draw / mill_config['motor_power_rating'] - 1)
         
         # Sistema de lubricación
-        oil_pressure = np.random.normal(2.5, 0.3, n_points)
-        oil_flow = np.random.normal(120, 15, n_points)
-        oil_quality = 100 - np.random.exponential(2, n_points)  # Degrada con el tiempo
+        oil_pressure = rng.normal(2.5, 0.3, n_points)
+        oil_flow = rng.normal(120, 15, n_points)
+        oil_quality = 100 - rng.exponential(2, n_points)  # Degrada con el tiempo
         oil_quality = np.clip(oil_quality, 70, 100)
         
         # Variables eléctricas
         motor_current = power_draw / (mill_config['motor_power_rating'] * 0.9) * 800
-        motor_voltage = np.random.normal(4160, 20, n_points)
-        power_factor = np.random.normal(0.90, 0.02, n_points)
+        motor_voltage = rng.normal(4160, 20, n_points)
+        power_factor = rng.normal(0.90, 0.02, n_points)
         
         # Aplicar efectos de degradación y fallas
-        vibration_feed_h, vibration_feed_v = self._apply_degradation_effects(
-            timestamps, mill_failures, vibration_base_feed, 'vibration'
-        )
-        vibration_discharge_h, vibration_discharge_v = self._apply_degradation_effects(
-            timestamps, mill_failures, vibration_base_discharge, 'vibration'
-        )
-        
-        temp_bearing_feed = self._apply_degradation_effects(
-            timestamps, mill_failures, temp_bearing_feed, 'temperature'
-        )[0]
+        with self.profiler.stage('degradation', mill_id=mill_id) as stage:
+            vibration_feed_h, vibration_feed_v = self._apply_degradation_effects(
+                timestamps, mill_failures, vibration_base_feed, 'vibration', rng
+            )
+            vibration_discharge_h, vibration_discharge_v = self._apply_degradation_effects(
+                timestamps, mill_failures, vibration_base_discharge, 'vibration', rng
+            )
+            
+            temp_bearing_feed = self._apply_degradation_effects(
+                timestamps, mill_failures, temp_bearing_feed, 'temperature', rng
+            )[0]
+            stage['rows'] = n_points
         
         # Crear DataFrame con todas las variables
         mill_data = pd.DataFrame({
@@ -498,24 +872,24 @@ class RealisticMillDataGenerator:
             'nivel_carga_bolas': ball_charge,
             'densidad_pulpa': pulp_density,
             'agua_adicionada': feed_rate * (100/pulp_density - 1) * 0.8,  # m³/h estimado
-            'presion_ciclones': np.random.normal(95, 15, n_points),
+            'presion_ciclones': rng.normal(95, 15, n_points),
             
             # Condition monitoring - vibración
             'vibracion_cojinete_feed_h': vibration_feed_h,
             'vibracion_cojinete_feed_v': vibration_feed_v,
             'vibracion_cojinete_discharge_h': vibration_discharge_h,
             'vibracion_cojinete_discharge_v': vibration_discharge_v,
-            'vibracion_shell_h': vibration_shell * np.random.normal(1, 0.05, n_points),
-            'vibracion_shell_v': vibration_shell * np.random.normal(1, 0.05, n_points),
-            'vibracion_pinion': vibration_shell * 1.2 * np.random.normal(1, 0.08, n_points),
-            'vibracion_gearbox': vibration_shell * 0.8 * np.random.normal(1, 0.06, n_points),
+            'vibracion_shell_h': vibration_shell * rng.normal(1, 0.05, n_points),
+            'vibracion_shell_v': vibration_shell * rng.normal(1, 0.05, n_points),
+            'vibracion_pinion': vibration_shell * 1.2 * rng.normal(1, 0.08, n_points),
+            'vibracion_gearbox': vibration_shell * 0.8 * rng.normal(1, 0.06, n_points),
             
             # Condition monitoring - temperatura
             'temp_cojinete_feed': temp_bearing_feed,
             'temp_cojinete_discharge': temp_bearing_discharge,
-            'temp_aceite_lubricacion': np.random.normal(55, 5, n_points),
+            'temp_aceite_lubricacion': rng.normal(55, 5, n_points),
             'temp_motor_principal': temp_motor,
-            'temp_gearbox': np.random.normal(58, 6, n_points),
+            'temp_gearbox': rng.normal(58, 6, n_points),
             
             # Variables eléctricas
             'corriente_motor': motor_current,
@@ -526,23 +900,23 @@ class RealisticMillDataGenerator:
             # Sistema lubricación
             'presion_aceite_principal': oil_pressure,
             'flujo_aceite': oil_flow,
-            'nivel_tanque_aceite': np.random.uniform(40, 90, n_points),
+            'nivel_tanque_aceite': rng.uniform(40, 90, n_points),
             'calidad_aceite_ppm': (100 - oil_quality) / 5,  # Convert to ppm
             
             # Performance variables
             'consumo_energetico_especifico': energy_specific,
-            'throughput_real': feed_rate * np.random.normal(0.95, 0.02, n_points),
+            'throughput_real': feed_rate * rng.normal(0.95, 0.02, n_points),
             'eficiencia_molienda': mill_efficiency * 100,
-            'granulometria_producto_p80': p80_target * np.random.normal(1, 0.08, n_points),
+            'granulometria_producto_p80': p80_target * rng.normal(1, 0.08, n_points),
             
             # Estado equipos
             'nivel_desgaste_liners': liner_wear,
-            'horas_operacion_acumuladas': np.arange(n_points),
-            'ciclos_arranque_parada': np.random.poisson(1, n_points),
+            'horas_operacion_acumuladas': (np.arange(hour_offset, hour_offset + n_points) * self.step_hours).astype(int),
+            'ciclos_arranque_parada': rng.poisson(1, n_points),
             
             # Contexto operacional
-            'carga_circulante': np.random.normal(250, 50, n_points),
-            'eficiencia_clasificacion': np.random.normal(60, 8, n_points)
+            'carga_circulante': rng.normal(250, 50, n_points),
+            'eficiencia_clasificacion': rng.normal(60, 8, n_points)
         })
         
         # Agregar características del mineral
@@ -552,91 +926,64 @@ class RealisticMillDataGenerator:
             mill_data[col] = base_conditions[col]
         
         # Generar targets para predicción de fallas
-        mill_data = self._generate_failure_targets(mill_data, mill_failures)
+        with self.profiler.stage('failure_targets', mill_id=mill_id) as stage:
+            mill_data = self._generate_failure_targets(mill_data, mill_failures)
+            stage['rows'] = n_points
         
         # Aplicar ruido realista de sensores
-        mill_data = self._apply_sensor_noise(mill_data)
+        with self.profiler.stage('sensor_noise', mill_id=mill_id) as stage:
+            mill_data = self._apply_sensor_noise(mill_data, rng)
+            stage['rows'] = n_points
         
         return mill_data
     
-    def _apply_degradation_effects(self, timestamps, failures, base_signal, signal_type):
+    def _apply_degradation_effects(self, timestamps, failures, base_signal, signal_type, rng):
         """
         Aplica efectos de degradación realistas basados en fallas programadas
         """
-        signal_degraded = base_signal.copy()
-        signal_degraded_v = base_signal.copy() * np.random.normal(0.95, 0.05, len(base_signal))
-        
-        for failure in failures:
-            failure_time = failure['failure_time']
-            failure_type = failure['failure_type']
-            
-            # Encontrar índices en ventana de degradación
-            time_diff = (failure_time - timestamps).dt.total_seconds() / 3600  # horas
-            degradation_mask = (time_diff > 0) & (time_diff < 720)  # 30 días antes
-            
-            if degradation_mask.any():
-                indices = np.where(degradation_mask)[0]
-                hours_to_failure = time_diff[indices]
-                
+        base_values = np.asarray(base_signal, dtype=float)
+        signal_degraded = base_values.copy()
+        signal_degraded_v = base_values * rng.normal(0.95, 0.05, len(base_values))
+
+        # Timestamps ordenados: la ventana de cada falla se ubica por búsqueda binaria
+        ts_values = np.asarray(timestamps, dtype='datetime64[ns]')
+        window = np.timedelta64(720, 'h')  # 30 días antes
+
+        for failure_time, failure_type in zip(failures['failure_time'].to_numpy(dtype='datetime64[ns]'),
+                                              failures['failure_type'].to_numpy(dtype=object)):
+
+            # Índices en ventana de degradación: 0 < horas hasta falla < 720
+            start = np.searchsorted(ts_values, failure_time - window, side='right')
+            stop = np.searchsorted(ts_values, failure_time, side='left')
+
+            if stop > start:
+                hours_to_failure = (failure_time - ts_values[start:stop]) / np.timedelta64(1, 'h')
+
                 if 'bearing' in failure_type and signal_type == 'vibration':
-                    # Aplicar degradación de rodamiento
-                    for i, idx in enumerate(indices):
-                        degraded_value = self.degradation.generate_bearing_degradation(
-                            base_signal.iloc[idx], hours_to_failure.iloc[i], failure_type
-                        )
-                        signal_degraded.iloc[idx] = degraded_value
-                        signal_degraded_v.iloc[idx] = degraded_value * np.random.normal(0.98, 0.03)
-                
+                    # Aplicar degradación de rodamiento a toda la ventana
+                    (signal_degraded[start:stop],
+                     signal_degraded_v[start:stop]) = self.degradation.generate_bearing_degradation_batch(
+                        base_values[start:stop], hours_to_failure, failure_type, rng
+                    )
+
                 elif signal_type == 'temperature':
                     # Incremento gradual de temperatura
                     temp_increase = 2.0 * (1 - hours_to_failure / 720)  # Hasta +2°C
-                    signal_degraded.iloc[indices] += temp_increase
-        
+                    signal_degraded[start:stop] += temp_increase
+
         return signal_degraded, signal_degraded_v
     
     def _generate_failure_targets(self, mill_data, failures):
         """
         Genera variables target para predicción de fallas
         """
-        timestamps = mill_data['timestamp']
-        n_points = len(timestamps)
-        
-        # Inicializar targets
-        mill_data['falla_en_7d'] = False
-        mill_data['falla_en_14d'] = False
-        mill_data['falla_en_30d'] = False
-        mill_data['tipo_falla'] = 'normal'
-        mill_data['severidad_falla'] = 0
-        mill_data['dias_hasta_falla'] = 365.0
-        
-        for failure in failures:
-            failure_time = failure['failure_time']
-            failure_type = failure['failure_type']
-            severity = failure['severity']
-            
-            # Calcular días hasta falla para cada timestamp
-            days_to_failure = (failure_time - timestamps).dt.total_seconds() / 86400
-            
-            # Marcar targets en ventanas apropiadas
-            mask_7d = (days_to_failure > 0) & (days_to_failure <= 7)
-            mask_14d = (days_to_failure > 0) & (days_to_failure <= 14)
-            mask_30d = (days_to_failure > 0) & (days_to_failure <= 30)
-            
-            mill_data.loc[mask_7d, 'falla_en_7d'] = True
-            mill_data.loc[mask_14d, 'falla_en_14d'] = True
-            mill_data.loc[mask_30d, 'falla_en_30d'] = True
-            mill_data.loc[mask_30d, 'tipo_falla'] = failure_type
-            mill_data.loc[mask_30d, 'severidad_falla'] = severity
-            
-            # Actualizar días hasta falla (tomar el mínimo si hay múltiples fallas)
-            mill_data.loc[mask_30d, 'dias_hasta_falla'] = np.minimum(
-                mill_data.loc[mask_30d, 'dias_hasta_falla'],
-                days_to_failure[mask_30d]
-            )
+        targets = self.labels.label(mill_data['timestamp'], failures)
+        for col in targets.columns:
+            mill_data[col] = targets[col]
         
         return mill_data
     
-    def _apply_sensor_noise(self, mill_data):
+    def _apply_sensor_noise(self, mill_data, rng):
         """
         Aplica ruido realista de sensores industriales
         """
@@ -648,48 +995,99 @@ class RealisticMillDataGenerator:
             'process': ['feed_rate', 'densidad_pulpa', 'presion_ciclones', 'agua_adicionada']
         }
         
+        # Onda estacional calculada una vez por molino; un bloque 2D por tipo de sensor
+        seasonal_wave = self.noise.seasonal_wave(mill_data['timestamp'])
         for sensor_type, columns in sensor_mapping.items():
-            for col in columns:
-                if col in mill_data.columns:
-                    mill_data[col] = self.noise.add_sensor_noise(
-                        mill_data[col], sensor_type, mill_data['timestamp']
-                    )
+            columns = [col for col in columns if col in mill_data.columns]
+            if columns:
+                mill_data[columns] = self.noise.add_sensor_noise_batch(
+                    mill_data[columns].to_numpy(dtype=self.noise.dtype), sensor_type, seasonal_wave, rng
+                )
         
         return mill_data
     
-    def generate_complete_dataset(self):
+    def _spawn_rng_streams(self):
+        """
+        Deriva flujos aleatorios independientes desde la semilla raíz: uno para
+        condiciones base, uno para la programación de fallas y uno por molino
+        (en orden de configuración)
+        """
+        base_seq, failure_seq, *mill_seqs = np.random.SeedSequence(self.seed).spawn(2 + len(self.mill_configs))
+        return base_seq, failure_seq, dict(zip(self.mill_configs, mill_seqs))
+    
+    def _generate_mill(self, mill_id, base_conditions, seed_seq, mill_failures):
+        """
+        Genera la operación de un molino con su propio flujo aleatorio
+        Args:
+            mill_failures: Eventos de falla del molino (tabla de FailureScheduler)
+        """
+        rng = np.random.default_rng(seed_seq)
+        return self._generate_mill_operation(
+            mill_id, base_conditions, self.mill_configs[mill_id], mill_failures, rng
+        )
+    
+    def generate_complete_dataset(self, n_workers=1):
         """
         Genera el dataset completo para todos los molinos
+        Args:
+            n_workers: Procesos en paralelo (un molino por tarea). El resultado es
+                       idéntico para cualquier número de workers con la misma semilla
         """
-        print("🔄 Iniciando generación de dataset sintético...")
-        print(f"📅 Período: {self.start_date.date()} a {self.end_date.date()}")
-        print(f"⚙️  Molinos: 6 unidades (M1-M6)")
+        mill_ids = list(self.mill_configs)
+        self._log("🔄 Iniciando generación de dataset sintético...")
+        self._log(f"📅 Período: {self.start_date.date()} a {self.end_date.date()}")
+        self._log(f"⚙️  Molinos: {len(mill_ids)} unidades ({mill_ids[0]}-{mill_ids[-1]})")
+        self._log(f"🎲 Semilla: {self.seed}")
+        
+        base_seq, failure_seq, mill_seqs = self._spawn_rng_streams()
         
         # Generar condiciones base comunes
-        print("🌍 Generando condiciones base (mineral, ambiente)...")
-        base_conditions = self._generate_base_conditions()
+        self._log("🌍 Generando condiciones base (mineral, ambiente)...")
+        with self.profiler.stage('base_conditions') as stage:
+            base_conditions = self._generate_base_conditions(np.random.default_rng(base_seq))
+            stage.update(rows=len(base_conditions), bytes=frame_nbytes(base_conditions))
         
-        # Lista para almacenar datos de todos los molinos
-        all_mill_data = []
+        # Programar fallas de toda la flota en una pasada
+        with self.profiler.stage('schedule_failures') as stage:
+            events = self._schedule_failures(base_conditions['timestamp'], np.random.default_rng(failure_seq))
+            mill_failures = self.scheduler.split_by_mill(events)
+            stage.update(rows=len(events), bytes=frame_nbytes(events))
         
         # Generar datos para cada molino
-        for mill_id in ['M1', 'M2', 'M3', 'M4', 'M5', 'M6']:
-            print(f"⚙️  Generando datos para {mill_id}...")
-            mill_config = self.mill_configs[mill_id]
-            
-            # Generar operación del molino
-            mill_data = self._generate_mill_operation(mill_id, base_conditions, mill_config)
-            all_mill_data.append(mill_data)
-        
-        # Combinar todos los datos
-        print("🔗 Combinando datos de todos los molinos...")
-        complete_dataset = pd.concat(all_mill_data, ignore_index=True)
-        
-        # Ordenar por timestamp y molino
-        complete_dataset = complete_dataset.sort_values(['timestamp', 'molino_id']).reset_index(drop=True)
+        if n_workers is None or n_workers > 1:
+            self._log(f"⚙️  Generando datos en paralelo ({n_workers or os.cpu_count()} procesos)...")
+            # En paralelo solo se mide el total (los workers reciben un profiler desactivado)
+            with self.profiler.stage('mill_operation', workers=n_workers or os.cpu_count()) as stage:
+                with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_mill_worker,
+                                         initargs=(self, base_conditions)) as executor:
+                    results = list(executor.map(_run_mill_worker, mill_ids,
+                                                [mill_seqs[m] for m in mill_ids],
+                                                [mill_failures[m] for m in mill_ids]))
+                stage.update(rows=sum(map(len, results)), bytes=sum(map(frame_nbytes, results)))
+        else:
+            results = []
+            for mill_id in mill_ids:
+                self._log(f"⚙️  Generando datos para {mill_id}...")
+                with self.profiler.stage('mill_operation', mill_id=mill_id) as stage:
+                    results.append(self._generate_mill(mill_id, base_conditions, mill_seqs[mill_id],
+                                                       mill_failures[mill_id]))
+                    stage.update(rows=len(results[-1]), bytes=frame_nbytes(results[-1]))
+        
+        all_mill_data = dict(zip(mill_ids, results))
+        
+        # Combinar todos los datos ya ordenados por timestamp y molino
+        self._log("🔗 Combinando datos de todos los molinos...")
+        with self.profiler.stage('interleave') as stage:
+            complete_dataset = _interleave_mill_frames(
+                [all_mill_data[mill_id] for mill_id in sorted(mill_ids)]
+            )
+            stage.update(rows=len(complete_dataset), bytes=frame_nbytes(complete_dataset))
+        del all_mill_data, results
         
         # Agregar variables derivadas finales
-        complete_dataset = self._add_derived_features(complete_dataset)
+        with self.profiler.stage('derived_features') as stage:
+            complete_dataset = self._add_derived_features(complete_dataset)
+            stage.update(rows=len(complete_dataset), bytes=frame_nbytes(complete_dataset))
         
         # Resumen estadístico
         self._print_dataset_summary(complete_dataset)
@@ -700,34 +1098,35 @@ class RealisticMillDataGenerator:
         """
         Agrega variables derivadas y features engineered
         """
-        print("🧮 Calculando variables derivadas...")
+        self._log("🧮 Calculando variables derivadas...")
         
-        # Features de tendencia (rolling windows)
-        for mill_id in dataset['molino_id'].unique():
-            mill_mask = dataset['molino_id'] == mill_id
-            mill_data = dataset[mill_mask].copy()
-            
-            # Tendencias de vibración (7 días)
-            dataset.loc[mill_mask, 'vibracion_trend_7d'] = (
-                mill_data['vibracion_cojinete_feed_h'].rolling(window=168, min_periods=24).mean()
-            )
-            
-            # Tendencias de temperatura (7 días)
-            dataset.loc[mill_mask, 'temperatura_trend_7d'] = (
-                mill_data['temp_cojinete_feed'].rolling(window=168, min_periods=24).mean()
-            )
-            
-            # Tendencias de energía (24 horas)
-            dataset.loc[mill_mask, 'energia_trend_24h'] = (
-                mill_data['consumo_energetico_especifico'].rolling(window=24, min_periods=12).mean()
-            )
-            
-            # Tendencias de throughput (24 horas)
-            dataset.loc[mill_mask, 'throughput_trend_24h'] = (
-                mill_data['throughput_real'].rolling(window=24, min_periods=12).mean()
-            )
+        # Features de tendencia (rolling windows) por molino, en una sola pasada
+        dataset = self.features.add_trend_features(dataset)
+        
+        dataset = self._add_ratio_features(dataset)
+        
+        # Anomaly scores básicos (Z-scores por molino)
+        if self.anomaly_mode == 'batch':
+            dataset = self.features.add_anomaly_features(dataset)
+        else:
+            dataset = self.features.add_anomaly_features(dataset, scorers=self._init_anomaly_scorers(self.anomaly_mode))
         
-        # Ratios y métricas compuestas
+        return dataset
+    
+    def _init_anomaly_scorers(self, mode):
+        """
+        Crea un OnlineAnomalyScorer por feature de anomalía (estado por molino).
+        Quedan en self.anomaly_scorers para guardarlos y reanudar el scoring
+        """
+        self.anomaly_scorers = {
+            feature: OnlineAnomalyScorer(mode=mode) for feature, _ in self.features.anomaly_specs
+        }
+        return self.anomaly_scorers
+    
+    def _add_ratio_features(self, dataset):
+        """
+        Agrega ratios y métricas compuestas (cálculo fila a fila)
+        """
         dataset['ratio_p80_feed_producto'] = (
             dataset['granulometria_feed_p80'] / dataset['granulometria_producto_p80']
         )
@@ -744,88 +1143,212 @@ class RealisticMillDataGenerator:
         )
         dataset['eficiencia_energetica_teorica'] = theoretical_energy / dataset['consumo_energetico_especifico']
         
-        # Anomaly scores básicos (Z-scores)
-        for mill_id in dataset['molino_id'].unique():
-            mill_mask = dataset['molino_id'] == mill_id
-            mill_data = dataset[mill_mask]
-            
-            # Score de anomalía en vibración
-            vibration_composite = (
-                mill_data['vibracion_cojinete_feed_h'] + 
-                mill_data['vibracion_cojinete_discharge_h']
-            ) / 2
-            dataset.loc[mill_mask, 'anomaly_score_vibration'] = np.abs(
-                stats.zscore(vibration_composite, nan_policy='omit')
+        return dataset
+    
+    def generate_to_parquet(self, output_dir='molinos_mineraperu_dataset', chunk_freq='MS', views=None):
+        """
+        Genera el dataset en modo streaming, por tramos de tiempo, escribiendo cada
+        tramo directamente a un dataset Parquet particionado por molino_id/mes.
+        La memoria se mantiene acotada sin importar duración ni tamaño de flota:
+        entre tramos solo se conserva el estado de cada molino (generador aleatorio,
+        fallas programadas, cola de las ventanas móviles y estadísticas de anomalía).
+        
+        Los anomaly scores son siempre causales (OnlineAnomalyScorer, modo
+        'cumulative' si anomaly_mode='batch'), ya que no se dispone del historial
+        completo; su estado queda en self.anomaly_scorers.
+        Args:
+            output_dir: Carpeta raíz del dataset particionado
+            chunk_freq: Frecuencia de los tramos de generación (alias de pandas)
+            views: ViewSpecs a calcular mientras se genera (True = view_specs()); cada
+                   vista se escribe en <output_dir>_views/<nombre>/
+        Returns:
+            Ruta del dataset y número de filas escritas
+        """
+        output_dir = Path(output_dir)
+        mill_ids = list(self.mill_configs)
+        self._log("🔄 Iniciando generación en streaming...")
+        self._log(f"📅 Período: {self.start_date.date()} a {self.end_date.date()}")
+        self._log(f"⚙️  Molinos: {len(mill_ids)} unidades ({mill_ids[0]}-{mill_ids[-1]})")
+        self._log(f"🎲 Semilla: {self.seed}")
+        
+        timestamps = pd.date_range(self.start_date, self.end_date, freq=self.freq)
+        chunk_starts = timestamps.searchsorted(pd.date_range(self.start_date, self.end_date, freq=chunk_freq))
+        edges = np.unique(np.concatenate([[0], chunk_starts, [len(timestamps)]]))
+        
+        base_seq, failure_seq, mill_seqs = self._spawn_rng_streams()
+        chunk_seqs = base_seq.spawn(len(edges) - 1)
+        
+        # Fallas del período completo, programadas de una vez para toda la flota
+        events = self._schedule_failures(timestamps, np.random.default_rng(failure_seq))
+        mill_failures = self.scheduler.split_by_mill(events)
+        
+        # Estado por molino que se arrastra entre tramos (fallas del período completo)
+        scorers = self._init_anomaly_scorers(
+            'cumulative' if self.anomaly_mode == 'batch' else self.anomaly_mode
+        )
+        mill_states = {}
+        for mill_id in mill_ids:
+            mill_states[mill_id] = {
+                'rng': np.random.default_rng(mill_seqs[mill_id]),
+                'failures': mill_failures[mill_id],
+                'trend_tail': pd.DataFrame(columns=self.features.trend_sources, dtype=float),
+            }
+        
+        # Vistas calculadas sobre cada tramo, sin releer el dataset
+        views = self.view_specs() if views is True else (views or ())
+        view_writers = [ViewWriter(spec, output_dir.with_name(f'{output_dir.name}_views') / spec.name,
+                                   transform=apply_output_schema)
+                        for spec in views]
+        
+        rows_written = 0
+        for chunk_idx, (lo, hi) in enumerate(zip(edges[:-1], edges[1:])):
+            chunk_timestamps = timestamps[lo:hi]
+            self._log(f"🧩 Tramo {chunk_idx + 1}/{len(edges) - 1}: {chunk_timestamps[0].date()} "
+                      f"a {chunk_timestamps[-1].date()}")
+            base_conditions = self._generate_base_conditions(
+                np.random.default_rng(chunk_seqs[chunk_idx]), chunk_timestamps, hour_offset=lo
             )
             
-            # Score de anomalía eléctrica
-            electrical_composite = mill_data['corriente_motor'] / mill_data['corriente_motor'].mean()
-            dataset.loc[mill_mask, 'anomaly_score_electrical'] = np.abs(
-                stats.zscore(electrical_composite, nan_policy='omit')
+            for mill_id in mill_ids:
+                state = mill_states[mill_id]
+                with self.profiler.stage('mill_operation', mill_id=mill_id, chunk=chunk_idx) as stage:
+                    mill_data = self._generate_mill_operation(
+                        mill_id, base_conditions, self.mill_configs[mill_id],
+                        state['failures'], state['rng'], hour_offset=lo
+                    )
+                    mill_data = self._add_streaming_features(mill_id, mill_data, state, scorers)
+                    stage.update(rows=len(mill_data), bytes=frame_nbytes(mill_data))
+                
+                # Escribir una partición por mes (molino_id/mes) sin las columnas de partición
+                with self.profiler.stage('write_partitions', mill_id=mill_id, chunk=chunk_idx) as stage:
+                    months = mill_data['timestamp'].dt.strftime('%Y-%m')
+                    written_bytes = 0
+                    for month, month_data in mill_data.groupby(months, sort=False):
+                        month_dir = partition_dir(output_dir, mill_id, month)
+                        month_dir.mkdir(parents=True, exist_ok=True)
+                        part_path = month_dir / f'part-{chunk_idx:05d}.parquet'
+                        apply_output_schema(month_data.drop(columns='molino_id')).to_parquet(
+                            part_path, compression='zstd', index=False
+                        )
+                        written_bytes += part_path.stat().st_size
+                    stage.update(rows=len(mill_data), bytes=written_bytes)
+                rows_written += len(mill_data)
+                
+                for writer in view_writers:
+                    with self.profiler.stage('stream_view', view=writer.spec.name, mill_id=mill_id, chunk=chunk_idx):
+                        writer.push(mill_data)
+            
+            for writer in view_writers:
+                writer.flush_part()
+        
+        for writer in view_writers:
+            writer.close()
+            self._log(f"📋 Vista {writer.spec.name}: {writer.rows:,} filas en {writer.output_dir}")
+        
+        # Eventos de falla junto al dataset (fuera de la carpeta particionada)
+        events_path = output_dir.with_name(f'{output_dir.name}_failure_events.parquet')
+        FailureEventStore(events).save(events_path)
+        
+        self._log(f"✅ Dataset escrito en: {output_dir} ({rows_written:,} filas)")
+        self._log(f"🚨 Eventos de falla en: {events_path}")
+        return output_dir, rows_written
+    
+    def _add_streaming_features(self, mill_id, mill_data, state, scorers):
+        """
+        Variables derivadas de un tramo de un molino usando el estado del tramo anterior
+        """
+        # Tendencias: la cola del tramo anterior completa las ventanas móviles
+        trend_tail = state['trend_tail']
+        history = pd.concat([trend_tail, mill_data[trend_tail.columns]], ignore_index=True)
+        group_starts = np.zeros(len(history), dtype=int)
+        for feature, source, window, min_periods in self.features.trend_specs:
+            rolled = self.features.rolling_mean(
+                history[source].to_numpy(dtype=float), group_starts, window, min_periods
             )
+            mill_data[feature] = rolled[len(trend_tail):]
+        state['trend_tail'] = history.iloc[-(self.features.max_window - 1):].reset_index(drop=True)
         
-        return dataset
+        mill_data = self._add_ratio_features(mill_data)
+        
+        # Anomaly scores causales (estado en línea por molino)
+        for feature, sources in self.features.anomaly_specs:
+            composite = mill_data[sources].to_numpy(dtype=float).mean(axis=1)
+            mill_data[feature] = scorers[feature].update_batch(mill_id, composite)
+        
+        return mill_data
     
     def _print_dataset_summary(self, dataset):
         """
         Imprime resumen estadístico del dataset generado
         """
-        print("\n" + "="*60)
-        print("📊 RESUMEN DEL DATASET GENERADO")
-        print("="*60)
+        if not self.verbose:
+            return
+        self._log("\n" + "="*60)
+        self._log("📊 RESUMEN DEL DATASET GENERADO")
+        self._log("="*60)
         
-        print(f"📏 Dimensiones: {dataset.shape[0]:,} filas × {dataset.shape[1]} columnas")
-        print(f"💾 Tamaño estimado: {dataset.memory_usage(deep=True).sum() / 1024**2:.1f} MB")
-        print(f"📅 Período: {dataset['timestamp'].min()} a {dataset['timestamp'].max()}")
+        self._log(f"📏 Dimensiones: {dataset.shape[0]:,} filas × {dataset.shape[1]} columnas")
+        self._log(f"💾 Tamaño estimado: {dataset.memory_usage(deep=True).sum() / 1024**2:.1f} MB")
+        self._log(f"📅 Período: {dataset['timestamp'].min()} a {dataset['timestamp'].max()}")
         
-        print(f"\n⚙️  MOLINOS:")
+        self._log(f"\n⚙️  MOLINOS:")
         for mill_id in sorted(dataset['molino_id'].unique()):
             mill_data = dataset[dataset['molino_id'] == mill_id]
-            print(f"   {mill_id}: {len(mill_data):,} registros")
+            self._log(f"   {mill_id}: {len(mill_data):,} registros")
         
-        print(f"\n🚨 EVENTOS DE FALLA:")
+        self._log(f"\n🚨 EVENTOS DE FALLA:")
         failure_summary = dataset[dataset['falla_en_30d'] == True].groupby(['molino_id', 'tipo_falla']).size().unstack(fill_value=0)
         if not failure_summary.empty:
-            print(failure_summary)
+            self._log(failure_summary)
         
         total_failures = len(dataset[dataset['falla_en_7d'] == True])
-        print(f"   Total eventos en ventana 7d: {total_failures}")
+        self._log(f"   Total eventos en ventana 7d: {total_failures}")
         
-        print(f"\n📈 ESTADÍSTICAS CLAVE:")
+        self._log(f"\n📈 ESTADÍSTICAS CLAVE:")
         key_vars = ['consumo_energetico_especifico', 'throughput_real', 'vibracion_cojinete_feed_h', 'temp_cojinete_feed']
         for var in key_vars:
             if var in dataset.columns:
-                print(f"   {var}: {dataset[var].mean():.2f} ± {dataset[var].std():.2f}")
+                self._log(f"   {var}: {dataset[var].mean():.2f} ± {dataset[var].std():.2f}")
         
-        print(f"\n✅ Dataset generado exitosamente!")
-        print("="*60)
+        self._log(f"\n✅ Dataset generado exitosamente!")
+        self._log("="*60)
     
-    def save_dataset(self, dataset, filepath='molinos_dataset.csv', format='csv'):
+    def save_dataset(self, dataset, filepath='molinos_dataset.parquet', format=None,
+                     row_group_size=PARQUET_ROW_GROUP_SIZE):
         """
-        Guarda el dataset en formato CSV o Parquet
+        Guarda el dataset en formato Parquet, Feather o CSV aplicando el esquema
+        declarado (OUTPUT_SCHEMA)
+        Args:
+            format: 'parquet', 'feather' o 'csv' (por defecto se deduce de la extensión)
+            row_group_size: Filas por row group (Parquet) o por bloque (Feather)
         """
-        print(f"💾 Guardando dataset en: {filepath}")
-        
-        # Optimizar tipos de datos
-        for col in dataset.columns:
-            if dataset[col].dtype == 'object' and col not in ['timestamp', 'molino_id', 'turno', 'tipo_falla']:
-                dataset[col] = pd.to_numeric(dataset[col], errors='ignore')
+        self._log(f"💾 Guardando dataset en: {filepath}")
         
-        # Guardar según formato especificado
-        if format.lower() == 'csv' or filepath.endswith('.csv'):
-            dataset.to_csv(filepath, index=False, sep=',')
-        else:
-            dataset.to_parquet(filepath, compression='snappy', index=False)
+        with self.profiler.stage('save_dataset', path=str(filepath)) as stage:
+            # Aplicar tipos compactos declarados
+            dataset = apply_output_schema(dataset)
+            
+            # Guardar según formato especificado
+            format = (format or Path(filepath).suffix.lstrip('.') or 'parquet').lower()
+            if format == 'csv':
+                dataset.to_csv(filepath, index=False, sep=',')
+            elif format == 'feather':
+                dataset.to_feather(filepath, compression='zstd', chunksize=row_group_size)
+            elif format == 'parquet':
+                dataset.to_parquet(filepath, compression='zstd', index=False, row_group_size=row_group_size)
+            else:
+                raise ValueError(f"Formato no soportado: {format}")
+            stage.update(rows=len(dataset), bytes=Path(filepath).stat().st_size)
         
-        print(f"✅ Dataset guardado: {filepath}")
+        self._log(f"✅ Dataset guardado: {filepath}")
         return filepath
     
-    def create_specialized_views(self, dataset):
+    def view_specs(self):
         """
-        Crea vistas especializadas del dataset
+        Vistas especializadas declaradas (proyección + remuestreo opcional)
+        Returns:
+            Tupla (Condition Monitoring, Process Optimization)
         """
-        print("📋 Creando vistas especializadas...")
-        
         # Vista Condition Monitoring (para predicción de fallas)
         cm_columns = [
             'timestamp', 'molino_id', 'turno',
@@ -839,13 +1362,11 @@ class RealisticMillDataGenerator:
             'presion_aceite_principal', 'flujo_aceite', 'calidad_aceite_ppm',
             'horas_operacion_acumuladas', 'velocidad_rotacion',
             # Targets de falla
-            'falla_en_7d', 'falla_en_14d', 'falla_en_30d', 'tipo_falla', 'severidad_falla', 'dias_hasta_falla',
+            *self.labels.target_columns(),
             # Features derivadas
             'vibracion_trend_7d', 'temperatura_trend_7d', 'anomaly_score_vibration', 'anomaly_score_electrical'
         ]
         
-        condition_monitoring_view = dataset[cm_columns].copy()
-        
         # Vista Process Optimization (agregada por turno para optimización energética)
         process_columns = [
             'timestamp', 'molino_id', 'turno',
@@ -865,65 +1386,148 @@ class RealisticMillDataGenerator:
             'potencia_especifica_neta', 'eficiencia_energetica_teorica'
         ]
         
-        # Agregar por turno (cada 8 horas)
-        process_optimization_view = dataset[process_columns].copy()
-        process_optimization_view['turno_timestamp'] = (
-            process_optimization_view['timestamp'].dt.floor('8H')
+        return (
+            ViewSpec('condition_monitoring_view', cm_columns),
+            # Promedios por turno (cada 8 horas) y molino
+            ViewSpec('process_optimization_view', process_columns, resample='8h'),
         )
+    
+    def create_specialized_views(self, dataset):
+        """
+        Crea vistas especializadas del dataset (ver view_specs). Las columnas de la
+        vista Condition Monitoring comparten memoria con el dataset (sin copia).
+        Args:
+            dataset: DataFrame en memoria, archivo o carpeta Parquet particionada
+        """
+        self._log("📋 Creando vistas especializadas...")
         
-        # Agrupar por turno y tomar promedios
-        aggregation_dict = {col: 'mean' for col in process_columns if col not in ['timestamp', 'molino_id', 'turno']}
-        aggregation_dict.update({
-            'timestamp': 'first',
-            'turno': 'first'
-        })
-        
-        process_optimization_view = (
-            process_optimization_view.groupby(['molino_id', 'turno_timestamp'])
-            .agg(aggregation_dict)
-            .reset_index()
-            .drop('turno_timestamp', axis=1)
-        )
+        views = []
+        for spec in self.view_specs():
+            with self.profiler.stage(f'view_{spec.name.removesuffix("_view")}') as stage:
+                view = LazyView(spec, dataset).collect()
+                stage.update(rows=len(view), bytes=frame_nbytes(view))
+            views.append(view)
         
-        return condition_monitoring_view, process_optimization_view
+        return tuple(views)
 
 
-def main():
+def apply_output_schema(dataset):
+    """
+    Convierte un DataFrame (dataset o vista) a los tipos compactos de OUTPUT_SCHEMA
+    """
+    dtypes = {}
+    for col, dtype in dataset.dtypes.items():
+        if col in OUTPUT_SCHEMA:
+            dtypes[col] = OUTPUT_SCHEMA[col]
+        elif col.startswith('falla_en_'):
+            dtypes[col] = 'bool'
+        elif pd.api.types.is_float_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+            dtypes[col] = DEFAULT_NUMERIC_DTYPE
+        elif dtype == object:
+            raise TypeError(f"Columna sin tipo declarado en OUTPUT_SCHEMA: {col}")
+    return dataset.astype(dtypes)
+
+
+# Estado por proceso del pool de generación (se inicializa una vez por worker)
+_WORKER_STATE = {}
+
+
+def _init_mill_worker(generator, base_conditions):
+    """Recibe generador y condiciones base una sola vez por proceso"""
+    _WORKER_STATE['generator'] = generator
+    _WORKER_STATE['base_conditions'] = base_conditions
+
+
+def _run_mill_worker(mill_id, seed_seq, mill_failures):
+    """Genera un molino dentro de un proceso del pool"""
+    generator = _WORKER_STATE['generator']
+    return generator._generate_mill(mill_id, _WORKER_STATE['base_conditions'], seed_seq, mill_failures)
+
+
+def _interleave_mill_frames(mill_frames):
+    """
+    Combina DataFrames de molinos con el mismo índice temporal en orden
+    (timestamp, molino): cada columna se copia una sola vez intercalando filas,
+    sin concat + sort_values
+    """
+    n_mills = len(mill_frames)
+    n_points = len(mill_frames[0])
+    if any(len(frame) != n_points for frame in mill_frames):
+        raise ValueError("Todos los molinos deben compartir el mismo índice temporal")
+    
+    columns = {}
+    for col in mill_frames[0].columns:
+        first = mill_frames[0][col]
+        if isinstance(first.dtype, pd.CategoricalDtype):
+            codes = np.empty(n_points * n_mills, dtype=first.cat.codes.dtype)
+            for i, frame in enumerate(mill_frames):
+                codes[i::n_mills] = frame[col].cat.codes.to_numpy()
+            columns[col] = pd.Categorical.from_codes(codes, dtype=first.dtype)
+        else:
+            values = np.empty(n_points * n_mills, dtype=first.to_numpy().dtype)
+            for i, frame in enumerate(mill_frames):
+                values[i::n_mills] = frame[col].to_numpy()
+            columns[col] = values
+    
+    return pd.DataFrame(columns)
+
+
+def main(quiet=False, report_path=None, track_memory=False, profile_stage=None):
     """
     Función principal para generar el dataset completo
+    Args:
+        quiet: Sin mensajes de progreso
+        report_path: Ruta del reporte JSON de la corrida (None = no se guarda)
+        track_memory: Medir pico de memoria por etapa (tracemalloc)
+        profile_stage: Etapa a perfilar con cProfile (p.ej. 'sensor_noise')
     """
-    print("🏭 GENERADOR DE DATOS SINTÉTICOS - MOLINOS DE BOLAS MINERAPERU")
-    print("=" * 70)
+    log = (lambda *args: None) if quiet else print
+    log("🏭 GENERADOR DE DATOS SINTÉTICOS - MOLINOS DE BOLAS MINERAPERU")
+    log("=" * 70)
+    
+    profiler = GenerationProfiler(track_memory=track_memory, profile_stage=profile_stage,
+                                  profile_dir=Path(report_path).parent / 'profiles' if report_path else None)
     
     # Inicializar generador
     generator = RealisticMillDataGenerator(
         start_date='2023-01-01',
-        duration_years=2.5
+        duration_years=2.5,
+        profiler=profiler,
+        verbose=not quiet
     )
     
     # Generar dataset completo
     dataset = generator.generate_complete_dataset()
     
     # Guardar dataset principal
-    filepath = generator.save_dataset(dataset, 'molinos_mineraperu_dataset.csv')
+    filepath = generator.save_dataset(dataset, 'molinos_mineraperu_dataset.parquet')
+    
+    # Guardar eventos de falla indexados junto al dataset
+    FailureEventStore.from_generator(generator).save('molinos_failure_events.parquet')
     
     # Crear vistas especializadas
     cm_view, opt_view = generator.create_specialized_views(dataset)
     
-    # Guardar vistas en CSV
-    generator.save_dataset(cm_view, 'condition_monitoring_view.csv')
-    generator.save_dataset(opt_view, 'process_optimization_view.csv')
+    # Guardar vistas en Parquet
+    generator.save_dataset(cm_view, 'condition_monitoring_view.parquet')
+    generator.save_dataset(opt_view, 'process_optimization_view.parquet')
     
-    print("\n🎯 ARCHIVOS GENERADOS:")
-    print("   📄 molinos_mineraperu_dataset.csv (Dataset principal)")
-    print("   📄 condition_monitoring_view.csv (Vista predicción fallas)")
-    print("   📄 process_optimization_view.csv (Vista optimización energética)")
+    log("\n🎯 ARCHIVOS GENERADOS:")
+    log("   📄 molinos_mineraperu_dataset.parquet (Dataset principal)")
+    log("   📄 molinos_failure_events.parquet (Eventos de falla)")
+    log("   📄 condition_monitoring_view.parquet (Vista predicción fallas)")
+    log("   📄 process_optimization_view.parquet (Vista optimización energética)")
+    
+    if report_path:
+        profiler.save_report(report_path)
+        log(f"   📄 {report_path} (Reporte de la corrida)")
+    profiler.close()
     
     return dataset, cm_view, opt_view
 
 
 # Función de utilidad para cargar y explorar el dataset
-def load_and_explore_dataset(filepath='molinos_mineraperu_dataset.csv'):
+def load_and_explore_dataset(filepath='molinos_mineraperu_dataset.parquet'):
     """
     Carga y proporciona exploración básica del dataset
     """
@@ -931,7 +1535,10 @@ def load_and_explore_dataset(filepath='molinos_mineraperu_dataset.csv'):
     
     # Detectar formato automáticamente
     if filepath.endswith('.csv'):
-        dataset = pd.read_csv(filepath, parse_dates=['timestamp'])
+        # CSV no guarda tipos: se vuelve a aplicar el esquema declarado
+        dataset = apply_output_schema(pd.read_csv(filepath, parse_dates=['timestamp']))
+    elif filepath.endswith('.feather'):
+        dataset = pd.read_feather(filepath)
     else:
         dataset = pd.read_parquet(filepath)
     
@@ -955,5 +1562,15 @@ def load_and_explore_dataset(filepath='molinos_mineraperu_dataset.csv'):
 
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Generador de datos sintéticos de molinos de bolas")
+    parser.add_argument('--quiet', action='store_true', help="Sin mensajes de progreso")
+    parser.add_argument('--report', help="Ruta del reporte JSON de la corrida")
+    parser.add_argument('--track-memory', action='store_true', help="Pico de memoria por etapa (tracemalloc)")
+    parser.add_argument('--profile-stage', help="Etapa a perfilar con cProfile (p.ej. sensor_noise)")
+    args = parser.parse_args()
+    
     # Ejecutar generación completa
-    dataset, cm_view, opt_view = main()
\ No newline at end of file
+    dataset, cm_view, opt_view = main(quiet=args.quiet, report_path=args.report,
+                                      track_memory=args.track_memory, profile_stage=args.profile_stage)
\ No newline at end of file
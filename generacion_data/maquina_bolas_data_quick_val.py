@@ -1,5 +1,5 @@
 import pandas as pd
-dataset = pd.read_csv('molinos_mineraperu_dataset.csv')
+dataset = pd.read_parquet('molinos_mineraperu_dataset.parquet')
 
 print(f"Período: {dataset['timestamp'].min()} a {dataset['timestamp'].max()}")
 print(f"Molinos: {sorted(dataset['molino_id'].unique())}")
@@ -0,0 +1,224 @@
+"""
+Scoring de anomalías en línea con estadísticas de Welford
+=========================================================
+
+Mantiene media y varianza por llave (molino) y actualiza un registro a la vez en
+O(1). Cada valor se evalúa contra las estadísticas de los registros anteriores,
+por lo que el score no mira hacia el futuro (a diferencia del z-score sobre toda
+la historia). Variantes:
+
+- 'cumulative': media y varianza de toda la historia previa (Welford)
+- 'ewm': media y varianza con ponderación exponencial (factor alpha)
+- 'window': media y varianza de los últimos `window` registros
+
+El estado es serializable a JSON para reanudar el scoring tras un reinicio.
+
+Autor: GRUPO 1 - BREIT
+Fecha: 2025
+"""
+
+import json
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+from scipy.signal import lfilter
+
+SCORER_MODES = ('cumulative', 'ewm', 'window')
+
+
+class OnlineAnomalyScorer:
+    """
+    Score de anomalía |z| por llave con estadísticas incrementales
+    """
+
+    def __init__(self, mode='cumulative', alpha=0.01, window=168, min_count=2):
+        """
+        Args:
+            mode: 'cumulative', 'ewm' o 'window'
+            alpha: Factor de suavizado (modo 'ewm')
+            window: Registros en la ventana deslizante (modo 'window')
+            min_count: Registros previos mínimos para emitir un score
+        """
+        if mode not in SCORER_MODES:
+            raise ValueError(f"Modo no soportado: {mode} (opciones: {SCORER_MODES})")
+        self.mode = mode
+        self.alpha = alpha
+        self.window = window
+        self.min_count = min_count
+        self.states = {}
+
+    def _new_state(self):
+        if self.mode == 'window':
+            return {'n': 0, 'buffer': deque(maxlen=self.window), 'sum': 0.0, 'sum_sq': 0.0}
+        return {'n': 0, 'mean': 0.0, 'var': 0.0}
+
+    def _score(self, value, mean, var, n):
+        if n < self.min_count or var <= 0:
+            return np.nan
+        return abs(value - mean) / np.sqrt(var)
+
+    def update(self, key, value):
+        """
+        Evalúa un registro contra la historia de su llave y luego la actualiza (O(1))
+        Returns:
+            Score |z| del registro (NaN si no hay historia suficiente)
+        """
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = self._new_state()
+        value = float(value)
+        if np.isnan(value):
+            return np.nan
+
+        if self.mode == 'window':
+            buffer = state['buffer']
+            n = len(buffer)
+            mean = state['sum'] / n if n else 0.0
+            var = state['sum_sq'] / n - mean ** 2 if n else 0.0
+            score = self._score(value, mean, var, n)
+            if n == self.window:
+                oldest = buffer[0]
+                state['sum'] -= oldest
+                state['sum_sq'] -= oldest ** 2
+            buffer.append(value)
+            state['sum'] += value
+            state['sum_sq'] += value ** 2
+            state['n'] += 1
+            if state['n'] % self.window == 0:
+                # Recalcular sumas periódicamente evita acumular error de redondeo
+                state['sum'], state['sum_sq'] = float(sum(buffer)), float(sum(v * v for v in buffer))
+            return score
+
+        n, mean, var = state['n'], state['mean'], state['var']
+        score = self._score(value, mean, var, n)
+        delta = value - mean
+        if n == 0:
+            state['mean'], state['var'] = value, 0.0
+        elif self.mode == 'cumulative':
+            # Welford: var = M2 / n (ddof=0)
+            new_mean = mean + delta / (n + 1)
+            state['var'] = (var * n + delta * (value - new_mean)) / (n + 1)
+            state['mean'] = new_mean
+        else:
+            state['mean'] = mean + self.alpha * delta
+            state['var'] = (1 - self.alpha) * (var + self.alpha * delta ** 2)
+        state['n'] = n + 1
+        return score
+
+    def update_batch(self, key, values):
+        """
+        Equivalente vectorizado de llamar update() para cada valor en orden
+        (sin valores NaN). Útil para tramos de generación o reprocesos.
+        Returns:
+            Arreglo de scores
+        """
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return values.copy()
+        if np.isnan(values).any():
+            return np.array([self.update(key, value) for value in values])
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = self._new_state()
+
+        if self.mode == 'cumulative':
+            scores, n, mean, var = self._cumulative_batch(values, state['n'], state['mean'], state['var'])
+        elif self.mode == 'ewm':
+            scores, n, mean, var = self._ewm_batch(values, state['n'], state['mean'], state['var'])
+        else:
+            return self._window_batch(values, state)
+
+        state['n'], state['mean'], state['var'] = n, mean, var
+        return scores
+
+    def _cumulative_batch(self, values, n_prev, mean_prev, var_prev):
+        shift = mean_prev if n_prev else values[0]
+        centered = values - shift  # Centrar mejora la estabilidad numérica
+        k = len(values)
+
+        # Estadísticas previas a cada registro (sumas acumuladas exclusivas)
+        counts = n_prev + np.arange(k + 1)
+        sums = n_prev * (mean_prev - shift) + np.concatenate([[0.0], np.cumsum(centered)])
+        sums_sq = n_prev * (var_prev + (mean_prev - shift) ** 2) + np.concatenate([[0.0], np.cumsum(centered ** 2)])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = sums / counts
+            variances = np.maximum(sums_sq / counts - means ** 2, 0)
+            scores = np.abs(centered - means[:-1]) / np.sqrt(variances[:-1])
+        scores[(counts[:-1] < self.min_count) | ~(variances[:-1] > 0)] = np.nan
+        return scores, int(counts[-1]), float(shift + means[-1]), float(variances[-1])
+
+    def _ewm_batch(self, values, n_prev, mean_prev, var_prev):
+        a = self.alpha
+        if n_prev == 0:
+            mean_prev, var_prev = values[0], 0.0
+        # Recurrencias lineales: m_t = (1-a) m_{t-1} + a x_t ; v_t = (1-a) (v_{t-1} + a d_t^2)
+        means, _ = lfilter([a], [1, -(1 - a)], values, zi=[(1 - a) * mean_prev])
+        prior_means = np.concatenate([[mean_prev], means[:-1]])
+        delta = values - prior_means
+        variances, _ = lfilter([1], [1, -(1 - a)], (1 - a) * a * delta ** 2, zi=[(1 - a) * var_prev])
+        prior_vars = np.concatenate([[var_prev], variances[:-1]])
+        prior_counts = n_prev + np.arange(len(values))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = np.abs(delta) / np.sqrt(prior_vars)
+        scores[(prior_counts < self.min_count) | ~(prior_vars > 0)] = np.nan
+        return scores, int(prior_counts[-1] + 1), float(means[-1]), float(variances[-1])
+
+    def _window_batch(self, values, state):
+        buffer = state['buffer']
+        history = np.concatenate([np.asarray(buffer, dtype=float), values])
+        n_buffer = len(buffer)
+        shift = history[0]
+        centered = history - shift
+        cum = np.concatenate([[0.0], np.cumsum(centered)])
+        cum_sq = np.concatenate([[0.0], np.cumsum(centered ** 2)])
+
+        # Ventana previa al registro t (posición p en history): [max(p - W, 0), p)
+        positions = n_buffer + np.arange(len(values))
+        lo = np.maximum(positions - self.window, 0)
+        counts = positions - lo
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = (cum[positions] - cum[lo]) / counts
+            variances = np.maximum((cum_sq[positions] - cum_sq[lo]) / counts - means ** 2, 0)
+            scores = np.abs(centered[positions] - means) / np.sqrt(variances)
+        scores[(counts < self.min_count) | ~(variances > 0)] = np.nan
+
+        buffer.extend(values[-self.window:].tolist())
+        tail = np.asarray(buffer, dtype=float)
+        state['sum'], state['sum_sq'] = float(tail.sum()), float((tail ** 2).sum())
+        state['n'] += len(values)
+        return scores
+
+    def state_dict(self):
+        """Estado completo serializable a JSON"""
+        states = {}
+        for key, state in self.states.items():
+            state = dict(state)
+            if 'buffer' in state:
+                state['buffer'] = list(state['buffer'])
+            states[str(key)] = state
+        return {'mode': self.mode, 'alpha': self.alpha, 'window': self.window,
+                'min_count': self.min_count, 'states': states}
+
+    @classmethod
+    def from_state_dict(cls, data):
+        """Reconstruye un scorer desde state_dict()"""
+        scorer = cls(mode=data['mode'], alpha=data['alpha'], window=data['window'],
+                     min_count=data['min_count'])
+        for key, state in data['states'].items():
+            state = dict(state)
+            if 'buffer' in state:
+                state['buffer'] = deque(state['buffer'], maxlen=scorer.window)
+            scorer.states[key] = state
+        return scorer
+
+    def save(self, path):
+        """Guarda el estado en JSON"""
+        Path(path).write_text(json.dumps(self.state_dict()))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Carga un scorer guardado con save()"""
+        return cls.from_state_dict(json.loads(Path(path).read_text()))
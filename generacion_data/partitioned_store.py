@@ -0,0 +1,63 @@
+"""
+Layout del dataset Parquet particionado de molinos
+==================================================
+
+El generador escribe una carpeta molino_id=<id>/mes=<YYYY-MM>/part-*.parquet
+(sin las columnas de partición dentro de los archivos). Este módulo concentra
+el layout para escritores y lectores:
+
+- partition_dir(): carpeta de una partición (escritura)
+- partition_files(): partes con su molino y mes (tareas por archivo)
+- iter_months(): un bloque por mes en orden (timestamp, molino_id)
+
+Autor: GRUPO 1 - BREIT
+Fecha: 2025
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+PARTITION_GLOB = 'molino_id=*/mes=*/*.parquet'
+
+
+def partition_dir(root, mill_id, month):
+    """Carpeta de la partición (molino, mes) dentro del dataset"""
+    return Path(root) / f'molino_id={mill_id}' / f'mes={month}'
+
+
+def _partition_value(folder):
+    return folder.name.split('=', 1)[1]
+
+
+def partition_files(root):
+    """
+    Partes del dataset en orden de ruta (molino, mes, tramo)
+    Yields:
+        Tupla (ruta del archivo, molino, mes)
+    """
+    for part in sorted(Path(root).glob(PARTITION_GLOB)):
+        yield part, _partition_value(part.parent.parent), _partition_value(part.parent)
+
+
+def partition_months(root):
+    """Meses presentes en el dataset, ordenados"""
+    return sorted({month for _, _, month in partition_files(root)})
+
+
+def iter_months(root, columns=None, time_col='timestamp', key='molino_id'):
+    """
+    Recorre el dataset un mes a la vez (todos los molinos del mes)
+    Args:
+        root: Carpeta del dataset particionado
+        columns: Columnas a leer (None = todas); las de partición se leen como cualquier otra
+    Yields:
+        DataFrame del mes ordenado por (tiempo, molino), molino como texto y sin 'mes'
+    """
+    for month in partition_months(root):
+        block = pd.read_parquet(root, columns=columns, filters=[('mes', '=', month)])
+        if 'mes' in block.columns and (columns is None or 'mes' not in columns):
+            block = block.drop(columns='mes')
+        if key in block.columns:
+            block[key] = block[key].astype(str)
+        yield block.sort_values([time_col, key], kind='stable', ignore_index=True)
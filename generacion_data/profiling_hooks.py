@@ -0,0 +1,214 @@
+"""
+Instrumentación de la generación de datos
+=========================================
+
+GenerationProfiler registra cada etapa de la generación (tiempo de reloj y de
+CPU, pico de memoria con tracemalloc, filas y bytes producidos), avisa a
+callbacks al inicio y fin de cada etapa, puede capturar un perfil cProfile de
+una etapa elegida y entrega un reporte de la corrida en JSON.
+
+Uso:
+    profiler = GenerationProfiler(track_memory=True, profile_stage='sensor_noise')
+    generator = RealisticMillDataGenerator(profiler=profiler, verbose=False)
+    generator.generate_complete_dataset()
+    profiler.save_report('run_report.json')
+
+Autor: GRUPO 1 - BREIT
+Fecha: 2025
+"""
+
+import contextlib
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+
+def frame_nbytes(data):
+    """Bytes en memoria de un DataFrame o Series (sin contar objetos Python)"""
+    return int(data.memory_usage(index=False).sum()) if isinstance(data, pd.DataFrame) else int(data.nbytes)
+
+
+class GenerationProfiler:
+    """
+    Registro de etapas con callbacks, métricas de tiempo/memoria y perfil opcional
+    """
+
+    def __init__(self, track_memory=False, profile_stage=None, profile_dir=None, profile_top=30,
+                 enabled=True):
+        """
+        Args:
+            track_memory: Medir pico de memoria por etapa con tracemalloc (agrega overhead)
+            profile_stage: Nombre de la etapa a perfilar con cProfile (None = ninguna);
+                           el perfil acumula todas las llamadas a esa etapa
+            profile_dir: Carpeta donde guardar el .prof capturado (None = solo resumen)
+            profile_top: Funciones incluidas en el resumen del perfil
+            enabled: False desactiva el registro (las etapas solo ejecutan su cuerpo)
+        """
+        self.track_memory = track_memory
+        self.profile_stage = profile_stage
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.profile_top = profile_top
+        self.enabled = enabled
+        self.records = []
+        self._callbacks = []
+        self._stack = []
+        self._started_tracemalloc = False
+        self._run_start = None
+        self._profile = None
+
+    def __getstate__(self):
+        # Los procesos del pool reciben un profiler desactivado (sin callbacks no serializables)
+        state = self.__dict__.copy()
+        state.update(enabled=False, records=[], _callbacks=[], _stack=[], _started_tracemalloc=False,
+                     _profile=None)
+        return state
+
+    def add_callback(self, on_start=None, on_end=None):
+        """
+        Registra funciones a invocar al inicio y fin de cada etapa
+        Args:
+            on_start: f(nombre_etapa)
+            on_end: f(registro) con el diccionario de métricas de la etapa
+        """
+        self._callbacks.append((on_start, on_end))
+        return self
+
+    @contextlib.contextmanager
+    def stage(self, name, **info):
+        """
+        Mide una etapa. El registro entregado puede completarse dentro del bloque
+        (p.ej. record['rows'] = len(data)).
+        Args:
+            name: Nombre de la etapa
+            info: Datos adicionales a registrar (molino, tramo, ...)
+        """
+        if not self.enabled:
+            yield {}
+            return
+        if self._run_start is None:
+            self._run_start = (time.time(), time.perf_counter(), time.process_time())
+
+        record = {'stage': name, **info, 'rows': None, 'bytes': None}
+        for on_start, _ in self._callbacks:
+            if on_start:
+                on_start(name)
+
+        frame = {'record': record}
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # El pico acumulado hasta aquí pertenece a la etapa contenedora
+                self._stack[-1]['abs_peak'] = max(self._stack[-1]['abs_peak'], peak)
+            tracemalloc.reset_peak()
+            frame.update(start_memory=current, abs_peak=current)
+
+        profiling = name == self.profile_stage
+        if profiling:
+            self._profile = self._profile or cProfile.Profile()
+            self._profile.enable()
+
+        self._stack.append(frame)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_s'] = time.perf_counter() - wall_start
+            record['cpu_s'] = time.process_time() - cpu_start
+            self._stack.pop()
+            if profiling:
+                self._profile.disable()
+            if self.track_memory:
+                abs_peak = max(frame['abs_peak'], tracemalloc.get_traced_memory()[1])
+                record['peak_mb'] = (abs_peak - frame['start_memory']) / 1024**2
+                if self._stack:
+                    self._stack[-1]['abs_peak'] = max(self._stack[-1]['abs_peak'], abs_peak)
+            if record['wall_s'] > 0 and record['rows']:
+                record['rows_per_s'] = record['rows'] / record['wall_s']
+            self.records.append(record)
+            for _, on_end in self._callbacks:
+                if on_end:
+                    on_end(record)
+
+    def profile_summary(self):
+        """Funciones más costosas de la etapa perfilada (y .prof completo si hay carpeta)"""
+        if self._profile is None:
+            return None
+        summary = {'stage': self.profile_stage}
+        if self.profile_dir is not None:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            path = self.profile_dir / f'{self.profile_stage}.prof'
+            self._profile.dump_stats(path)
+            summary['file'] = str(path)
+        buffer = io.StringIO()
+        pstats.Stats(self._profile, stream=buffer).sort_stats('cumulative').print_stats(self.profile_top)
+        summary['top'] = buffer.getvalue()
+        return summary
+
+    def totals(self):
+        """Métricas agregadas por etapa (suma de tiempos, filas y bytes; pico máximo)"""
+        if not self.records:
+            return {}
+        frame = pd.DataFrame(self.records)
+        total = lambda values: values.sum(min_count=1)  # None si la etapa no informa filas/bytes
+        aggregations = {'wall_s': 'sum', 'cpu_s': 'sum', 'rows': total, 'bytes': total, 'stage': 'size'}
+        if 'peak_mb' in frame:
+            aggregations['peak_mb'] = 'max'
+        totals = frame.groupby('stage', sort=False).agg(aggregations).rename(columns={'stage': 'calls'})
+        return {stage: {k: (None if pd.isna(v) else float(v) if k != 'calls' else int(v))
+                        for k, v in row.items()}
+                for stage, row in totals.iterrows()}
+
+    def report(self):
+        """Reporte de la corrida: entorno, tiempos totales, etapas y agregados"""
+        started_at, perf_start, cpu_start = self._run_start or (time.time(), time.perf_counter(), time.process_time())
+        report = {
+            'run': {
+                'started_at': pd.Timestamp(started_at, unit='s').isoformat(),
+                'wall_s': time.perf_counter() - perf_start,
+                'cpu_s': time.process_time() - cpu_start,
+                'pid': os.getpid(),
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'track_memory': self.track_memory,
+                'profile_stage': self.profile_stage,
+            },
+            'totals': self.totals(),
+            'stages': self.records,
+            'profile': self.profile_summary(),
+        }
+        return report
+
+    def save_report(self, path):
+        """Guarda el reporte en JSON"""
+        Path(path).write_text(json.dumps(self.report(), indent=2, default=str))
+        return path
+
+    def close(self):
+        """Detiene tracemalloc si lo inició este profiler"""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+
+class StageLogger:
+    """Callback de ejemplo: una línea JSON por etapa terminada (para logs de jobs nocturnos)"""
+
+    def __init__(self, stream=None, min_wall_s=0.0):
+        self.stream = stream
+        self.min_wall_s = min_wall_s
+
+    def __call__(self, record):
+        if record['wall_s'] >= self.min_wall_s:
+            line = json.dumps(record, default=str)
+            print(line, file=self.stream, flush=True)
@@ -0,0 +1,434 @@
+"""
+Servicio asíncrono de scoring de riesgo de falla por micro-lotes
+================================================================
+
+Recibe registros de sensores por molino (un diccionario por hora y molino, con
+las columnas de la vista de condition monitoring), mantiene el estado de features
+de cada molino y devuelve el riesgo de falla a 7 y 30 días.
+
+- Estado por molino vectorizado sobre la flota: buffers circulares para las
+  tendencias (TREND_FEATURES) y media/varianza de Welford para los anomaly scores
+  (ANOMALY_FEATURES, mismo criterio causal que OnlineAnomalyScorer 'cumulative')
+- Micro-batching: las solicitudes se acumulan hasta max_batch_size o hasta que
+  vence max_delay_ms, y se evalúan en una sola llamada vectorizada al modelo
+- Histograma de latencias (solicitud → respuesta) con percentiles
+- Servidor TCP opcional: un JSON por línea de entrada y de salida
+
+Uso:
+    python scoring_service.py --port 9100
+
+Autor: GRUPO 1 - BREIT
+Fecha: 2025
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+from maquina_bolas_data_generator import ANOMALY_FEATURES, TREND_FEATURES
+
+RISK_TARGETS = ('falla_en_7d', 'falla_en_30d')
+
+# Features de entrada al modelo: sensores del registro + features de estado
+MODEL_FEATURES = [
+    'vibracion_cojinete_feed_h', 'vibracion_cojinete_discharge_h', 'vibracion_gearbox',
+    'temp_cojinete_feed', 'temp_cojinete_discharge', 'temp_aceite_lubricacion',
+    'corriente_motor', 'presion_aceite_principal', 'calidad_aceite_ppm',
+    'vibracion_trend_7d', 'temperatura_trend_7d',
+    'anomaly_score_vibration', 'anomaly_score_electrical',
+]
+
+
+class FleetFeatureState:
+    """
+    Estado de features de todos los molinos en arreglos (una fila por molino).
+    Cada actualización procesa a la vez un registro de varios molinos distintos.
+    """
+
+    def __init__(self, trend_specs=TREND_FEATURES, anomaly_specs=ANOMALY_FEATURES, min_count=2,
+                 initial_capacity=64):
+        self.trend_specs = list(trend_specs)
+        self.anomaly_specs = list(anomaly_specs)
+        self.min_count = min_count
+        self.mill_index = {}
+        self.capacity = 0
+
+        # Tendencias: buffer circular (molinos x ventana) con suma y conteo móviles
+        self.rings = [None] * len(self.trend_specs)
+        self.ring_pos = self.ring_sum = self.ring_count = None
+        # Anomalías: n, media y varianza de Welford por molino y feature
+        self.anomaly_n = self.anomaly_mean = self.anomaly_var = None
+        self._resize(initial_capacity)
+
+    def _resize(self, capacity):
+        """Amplía los arreglos de estado conservando los molinos existentes"""
+        def grow(old, shape, fill, dtype=float):
+            new = np.full((capacity, *shape), fill, dtype=dtype)
+            if old is not None:
+                new[:len(old)] = old
+            return new
+
+        n_trends, n_anomalies = len(self.trend_specs), len(self.anomaly_specs)
+        self.rings = [grow(ring, (window,), np.nan)
+                      for ring, (_, _, window, _) in zip(self.rings, self.trend_specs)]
+        self.ring_pos = grow(self.ring_pos, (), 0, dtype=np.int64)
+        self.ring_sum = grow(self.ring_sum, (n_trends,), 0.0)
+        self.ring_count = grow(self.ring_count, (n_trends,), 0.0)
+        self.anomaly_n = grow(self.anomaly_n, (n_anomalies,), 0.0)
+        self.anomaly_mean = grow(self.anomaly_mean, (n_anomalies,), 0.0)
+        self.anomaly_var = grow(self.anomaly_var, (n_anomalies,), 0.0)
+        self.capacity = capacity
+
+    def indices(self, mill_ids):
+        """Índice de fila de cada molino (registra los molinos nuevos)"""
+        for mill_id in mill_ids:
+            if mill_id not in self.mill_index:
+                self.mill_index[mill_id] = len(self.mill_index)
+        if len(self.mill_index) > self.capacity:
+            self._resize(max(2 * self.capacity, len(self.mill_index)))
+        return np.array([self.mill_index[mill_id] for mill_id in mill_ids], dtype=int)
+
+    def update(self, idx, columns):
+        """
+        Actualiza el estado con un registro por molino (idx sin repetidos)
+        Args:
+            idx: Índices de fila de los molinos
+            columns: Diccionario {columna: arreglo} con las señales de los registros
+        Returns:
+            Diccionario {feature: arreglo} con tendencias y anomaly scores
+        """
+        features = {}
+        for s, (feature, source, window, min_periods) in enumerate(self.trend_specs):
+            values = columns[source]
+            ring = self.rings[s]
+            pos = self.ring_pos[idx] % window
+            oldest = ring[idx, pos]
+            valid_old, valid_new = ~np.isnan(oldest), ~np.isnan(values)
+            self.ring_sum[idx, s] += np.where(valid_new, values, 0.0) - np.where(valid_old, oldest, 0.0)
+            self.ring_count[idx, s] += valid_new.astype(float) - valid_old
+            ring[idx, pos] = values
+            count = self.ring_count[idx, s]
+            features[feature] = np.where(count >= min_periods, self.ring_sum[idx, s] / np.maximum(count, 1), np.nan)
+        self.ring_pos[idx] += 1
+
+        for a, (feature, sources) in enumerate(self.anomaly_specs):
+            value = np.mean([columns[source] for source in sources], axis=0)
+            n, mean, var = self.anomaly_n[idx, a], self.anomaly_mean[idx, a], self.anomaly_var[idx, a]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                score = np.abs(value - mean) / np.sqrt(var)
+            features[feature] = np.where((n >= self.min_count) & (var > 0), score, np.nan)
+
+            # Welford (ddof=0), solo para valores válidos
+            valid = ~np.isnan(value)
+            new_n = n + valid
+            delta = np.where(valid, value - mean, 0.0)
+            new_mean = mean + np.where(valid, delta / np.maximum(new_n, 1), 0.0)
+            self.anomaly_var[idx, a] = np.where(
+                valid, (var * n + delta * (np.where(valid, value, 0.0) - new_mean)) / np.maximum(new_n, 1), var
+            )
+            self.anomaly_mean[idx, a] = new_mean
+            self.anomaly_n[idx, a] = new_n
+        return features
+
+
+class HeuristicRiskModel:
+    """
+    Modelo logístico de referencia (sin entrenamiento) a partir de los anomaly
+    scores y la desviación de vibración y temperatura respecto de su tendencia
+    """
+
+    feature_columns = MODEL_FEATURES
+
+    def __call__(self, X):
+        col = {name: i for i, name in enumerate(self.feature_columns)}
+        X = np.nan_to_num(X, nan=0.0)
+        vib_ratio = X[:, col['vibracion_cojinete_feed_h']] / np.maximum(X[:, col['vibracion_trend_7d']], 1e-6)
+        temp_delta = X[:, col['temp_cojinete_feed']] - X[:, col['temperatura_trend_7d']]
+        logit = (0.8 * X[:, col['anomaly_score_vibration']] + 0.4 * X[:, col['anomaly_score_electrical']]
+                 + 2.0 * (np.clip(vib_ratio, 0, 3) - 1) + 0.15 * temp_delta)
+        # Horizontes más largos acumulan más riesgo
+        return 1 / (1 + np.exp(-np.column_stack([logit - 3.0, logit - 2.0])))
+
+
+class SklearnRiskModel:
+    """Un clasificador con predict_proba por horizonte (cualquier estimador de sklearn)"""
+
+    def __init__(self, models, feature_columns=MODEL_FEATURES):
+        self.models = models
+        self.feature_columns = list(feature_columns)
+
+    def __call__(self, X):
+        return np.column_stack([self.models[target].predict_proba(X)[:, 1] for target in RISK_TARGETS])
+
+
+class LinearRiskModel:
+    """
+    Regresión logística ya fusionada con imputación y escalado: un solo producto
+    matricial por lote, sin la validación por llamada de sklearn
+    """
+
+    def __init__(self, fill_values, weights, intercepts, feature_columns=MODEL_FEATURES):
+        self.fill_values = np.asarray(fill_values, dtype=float)
+        self.weights = np.asarray(weights, dtype=float)        # (features, horizontes)
+        self.intercepts = np.asarray(intercepts, dtype=float)  # (horizontes,)
+        self.feature_columns = list(feature_columns)
+
+    def __call__(self, X):
+        X = np.where(np.isnan(X), self.fill_values, X)
+        return 1 / (1 + np.exp(-(X @ self.weights + self.intercepts)))
+
+
+def fit_risk_model(view, feature_columns=MODEL_FEATURES, max_rows=200_000, seed=0):
+    """
+    Entrena una regresión logística por horizonte sobre la vista de condition
+    monitoring (create_specialized_views)
+    Returns:
+        LinearRiskModel listo para RiskScoringService
+    """
+    from sklearn.impute import SimpleImputer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    if len(view) > max_rows:
+        view = view.sample(max_rows, random_state=seed)
+    X = view[feature_columns].to_numpy(dtype=float)
+
+    weights, intercepts = [], []
+    for target in RISK_TARGETS:
+        pipeline = make_pipeline(
+            SimpleImputer(), StandardScaler(), LogisticRegression(max_iter=500, class_weight='balanced')
+        ).fit(X, view[target].astype(bool))
+        imputer, scaler, classifier = (step for _, step in pipeline.steps)
+        # logit = coef · (x - media) / escala + b  =  (coef / escala) · x + (b - coef · media / escala)
+        coef = classifier.coef_[0] / scaler.scale_
+        weights.append(coef)
+        intercepts.append(classifier.intercept_[0] - coef @ scaler.mean_)
+    return LinearRiskModel(imputer.statistics_, np.column_stack(weights), intercepts, feature_columns)
+
+
+class LatencyHistogram:
+    """Histograma de latencias con buckets logarítmicos (0.01 ms a 10 s)"""
+
+    def __init__(self, min_ms=0.01, max_ms=10_000, buckets_per_decade=20):
+        n_decades = np.log10(max_ms / min_ms)
+        self.edges_ms = min_ms * np.logspace(0, n_decades, int(n_decades * buckets_per_decade) + 1)
+        self.counts = np.zeros(len(self.edges_ms) + 1, dtype=np.int64)
+        self.total = 0
+        self.max_ms = 0.0
+
+    def record(self, latencies_ms):
+        latencies_ms = np.asarray(latencies_ms, dtype=float)
+        np.add.at(self.counts, np.searchsorted(self.edges_ms, latencies_ms), 1)
+        self.total += len(latencies_ms)
+        self.max_ms = max(self.max_ms, float(latencies_ms.max(initial=0.0)))
+
+    def percentile(self, q):
+        """Percentil aproximado (borde superior del bucket, acotado por la latencia máxima)"""
+        if self.total == 0:
+            return np.nan
+        bucket = int(np.searchsorted(np.cumsum(self.counts), q / 100 * self.total))
+        return min(float(self.edges_ms[min(bucket, len(self.edges_ms) - 1)]), self.max_ms)
+
+    def summary(self):
+        return {'count': self.total, 'p50_ms': self.percentile(50), 'p90_ms': self.percentile(90),
+                'p99_ms': self.percentile(99), 'max_ms': round(self.max_ms, 3)}
+
+
+class RiskScoringService:
+    """
+    Scoring de riesgo por micro-lotes con estado de features por molino
+    """
+
+    def __init__(self, model=None, max_batch_size=1024, max_delay_ms=2.0, state=None):
+        """
+        Args:
+            model: Invocable X (n, features) -> riesgos (n, 2); por defecto HeuristicRiskModel
+            max_batch_size: Solicitudes máximas por lote (al llenarse se evalúa de inmediato)
+            max_delay_ms: Espera máxima de la primera solicitud de un lote
+            state: FleetFeatureState a reutilizar (por defecto uno nuevo)
+        """
+        self.model = model or HeuristicRiskModel()
+        self.max_batch_size = max_batch_size
+        self.max_delay_ms = max_delay_ms
+        self.state = state or FleetFeatureState()
+        self.latency = LatencyHistogram()
+        self.batch_sizes = []
+        self._pending = []
+        self._flush_handle = None
+
+        sources = [source for _, source, _, _ in self.state.trend_specs]
+        sources += [source for _, group in self.state.anomaly_specs for source in group]
+        derived = {feature for feature, *_ in self.state.trend_specs}
+        derived |= {feature for feature, _ in self.state.anomaly_specs}
+        self._input_columns = list(dict.fromkeys(
+            sources + [col for col in self.model.feature_columns if col not in derived]
+        ))
+        self._getter = itemgetter(*self._input_columns)
+
+    def _parse(self, record):
+        """
+        Valida un registro y extrae sus señales (faltantes = NaN)
+        Raises:
+            ValueError: Si falta 'molino_id' o alguna señal no es numérica
+        """
+        if not isinstance(record, dict) or record.get('molino_id') is None:
+            raise ValueError("El registro debe ser un objeto con 'molino_id'")
+        try:
+            return np.array(self._getter(record), dtype=float).reshape(-1)
+        except (KeyError, TypeError, ValueError):
+            pass
+        row = np.empty(len(self._input_columns))
+        for i, col in enumerate(self._input_columns):
+            value = record.get(col)
+            try:
+                row[i] = np.nan if value is None else float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Valor no numérico en '{col}': {value!r}") from None
+        return row
+
+    def submit(self, record):
+        """
+        Encola un registro (debe incluir 'molino_id'). Un registro inválido se
+        rechaza solo en su propio future y no entra al lote.
+        Returns:
+            Future con {'molino_id', 'timestamp', 'falla_en_7d', 'falla_en_30d'}
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        try:
+            values = self._parse(record)
+        except ValueError as exc:
+            future.set_exception(exc)
+            return future
+        self._pending.append((record, values, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_delay_ms / 1000, self._flush)
+        return future
+
+    async def score(self, record):
+        """Riesgo de un registro"""
+        return await self.submit(record)
+
+    async def score_many(self, records):
+        """Riesgo de varios registros (p.ej. la flota completa en un instante)"""
+        return await asyncio.gather(*(self.submit(record) for record in records))
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        try:
+            risks = self._score_batch([record['molino_id'] for record, _, _, _ in batch],
+                                      np.vstack([values for _, values, _, _ in batch]))
+        except Exception as exc:
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        done = time.perf_counter()
+        for (record, _, future, _), risk in zip(batch, risks):
+            if not future.done():
+                future.set_result({'molino_id': record['molino_id'], 'timestamp': record.get('timestamp'),
+                                   RISK_TARGETS[0]: float(risk[0]), RISK_TARGETS[1]: float(risk[1])})
+        self.latency.record([(done - submitted) * 1000 for _, _, _, submitted in batch])
+        self.batch_sizes.append(len(batch))
+
+    def _score_batch(self, mill_ids, values):
+        """
+        Actualiza el estado y evalúa el modelo para un lote ya validado en submit()
+        Args:
+            mill_ids: Molino de cada registro
+            values: Matriz (registros, self._input_columns)
+        """
+        n = len(mill_ids)
+        columns = dict(zip(self._input_columns, values.T))
+        idx = self.state.indices(mill_ids)
+
+        # Un molino puede aparecer varias veces en el lote: se procesa por rondas
+        # (k-ésima aparición de cada molino) para respetar el orden temporal
+        occurrence = pd.Series(idx).groupby(idx).cumcount().to_numpy()
+        features = {}
+        for k in range(occurrence.max() + 1):
+            rows = np.flatnonzero(occurrence == k)
+            round_features = self.state.update(idx[rows], {col: signal[rows] for col, signal in columns.items()})
+            for feature, result in round_features.items():
+                features.setdefault(feature, np.empty(n))[rows] = result
+
+        columns.update(features)
+        X = np.column_stack([columns[col] for col in self.model.feature_columns])
+        return self.model(X)
+
+    def stats(self):
+        """Latencias y tamaños de lote acumulados"""
+        sizes = np.array(self.batch_sizes or [0])
+        return {**self.latency.summary(), 'batches': len(self.batch_sizes),
+                'mean_batch_size': round(float(sizes.mean()), 1), 'mills': len(self.state.mill_index)}
+
+    async def handle_connection(self, reader, writer):
+        """Atiende una conexión NDJSON: un registro por línea, una respuesta por línea (mismo orden)"""
+        responses = asyncio.Queue()
+
+        async def write_responses():
+            while (future := await responses.get()) is not None:
+                try:
+                    result = await future
+                except Exception as exc:
+                    result = {'error': str(exc)}
+                writer.write((json.dumps(result, default=str) + '\n').encode())
+                await writer.drain()
+
+        writer_task = asyncio.create_task(write_responses())
+        try:
+            while line := await reader.readline():
+                try:
+                    future = self.submit(json.loads(line))
+                except ValueError as exc:
+                    future = asyncio.get_running_loop().create_future()
+                    future.set_exception(exc)
+                await responses.put(future)
+        finally:
+            await responses.put(None)
+            await writer_task
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=9100):
+        """Servidor TCP NDJSON"""
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    """
+    Servidor de scoring desde línea de comandos
+    """
+    parser = argparse.ArgumentParser(description="Servicio de scoring de riesgo de falla")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--max-batch-size', type=int, default=1024)
+    parser.add_argument('--max-delay-ms', type=float, default=2.0)
+    parser.add_argument('--train', help="Vista de condition monitoring (Parquet) para entrenar el modelo")
+    args = parser.parse_args()
+
+    model = fit_risk_model(pd.read_parquet(args.train)) if args.train else None
+    service = RiskScoringService(model, max_batch_size=args.max_batch_size, max_delay_ms=args.max_delay_ms)
+    print(f"🛰️  Servicio de scoring en {args.host}:{args.port} "
+          f"(lote ≤ {args.max_batch_size}, espera ≤ {args.max_delay_ms} ms)")
+    asyncio.run(service.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
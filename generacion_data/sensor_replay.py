@@ -0,0 +1,308 @@
+"""
+Replay en tiempo real de datos de sensores de molinos
+=====================================================
+
+Reproduce registros horarios por molino (con la forma de la salida de
+RealisticMillDataGenerator) a una velocidad configurable: 1× (tiempo real), 60×
+(una hora de datos por minuto) o tan rápido como sea posible. Los registros se
+envían a sinks locales intercambiables:
+
+- QueueSink: asyncio.Queue acotada (consumidores dentro del mismo proceso)
+- SocketSink: socket TCP o Unix, un JSON por línea
+- NDJSONFileSink: archivo de JSON por línea
+
+Con aceleración, cada bloque agrupa solo las horas programadas dentro de un mismo
+intervalo de reloj (tick_seconds); sin aceleración, hasta max_block_rows filas.
+Cada bloque de registros espera a que todos los sinks lo acepten (backpressure):
+si un consumidor es lento, el replay se frena y el retraso queda en las métricas.
+
+Uso:
+    python sensor_replay.py molinos_mineraperu_dataset --speedup 3600 --tcp 127.0.0.1:9000
+
+Autor: GRUPO 1 - BREIT
+Fecha: 2025
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from partitioned_store import iter_months
+
+
+def iter_dataset_blocks(source):
+    """
+    Recorre el dataset en orden temporal, en bloques acotados en memoria
+    Args:
+        source: DataFrame, archivo (Parquet/Feather/CSV) o dataset Parquet
+                particionado por molino_id/mes (se lee un mes a la vez)
+    """
+    if isinstance(source, pd.DataFrame):
+        yield source
+        return
+
+    path = Path(source)
+    if path.is_dir():
+        yield from iter_months(path)
+    elif path.suffix == '.csv':
+        yield pd.read_csv(path, parse_dates=['timestamp'])
+    elif path.suffix == '.feather':
+        yield pd.read_feather(path)
+    else:
+        yield pd.read_parquet(path)
+
+
+class ReplayBlock:
+    """
+    Bloque de registros (horas completas de todos los molinos) con
+    serializaciones calculadas una sola vez y compartidas entre sinks
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self._records = None
+        self._ndjson = None
+
+    def __len__(self):
+        return len(self.frame)
+
+    def records(self):
+        """Registros como lista de diccionarios"""
+        if self._records is None:
+            self._records = self.frame.to_dict(orient='records')
+        return self._records
+
+    def ndjson(self):
+        """Registros como bytes NDJSON (un objeto JSON por línea)"""
+        if self._ndjson is None:
+            text = self.frame.to_json(orient='records', lines=True, date_format='iso')
+            self._ndjson = (text if text.endswith('\n') else text + '\n').encode()
+        return self._ndjson
+
+
+class QueueSink:
+    """Envía cada registro (dict) a una asyncio.Queue; una cola acotada aplica backpressure"""
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    async def send(self, block):
+        for record in block.records():
+            await self.queue.put(record)
+        return 0
+
+    async def close(self):
+        pass
+
+
+class SocketSink:
+    """Escribe NDJSON en un socket TCP (host, port) o Unix (path)"""
+
+    def __init__(self, host=None, port=None, path=None):
+        if path is None and (host is None or port is None):
+            raise ValueError("Indique host y port (TCP) o path (Unix)")
+        self.host, self.port, self.path = host, port, path
+        self.writer = None
+
+    async def _connect(self):
+        if self.path is not None:
+            _, self.writer = await asyncio.open_unix_connection(self.path)
+        else:
+            _, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def send(self, block):
+        if self.writer is None:
+            await self._connect()
+        payload = block.ndjson()
+        self.writer.write(payload)
+        await self.writer.drain()  # Espera si el buffer del socket está lleno
+        return len(payload)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+
+class NDJSONFileSink:
+    """Escribe NDJSON en un archivo (la escritura se hace fuera del event loop)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.file = None
+
+    async def send(self, block):
+        if self.file is None:
+            self.file = open(self.path, 'wb')
+        payload = block.ndjson()
+        await asyncio.to_thread(self.file.write, payload)
+        return len(payload)
+
+    async def close(self):
+        if self.file is not None:
+            await asyncio.to_thread(self.file.close)
+
+
+class ReplayStats:
+    """Contadores de throughput y retraso del replay"""
+
+    def __init__(self):
+        self.records = 0
+        self.blocks = 0
+        self.bytes = 0
+        self.lag_seconds = 0.0      # Retraso del último bloque respecto de su hora programada
+        self.max_lag_seconds = 0.0
+        self.started_at = None
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        return {
+            'records': self.records,
+            'blocks': self.blocks,
+            'bytes': self.bytes,
+            'elapsed_s': round(elapsed, 3),
+            'records_per_s': round(self.records / elapsed, 1) if elapsed else 0.0,
+            'lag_s': round(self.lag_seconds, 3),
+            'max_lag_s': round(self.max_lag_seconds, 3),
+        }
+
+
+class SensorReplay:
+    """
+    Reproduce un dataset de molinos hora a hora hacia uno o más sinks
+    """
+
+    def __init__(self, source, sinks, speedup=60.0, max_block_rows=5000, tick_seconds=0.1,
+                 report_every=None, clock=None, sleep=None):
+        """
+        Args:
+            source: DataFrame o ruta (ver iter_dataset_blocks)
+            sinks: Lista de sinks (QueueSink, SocketSink, NDJSONFileSink u otro con send/close)
+            speedup: Factor de aceleración (1 = tiempo real; None = sin esperas)
+            max_block_rows: Máximo de filas por bloque sin aceleración (siempre horas completas)
+            tick_seconds: Con aceleración, un bloque agrupa solo las horas programadas
+                          dentro de un mismo intervalo de reloj de esta duración
+            report_every: Segundos entre reportes de métricas por consola (None = sin reporte)
+            clock, sleep: Reloj (segundos) y espera asíncrona; por defecto los del event loop
+        """
+        self.source = source
+        self.sinks = list(sinks)
+        self.speedup = speedup
+        self.max_block_rows = max_block_rows
+        self.tick_seconds = tick_seconds
+        self.report_every = report_every
+        self.clock = clock
+        self.sleep = sleep or asyncio.sleep
+        self.stats = ReplayStats()
+
+    def _iter_blocks(self):
+        """
+        Bloques de horas completas (todos los molinos de cada hora juntos): con
+        aceleración, las horas de un mismo intervalo de reloj; sin ella, hasta
+        max_block_rows filas
+        """
+        data_start = None
+        for frame in iter_dataset_blocks(self.source):
+            if not len(frame):
+                continue
+            timestamps = frame['timestamp'].to_numpy()
+            hour_starts = np.flatnonzero(np.r_[True, timestamps[1:] != timestamps[:-1]])
+            if data_start is None:
+                data_start = timestamps[0]
+
+            if self.speedup:
+                # Intervalo de reloj en que se programa cada hora: un corte por intervalo
+                offsets = (timestamps[hour_starts] - data_start) / np.timedelta64(1, 's') / self.speedup
+                ticks = np.floor(offsets / self.tick_seconds)
+                cuts = hour_starts[np.r_[True, ticks[1:] != ticks[:-1]]]
+            else:
+                hour_ends = np.r_[hour_starts[1:], len(frame)]
+                cuts, block_start = [0], 0
+                for hour_end in hour_ends[:-1]:
+                    if hour_end - block_start >= self.max_block_rows:
+                        cuts.append(hour_end)
+                        block_start = hour_end
+            for start, end in zip(cuts, np.r_[cuts[1:], len(frame)]):
+                yield frame.iloc[start:end], timestamps[start]
+
+    async def run(self):
+        """
+        Ejecuta el replay completo
+        Returns:
+            Métricas finales (ReplayStats.snapshot)
+        """
+        clock = self.clock or asyncio.get_running_loop().time
+        self.stats.started_at = time.perf_counter()
+        wall_start = clock()
+        data_start = None
+        last_report = wall_start
+
+        try:
+            for frame, block_time in self._iter_blocks():
+                if data_start is None:
+                    data_start = block_time
+
+                # Hora de envío programada según la aceleración
+                if self.speedup:
+                    offset = float((block_time - data_start) / np.timedelta64(1, 's')) / self.speedup
+                    delay = wall_start + offset - clock()
+                    if delay > 0:
+                        await self.sleep(delay)
+                    self.stats.lag_seconds = max(-delay, 0.0)
+                    self.stats.max_lag_seconds = max(self.stats.max_lag_seconds, self.stats.lag_seconds)
+
+                block = ReplayBlock(frame)
+                sent_bytes = await asyncio.gather(*(sink.send(block) for sink in self.sinks))
+                self.stats.records += len(block)
+                self.stats.blocks += 1
+                self.stats.bytes += sum(sent_bytes)
+
+                if self.report_every and clock() - last_report >= self.report_every:
+                    print(f"📡 {self.stats.snapshot()}")
+                    last_report = clock()
+        finally:
+            for sink in self.sinks:
+                await sink.close()
+
+        return self.stats.snapshot()
+
+
+def main():
+    """
+    Replay desde línea de comandos
+    """
+    parser = argparse.ArgumentParser(description="Replay de datos de sensores de molinos")
+    parser.add_argument('source', help="Dataset (archivo o carpeta Parquet particionada)")
+    parser.add_argument('--speedup', type=float, default=60.0,
+                        help="Factor de aceleración (0 = tan rápido como sea posible)")
+    parser.add_argument('--tcp', help="Destino TCP host:puerto")
+    parser.add_argument('--unix', help="Destino socket Unix")
+    parser.add_argument('--ndjson', help="Archivo NDJSON de salida")
+    parser.add_argument('--report-every', type=float, default=5.0)
+    args = parser.parse_args()
+
+    sinks = []
+    if args.tcp:
+        host, port = args.tcp.rsplit(':', 1)
+        sinks.append(SocketSink(host=host, port=int(port)))
+    if args.unix:
+        sinks.append(SocketSink(path=args.unix))
+    if args.ndjson:
+        sinks.append(NDJSONFileSink(args.ndjson))
+    if not sinks:
+        parser.error("Indique al menos un destino: --tcp, --unix o --ndjson")
+
+    replay = SensorReplay(args.source, sinks, speedup=args.speedup or None,
+                          report_every=args.report_every)
+    print(f"📡 Replay de {args.source} a {args.speedup or 'máxima'}× ...")
+    stats = asyncio.run(replay.run())
+    print(f"✅ Replay terminado: {json.dumps(stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Los módulos del proyecto se importan como hermanos (from utils import ...)
+ROOT = Path(__file__).resolve().parents[1]
+for folder in ('EDAs', 'generacion_data'):
+    sys.path.insert(0, str(ROOT / folder))
+
+
+def make_mill_data(start='2023-01-01', hours=24 * 75, mills=('M1', 'M2', 'M3'), seed=0):
+    """Dataset horario sintético en el orden del dataset real (timestamp, molino)"""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range(start, periods=hours, freq='h')
+    data = pd.DataFrame({
+        'timestamp': np.repeat(timestamps, len(mills)),
+        'molino_id': np.tile(list(mills), hours),
+    })
+    data['turno'] = np.array(['A', 'B', 'C'])[data['timestamp'].dt.hour // 8]
+    n = len(data)
+    base = rng.normal(size=n)
+    data['feed_rate'] = 280 + 15 * base + rng.normal(0, 5, n)
+    data['potencia_motor'] = 4000 + 120 * base + rng.normal(0, 60, n)
+    data['temp_cojinete_feed'] = np.where(rng.random(n) < 0.05, np.nan, 55 + rng.normal(0, 3, n))
+    data['falla_en_7d'] = rng.random(n) < 0.1
+    return data
+
+
+@pytest.fixture
+def mill_data():
+    return make_mill_data
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """Raíz de proyecto temporal: data/ y sus cachés viven en tmp_path"""
+    import utils
+
+    (tmp_path / 'data').mkdir()
+    monkeypatch.setattr(utils, 'get_project_root', lambda: tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def partitioned(tmp_path):
+    """Escribe un dataset con el layout particionado del generador (dos tramos por mes)"""
+    from partitioned_store import partition_dir
+
+    def write(data, name='dataset'):
+        root = tmp_path / name
+        months = data['timestamp'].dt.strftime('%Y-%m')
+        chunks = (data['timestamp'].dt.day >= 15).astype(int)
+        for (mill_id, month, chunk), part in data.groupby([data['molino_id'], months, chunks], sort=True):
+            folder = partition_dir(root, mill_id, month)
+            folder.mkdir(parents=True, exist_ok=True)
+            part.drop(columns='molino_id').to_parquet(folder / f'part-{chunk:05d}.parquet', index=False)
+        return root
+
+    return write
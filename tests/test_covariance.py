@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from covariance import CovarianceAccumulator, CovarianceCube, covariance_parquet, molinos_covariance
+from utils import cached_data
+
+VARIABLES = ['feed_rate', 'potencia_motor', 'temp_cojinete_feed']
+
+
+def assert_matrix_equal(result, expected):
+    pd.testing.assert_frame_equal(result, expected[result.columns].loc[result.index], rtol=1e-9, atol=1e-12)
+
+
+def test_chunked_accumulator_matches_pandas(mill_data):
+    data = mill_data()[VARIABLES]
+    data.loc[:400, 'temp_cojinete_feed'] = np.nan  # bloque completo sin la variable
+
+    accumulator = CovarianceAccumulator(VARIABLES)
+    for start, stop in [(0, 1), (1, 300), (300, 2000), (2000, len(data))]:
+        accumulator.update(data.iloc[start:stop])
+
+    assert_matrix_equal(accumulator.corr(), data.corr())
+    assert_matrix_equal(accumulator.cov(), data.cov())
+    # DataFrame.cov ignora ddof con faltantes: ddof=0 se compara sobre columnas completas
+    complete = ['feed_rate', 'potencia_motor']
+    assert_matrix_equal(accumulator.cov(ddof=0).loc[complete, complete], data[complete].cov(ddof=0))
+
+
+def test_merge_is_order_independent(mill_data):
+    data = mill_data()[VARIABLES]
+    parts = [data.iloc[start:start + 1200] for start in range(0, len(data), 1200)]
+
+    forward = CovarianceAccumulator(VARIABLES)
+    for part in parts:
+        forward.merge(CovarianceAccumulator.from_values(VARIABLES, part.to_numpy()))
+    backward = CovarianceAccumulator(VARIABLES)
+    for part in reversed(parts):
+        backward.merge(CovarianceAccumulator.from_values(VARIABLES, part.to_numpy()))
+
+    assert_matrix_equal(forward.corr(), backward.corr())
+    assert_matrix_equal(forward.cov(), data.cov())
+
+
+def test_cube_matches_pandas_by_mill_and_month(mill_data):
+    data = mill_data()
+    cube = CovarianceCube.build(data, VARIABLES)
+
+    assert_matrix_equal(cube.corr(VARIABLES), data[VARIABLES].corr())
+    by_mill = cube.corr(VARIABLES, by_mill=True)
+    for mill, rows in data.groupby('molino_id'):
+        assert_matrix_equal(by_mill.loc[mill], rows[VARIABLES].corr())
+
+    months = data['timestamp'].dt.strftime('%Y-%m')
+    selected = data[data['molino_id'].isin(['M1', 'M3']) & months.between('2023-02', '2023-03')]
+    assert_matrix_equal(cube.cov(VARIABLES, molinos=['M1', 'M3'], start='2023-02', end='2023-03'),
+                        selected[VARIABLES].cov())
+
+
+def test_update_and_parquet_match_build(mill_data, tmp_path, partitioned):
+    data = mill_data()
+    cutoffs = data['molino_id'].map({'M1': '2023-02-10 00:00', 'M2': '2023-02-20 13:00', 'M3': '2023-01-31 00:00'})
+    first = data[data['timestamp'] < pd.to_datetime(cutoffs)]
+
+    cube = CovarianceCube.load(CovarianceCube.build(first, VARIABLES).save(tmp_path / 'cube'))
+    assert cube.update(data) == len(data) - len(first)
+    expected = CovarianceCube.build(data, VARIABLES)
+    assert_matrix_equal(cube.corr(by_mill=True), expected.corr(by_mill=True))
+
+    data.to_parquet(tmp_path / 'data.parquet', row_group_size=1000)
+    streamed = covariance_parquet(tmp_path / 'data.parquet', VARIABLES, n_workers=1)
+    assert_matrix_equal(streamed.cov(), expected.cov())
+    assert set(streamed.partitions) == set(expected.partitions)
+
+    by_partition = covariance_parquet(partitioned(data), VARIABLES, n_workers=1)
+    assert_matrix_equal(by_partition.corr(by_mill=True), expected.corr(by_mill=True))
+    assert set(by_partition.partitions) == set(expected.partitions)
+
+
+def test_molinos_covariance_updates_or_rebuilds(project, mill_data, monkeypatch, capsys):
+    import utils
+
+    def assert_same_as_build(cube):
+        expected = CovarianceCube.build(cached_data(source.name))
+        assert_matrix_equal(cube.corr(by_mill=True), expected.corr(by_mill=True))
+
+    source = project / 'data' / 'molinos_mineraperu_dataset.parquet'
+    data = mill_data(mills=('M1', 'M2', 'M3', 'M4'))
+    data[(data['timestamp'] < '2023-02-15') & (data['molino_id'] != 'M4')].to_parquet(source)
+    molinos_covariance()
+
+    data.to_parquet(source)
+    with monkeypatch.context() as patch:
+        patch.setattr(utils, 'cached_data', lambda *args, **kwargs: pytest.fail("lectura completa"))
+        cube = molinos_covariance()
+    assert 'actualizado' in capsys.readouterr().out
+    assert_same_as_build(cube)
+
+    data.loc[(data['timestamp'] == '2023-03-10 05:00') & (data['molino_id'] == 'M2'), 'potencia_motor'] += 500
+    data.to_parquet(source)
+    cube = molinos_covariance()
+    assert 'reconstruye' in capsys.readouterr().out
+    assert_same_as_build(cube)
+
+    # Filas borradas de un mes antiguo: el total de filas ya no coincide
+    data.drop(index=range(30, 60)).to_parquet(source)
+    cube = molinos_covariance()
+    assert 'reconstruye' in capsys.readouterr().out
+    assert_same_as_build(cube)
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from generar_datos_sinteticos_chancadoras_2anios import (FAILURE_COLUMNS, attach_failure_columns,
+                                                         generate_crusher_data)
+
+KEYS = ['chancadora_id', 'timestamp']
+
+
+@pytest.fixture(scope='module')
+def crushers():
+    return generate_crusher_data(num_chancadoras=3, start_date='2023-01-01', end_date='2023-04-01',
+                                 freq='h', seed=5, failure_columns='none', return_events=True)
+
+
+def merged_reference(df, eventos):
+    """Columnas de falla con joins de pandas sobre (chancadora_id, timestamp)"""
+    alert_columns = ['tipo_falla', 'modo_falla', 'componente_falla', 'severidad_falla']
+    alertas = df[KEYS].merge(eventos[KEYS + alert_columns], on=KEYS, how='left', validate='one_to_one')
+
+    # Varias alertas pueden confirmar en el mismo registro: prevalece la última
+    fallas = (eventos.drop_duplicates(['chancadora_id', 'timestamp_falla'], keep='last')
+              .drop(columns='timestamp').rename(columns={'timestamp_falla': 'timestamp', 'componente_falla': 'componente_falla_confirmado'})
+              [KEYS + ['componente_falla_confirmado', 'sistema_afectado']])
+    confirmadas = df[KEYS].merge(fallas.assign(falla_ocurrida=1), on=KEYS, how='left', validate='one_to_one')
+
+    reference = pd.concat([alertas[alert_columns], confirmadas.drop(columns=KEYS)], axis=1)
+    reference['severidad_falla'] = reference['severidad_falla'].astype('Int8')
+    reference['falla_ocurrida'] = reference['falla_ocurrida'].fillna(0).astype(np.int8)
+    return reference[FAILURE_COLUMNS]
+
+
+def dense(frame):
+    """Columnas dispersas como en el modo categórico (Int8 con faltantes, int8)"""
+    frame = frame.copy()
+    frame['severidad_falla'] = frame['severidad_falla'].sparse.to_dense().astype('Int8')
+    frame['falla_ocurrida'] = frame['falla_ocurrida'].sparse.to_dense().astype(np.int8)
+    return frame
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_attach_matches_join(crushers, sparse):
+    df, eventos = crushers
+    attached = attach_failure_columns(df, eventos, sparse=sparse)
+
+    assert len(eventos) > 50 and eventos.duplicated(['chancadora_id', 'timestamp_falla']).any()
+    pd.testing.assert_frame_equal(attached[df.columns], df)
+    inline = dense(attached[FAILURE_COLUMNS]) if sparse else attached[FAILURE_COLUMNS]
+    pd.testing.assert_frame_equal(inline, merged_reference(df, eventos), check_categorical=True)
+
+
+@pytest.mark.parametrize('mode', ['categorical', 'sparse'])
+def test_inline_modes_equal_side_table_join(crushers, mode):
+    df, eventos = crushers
+    inline = generate_crusher_data(num_chancadoras=3, start_date='2023-01-01', end_date='2023-04-01',
+                                   freq='h', seed=5, failure_columns=mode)
+
+    pd.testing.assert_frame_equal(inline, attach_failure_columns(df, eventos, sparse=mode == 'sparse'))
+    if mode == 'sparse':
+        assert isinstance(inline['falla_ocurrida'].dtype, pd.SparseDtype)
+    else:
+        assert (inline['severidad_falla'].notna() == inline['falla_en_7d'].astype(bool)).all()
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from maquina_bolas_data_generator import DegradationModels
+
+PATTERNS = ['bearing_outer_race', 'liner_wear', 'motor_electrical']  # exponential, linear, sudden
+
+
+class ExpectedValueRng:
+    """Generador sin ruido: uniform devuelve el punto medio y normal la media"""
+
+    @staticmethod
+    def uniform(low, high, size=None):
+        return np.full(size, (low + high) / 2) if size is not None else (low + high) / 2
+
+    @staticmethod
+    def normal(loc, scale, size=None):
+        return np.full(size, float(loc)) if size is not None else float(loc)
+
+
+@pytest.fixture
+def models():
+    return DegradationModels()
+
+
+@pytest.mark.parametrize('failure_type', PATTERNS)
+def test_batch_matches_scalar_without_noise(models, failure_type):
+    hours = np.arange(0, 24 * 200, 7.0)
+    base = np.linspace(2.0, 4.0, len(hours))
+
+    scalar = np.array([models.generate_bearing_degradation(b, h, failure_type, rng=ExpectedValueRng())
+                       for b, h in zip(base, hours)])
+    signal_h, signal_v = models.generate_bearing_degradation_batch(base, hours, failure_type,
+                                                                   rng=ExpectedValueRng())
+
+    np.testing.assert_allclose(signal_h, scalar, rtol=1e-12)
+    np.testing.assert_allclose(signal_v, scalar * 0.98, rtol=1e-12)
+    assert scalar.max() > base.max()  # la ventana incluye la fase de degradación
+
+
+@pytest.mark.parametrize('failure_type', PATTERNS)
+def test_batch_matches_scalar_distribution(models, failure_type):
+    grid = np.arange(0, 24 * 200, 24.0)
+    repeats = 1000
+    hours = np.tile(grid, repeats)
+    base = np.full(len(hours), 3.0)
+
+    rng = np.random.default_rng(0)
+    scalar = np.array([models.generate_bearing_degradation(3.0, h, failure_type, rng=rng) for h in hours])
+    signal_h, _ = models.generate_bearing_degradation_batch(base, hours, failure_type,
+                                                            rng=np.random.default_rng(1))
+
+    # Media y desviación por horizonte: precursores e intensidad sorteados igual
+    scalar, signal_h = scalar.reshape(repeats, -1), signal_h.reshape(repeats, -1)
+    np.testing.assert_allclose(signal_h.mean(axis=0), scalar.mean(axis=0), rtol=0.03)
+    np.testing.assert_allclose(signal_h.std(axis=0), scalar.std(axis=0), rtol=0.15, atol=0.02)
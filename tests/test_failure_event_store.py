@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from failure_event_store import FailureEventStore
+
+
+@pytest.fixture
+def events():
+    rng = np.random.default_rng(0)
+    n = 60
+    return pd.DataFrame({
+        'mill_id': rng.choice(['M1', 'M2', 'M3'], n),
+        'failure_time': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.choice(24 * 365, n, replace=False), unit='h'),
+        'failure_type': pd.Categorical(rng.choice(['bearing_feed', 'liner_wear'], n)),
+        'severity': rng.integers(1, 4, n).astype('int8'),
+        'downtime_hours': rng.uniform(4, 168, n).astype('float32'),
+    })
+
+
+@pytest.fixture
+def queries(events):
+    rng = np.random.default_rng(1)
+    n = 500
+    mills = rng.choice(['M1', 'M2', 'M3', 'M9'], n)  # M9 no tiene eventos
+    times = pd.Timestamp('2022-12-01') + pd.to_timedelta(rng.integers(0, 24 * 400, n), unit='h')
+    # Algunas consultas caen exactamente sobre un evento de su molino
+    exact = rng.choice(len(events), 50)
+    mills[:50] = events['mill_id'].to_numpy()[exact]
+    times = times.to_numpy()
+    times[:50] = events['failure_time'].to_numpy()[exact]
+    return pd.Series(mills), pd.Series(times)
+
+
+def brute_force(events, mill, ts, direction, inclusive):
+    """Evento más cercano del molino en la dirección pedida, recorriendo la tabla"""
+    own = events[events['mill_id'] == mill]
+    if direction == 'next':
+        mask = own['failure_time'] >= ts if inclusive else own['failure_time'] > ts
+        return own.loc[mask, 'failure_time'].min()
+    mask = own['failure_time'] <= ts if inclusive else own['failure_time'] < ts
+    return own.loc[mask, 'failure_time'].max()
+
+
+@pytest.mark.parametrize('inclusive', [False, True])
+def test_next_and_previous_match_brute_force(events, queries, inclusive):
+    store = FailureEventStore(events)
+    mills, times = queries
+
+    found_next = store.next_failure(mills, times, inclusive=inclusive)
+    found_prev = store.previous_failure(mills, times, inclusive=inclusive)
+
+    for i, (mill, ts) in enumerate(zip(mills, times)):
+        expected_next = brute_force(events, mill, ts, 'next', inclusive)
+        expected_prev = brute_force(events, mill, ts, 'previous', inclusive)
+        for found, expected in ((found_next, expected_next), (found_prev, expected_prev)):
+            assert pd.isna(found['failure_time'][i]) == pd.isna(expected)
+            if not pd.isna(expected):
+                assert found['failure_time'][i] == expected
+
+    hours = (found_next['failure_time'] - times) / pd.Timedelta(hours=1)
+    np.testing.assert_allclose(found_next['horas_hasta_falla'], hours)
+
+
+def test_event_columns_follow_matched_event(events, queries):
+    store = FailureEventStore(events)
+    mills, times = queries
+
+    matched = store.previous_failure(mills, times)
+    found = matched['failure_time'].notna().to_numpy()
+    expected = events.set_index('failure_time').loc[matched.loc[found, 'failure_time']]
+
+    assert (expected['mill_id'].to_numpy() == mills[found].to_numpy()).all()
+    assert (matched.loc[found, 'severity'].to_numpy() == expected['severity'].to_numpy()).all()
+    assert (matched.loc[found, 'failure_type'].astype(str).to_numpy()
+            == expected['failure_type'].astype(str).to_numpy()).all()
+    np.testing.assert_allclose(matched.loc[found, 'downtime_hours'], expected['downtime_hours'], rtol=1e-6)
+
+
+def test_events_in_window_and_roundtrip(events, tmp_path):
+    store = FailureEventStore(events)
+    start, end = '2023-03-01', '2023-07-15'
+
+    window = store.events_in_window(start, end, mill_ids=['M2', 'M3', 'M9'])
+    mask = (events['mill_id'].isin(['M2', 'M3']) & (events['failure_time'] >= start)
+            & (events['failure_time'] < end))
+    expected = events[mask].sort_values(['mill_id', 'failure_time'], kind='stable')
+    assert list(window['failure_time']) == list(expected['failure_time'])
+    assert list(window['mill_id'].astype(str)) == list(expected['mill_id'])
+
+    loaded = FailureEventStore.load(store.save(tmp_path / 'events.parquet'))
+    pd.testing.assert_frame_equal(loaded.events, store.events)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from maquina_bolas_data_generator import FailureLabelEngine
+
+
+def brute_force_labels(timestamps, failures, horizons, window=30, no_failure=365.0):
+    """Próxima falla de cada registro recorriendo todas las fallas"""
+    rows = []
+    for ts in timestamps:
+        ahead = [(f.failure_time - ts) / pd.Timedelta(days=1) for f in failures.itertuples()]
+        candidates = [(days, f) for days, f in zip(ahead, failures.itertuples()) if days > 0]
+        days, nearest = min(candidates, key=lambda item: item[0]) if candidates else (np.inf, None)
+        row = {f'falla_en_{h}d': days <= h for h in horizons}
+        row['tipo_falla'] = nearest.failure_type if days <= window else 'normal'
+        row['severidad_falla'] = nearest.severity if days <= window else 0
+        row['dias_hasta_falla'] = days if nearest is not None else no_failure
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def test_labels_match_brute_force():
+    rng = np.random.default_rng(0)
+    timestamps = pd.Series(pd.date_range('2023-01-01', periods=24 * 120, freq='h'))
+    # Fallas desordenadas, una exactamente sobre un registro y otra al final del período
+    failure_times = pd.to_datetime(['2023-03-10 05:00', '2023-01-20 13:30', '2023-02-02 00:00',
+                                    '2023-04-29 23:00', '2023-02-05 07:15'])
+    failures = pd.DataFrame({
+        'failure_time': failure_times,
+        'failure_type': rng.choice(['bearing_feed', 'liner_wear', 'lubrication'], len(failure_times)),
+        'severity': rng.integers(1, 4, len(failure_times)),
+    })
+    horizons = (1, 7, 14, 30)
+
+    labels = FailureLabelEngine(horizons_days=horizons).label(timestamps, failures)
+    expected = brute_force_labels(timestamps, failures, horizons)
+
+    assert list(labels.columns) == FailureLabelEngine(horizons_days=horizons).target_columns()
+    for col in expected.columns:
+        if col == 'dias_hasta_falla':
+            np.testing.assert_allclose(labels[col].to_numpy(), expected[col].to_numpy())
+        else:
+            assert (labels[col].to_numpy() == expected[col].to_numpy()).all(), col
+
+
+def test_labels_without_failures():
+    timestamps = pd.Series(pd.date_range('2023-01-01', periods=48, freq='h'))
+    failures = pd.DataFrame({'failure_time': pd.to_datetime([]), 'failure_type': [], 'severity': []})
+
+    labels = FailureLabelEngine().label(timestamps, failures)
+
+    assert not labels[['falla_en_7d', 'falla_en_14d', 'falla_en_30d']].any().any()
+    assert (labels['tipo_falla'] == 'normal').all()
+    assert (labels['dias_hasta_falla'] == 365.0).all()
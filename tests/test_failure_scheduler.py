@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from failure_event_store import FailureEventStore
+from maquina_bolas_data_generator import FailureScheduler
+
+START, END = pd.Timestamp('2023-01-01'), pd.Timestamp('2025-07-01')
+
+
+def configs(n_mills, condition=None):
+    profiles = [(0.85, 'bearings'), (0.92, 'normal'), (0.78, 'liners'), (0.82, 'lubrication')]
+    return {f'M{i + 1}': {'condition': condition or profiles[i % 4][0], 'failure_tendency': profiles[i % 4][1]}
+            for i in range(n_mills)}
+
+
+def test_events_table_schema_and_order():
+    scheduler = FailureScheduler()
+    events = scheduler.schedule(configs(6), START, END, np.random.default_rng(0))
+
+    assert list(events.columns) == FailureScheduler.EVENT_COLUMNS
+    assert list(events['mill_id'].cat.categories) == list(configs(6))
+    assert list(events['failure_type'].cat.categories) == list(FailureScheduler.FAILURE_TYPE_PROBS)
+    assert events['failure_time'].dtype == 'datetime64[ns]'
+    assert events['severity'].dtype == 'int8' and events['severity'].between(1, 3).all()
+    assert events['downtime_hours'].dtype == 'float32'
+    assert events['downtime_hours'].between(4, 168).all()
+    assert events['failure_time'].between(START, END, inclusive='left').all()
+
+    # Orden (molino, tiempo) y tramos por molino consistentes con split_by_mill
+    codes = events['mill_id'].cat.codes.to_numpy()
+    assert (np.diff(codes) >= 0).all()
+    for mill, own in FailureScheduler.split_by_mill(events).items():
+        assert own['failure_time'].is_monotonic_increasing
+        assert (own['mill_id'] == mill).all()
+    # La tabla se puede indexar directamente en el store de eventos
+    assert len(FailureEventStore(events)) == len(events)
+
+
+def test_same_seed_same_events():
+    scheduler = FailureScheduler()
+    first = scheduler.schedule(configs(6), START, END, np.random.default_rng(42))
+    again = scheduler.schedule(configs(6), START, END, np.random.default_rng(42))
+    other = scheduler.schedule(configs(6), START, END, np.random.default_rng(43))
+
+    pd.testing.assert_frame_equal(first, again)
+    assert not first.equals(other)
+
+
+def test_inter_arrival_times_follow_weibull_plus_recovery():
+    scheduler = FailureScheduler(base_mtbf_hours=4380, recovery_days=(7, 30), weibull_shape=2.0)
+    # Horizonte largo: la censura al final del período es despreciable
+    events = scheduler.schedule(configs(400, condition=1.0), START, START + pd.Timedelta(days=365 * 20),
+                                np.random.default_rng(0))
+    hours = (events['failure_time'] - START) / pd.Timedelta(hours=1)
+    first = hours.groupby(events['mill_id'], observed=True).min()
+    gaps = hours.groupby(events['mill_id'], observed=True).diff().dropna()
+
+    # Primera falla: Weibull(k=2, escala=MTBF); siguientes: Weibull + recuperación uniforme
+    assert stats.kstest(first / 4380, stats.weibull_min(2.0).cdf).pvalue > 0.01
+    reference = (np.random.default_rng(1).weibull(2.0, 200_000) * 4380
+                 + np.random.default_rng(2).uniform(7, 30, 200_000) * 24)
+    assert stats.ks_2samp(gaps, reference).pvalue > 0.01
+    assert gaps.mean() == pytest.approx(4380 * 0.8862 + 18.5 * 24, rel=0.02)
+
+
+@pytest.mark.parametrize('tendency, failure_type', [('bearings', 'bearing_feed'), ('liners', 'liner_wear')])
+def test_failure_tendency_raises_type_share(tendency, failure_type):
+    scheduler = FailureScheduler()
+    mill_configs = {'A': {'condition': 1.0, 'failure_tendency': tendency},
+                    'B': {'condition': 1.0, 'failure_tendency': 'normal'}}
+    events = scheduler.schedule(mill_configs, START, START + pd.Timedelta(days=365 * 200), np.random.default_rng(0))
+
+    share = (events['failure_type'] == failure_type).groupby(events['mill_id'], observed=True).mean()
+    probs = scheduler.type_probabilities(mill_configs)[:, scheduler.failure_types.index(failure_type)]
+    np.testing.assert_allclose(share[['A', 'B']], probs, atol=0.03)
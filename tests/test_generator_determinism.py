@@ -0,0 +1,20 @@
+import pandas as pd
+
+from maquina_bolas_data_generator import RealisticMillDataGenerator
+
+
+def generate(n_workers, seed=7):
+    generator = RealisticMillDataGenerator(duration_years=0.5, n_mills=3, seed=seed, verbose=False)
+    return generator.generate_complete_dataset(n_workers=n_workers)
+
+
+def test_same_dataset_for_any_worker_count():
+    sequential = generate(n_workers=1)
+    parallel = generate(n_workers=2)
+
+    assert sequential['falla_en_30d'].any()
+    pd.testing.assert_frame_equal(sequential, parallel)
+
+
+def test_seed_changes_dataset():
+    assert not generate(n_workers=1).equals(generate(n_workers=1, seed=8))
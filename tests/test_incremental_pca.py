@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+
+from incremental_pca import StreamingPCA, molinos_pca
+
+VARIABLES = ['feed_rate', 'potencia_motor', 'temp_cojinete_feed']
+
+
+def reference_pca(data, n_components):
+    complete = data[VARIABLES].dropna()
+    scaler = StandardScaler().fit(complete)
+    pca = PCA(n_components=n_components).fit(scaler.transform(complete))
+    return scaler, pca
+
+
+@pytest.mark.parametrize('n_components', [None, 2])
+def test_matches_sklearn(mill_data, tmp_path, n_components):
+    data = mill_data()
+    scaler, reference = reference_pca(data, n_components)
+    data.to_parquet(tmp_path / 'data.parquet')
+
+    for source in (data, tmp_path / 'data.parquet'):
+        model = StreamingPCA(VARIABLES, n_components).fit(source, batch_size=700)
+
+        np.testing.assert_allclose(model.mean_, scaler.mean_)
+        np.testing.assert_allclose(model.scale_, scaler.scale_)
+        np.testing.assert_allclose(model.explained_variance_ratio_, reference.explained_variance_ratio_)
+        np.testing.assert_allclose(model.explained_variance_, reference.explained_variance_)
+        # Las componentes coinciden salvo el signo
+        signs = np.sign((model.components_ * reference.components_).sum(axis=1))
+        np.testing.assert_allclose(model.components_ * signs[:, None], reference.components_, atol=1e-9)
+
+        complete = data[VARIABLES].dropna()
+        np.testing.assert_allclose(model.transform(complete) * signs,
+                                   reference.transform(scaler.transform(complete)), atol=1e-9)
+
+
+def test_save_load_roundtrip(mill_data, tmp_path):
+    data = mill_data()
+    model = StreamingPCA(VARIABLES, 2).fit(data)
+
+    loaded = StreamingPCA.load(model.save(tmp_path / 'pca'))
+
+    np.testing.assert_allclose(loaded.transform(data), model.transform(data))
+    np.testing.assert_allclose(loaded.explained_variance_, model.explained_variance_)
+
+
+def test_molinos_pca_refits_when_dataset_changes(project, mill_data, capsys):
+    source = project / 'data' / 'molinos_mineraperu_dataset.parquet'
+    data = mill_data()
+    data.to_parquet(source)
+    first = molinos_pca(VARIABLES)
+    assert molinos_pca(VARIABLES).source_sha256 == first.source_sha256
+    capsys.readouterr()
+
+    data['feed_rate'] *= 1.5
+    data.to_parquet(source)
+    stale = molinos_pca(VARIABLES, reuse_stale=True)
+    assert stale.source_sha256 == first.source_sha256
+    assert 'reuse_stale' in capsys.readouterr().out
+
+    refit = molinos_pca(VARIABLES)
+    assert refit.source_sha256 != first.source_sha256
+    np.testing.assert_allclose(refit.mean_, data[VARIABLES].dropna().mean())
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from outliers import KLLSketch, OutlierSketch, detect_outliers, sketch_parquet
+
+
+def clipped(n, seed=0):
+    """Variable recortada con masa apilada en ambos extremos (como nivel_carga_bolas)"""
+    return np.clip(np.random.default_rng(seed).normal(30, 1.5, n), 28, 33)
+
+
+def test_single_large_update_keeps_accuracy():
+    values = clipped(1_000_000)
+    sketch = KLLSketch(k=200, seed=0).update(values)
+
+    assert sketch.size > 2 * sketch.k
+    q1, q3 = np.quantile(values, [0.25, 0.75])
+    np.testing.assert_allclose(sketch.quantile([0.25, 0.75]), [q1, q3], atol=0.02)
+    threshold = 31.5
+    assert abs(sketch.count_above(threshold) - (values > threshold).sum()) < 0.01 * len(values)
+
+
+def test_clip_bounds_are_exact_and_strict():
+    values = clipped(300_000)
+    sketch = KLLSketch(k=200, seed=0).update(values[:100_000])
+    sketch.merge(KLLSketch(k=200, seed=1).update(values[100_000:]))
+
+    assert (sketch.n_min, sketch.n_max) == ((values == 28).sum(), (values == 33).sum())
+    # Los valores iguales a la cota no cuentan como outliers
+    assert sketch.count_below(28.0) == 0 and sketch.count_above(33.0) == 0
+    np.testing.assert_allclose(sketch.count_below(28.0 + 1e-9), (values == 28).sum(), atol=1)
+    np.testing.assert_allclose(sketch.count_above(33.0 - 1e-9), (values == 33).sum(), atol=1)
+
+
+def test_summary_matches_detect_outliers(mill_data):
+    data = mill_data(hours=24 * 200)
+    # Variable recortada con la cota inferior del IQR muy cerca del valor de recorte
+    data['nivel_carga_bolas'] = clipped(len(data), seed=3)
+    columns = ['feed_rate', 'potencia_motor', 'nivel_carga_bolas']
+
+    expected = detect_outliers(data, columns, by='molino_id')
+    result = OutlierSketch(columns, seed=0).update(data).summary(per_group=True)
+
+    expected = expected.loc[result.index]
+    for col in ['lower_bound', 'upper_bound']:
+        assert (np.abs(result[col] - expected[col]) <= 0.05 * expected['iqr']).all()
+    # Error de rango del sketch: medio punto porcentual de las filas de cada molino
+    assert (np.abs(result['percentage'] - expected['percentage']) <= 0.5).all()
+    assert (result.loc[(slice(None), 'nivel_carga_bolas'), 'count'] == 0).all()
+
+
+def test_sketch_parquet_reads_partitions_by_mill(mill_data, partitioned):
+    data = mill_data(hours=24 * 70)
+    columns = ['feed_rate', 'potencia_motor']
+
+    expected = detect_outliers(data, columns, by='molino_id')
+    result = sketch_parquet(partitioned(data), columns, n_workers=1).summary(per_group=True)
+
+    assert set(result.index.get_level_values(0)) == {'M1', 'M2', 'M3'}
+    expected = expected.loc[result.index]
+    for col in ['lower_bound', 'upper_bound']:
+        assert (np.abs(result[col] - expected[col]) <= 0.05 * expected['iqr']).all()
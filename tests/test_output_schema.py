@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from maquina_bolas_data_generator import (OUTPUT_SCHEMA, RealisticMillDataGenerator, apply_output_schema,
+                                          load_and_explore_dataset)
+
+
+@pytest.fixture(scope='module')
+def generated():
+    generator = RealisticMillDataGenerator(duration_years=0.25, n_mills=2, seed=3, verbose=False)
+    return generator, generator.generate_complete_dataset(n_workers=1)
+
+
+def test_schema_dtypes(generated):
+    _, dataset = generated
+    compact = apply_output_schema(dataset)
+    dtypes = compact.dtypes
+
+    for col, dtype in OUTPUT_SCHEMA.items():
+        assert dtypes[col] == dtype, col
+    assert compact['turno'].cat.ordered
+    targets = [col for col in compact.columns if col.startswith('falla_en_')]
+    assert targets and (dtypes[targets] == bool).all()
+    sensors = [col for col in compact.columns if col not in OUTPUT_SCHEMA and col not in targets]
+    assert sensors and (dtypes[sensors] == 'float32').all()
+
+
+def test_schema_rejects_undeclared_text_column(generated):
+    _, dataset = generated
+    with pytest.raises(TypeError, match='notas'):
+        apply_output_schema(dataset.assign(notas='x'))
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'feather', 'csv'])
+def test_save_and_load_keep_schema(generated, tmp_path, fmt):
+    generator, dataset = generated
+    path = generator.save_dataset(dataset, str(tmp_path / f'molinos.{fmt}'))
+
+    loaded = load_and_explore_dataset(path)
+    pd.testing.assert_frame_equal(loaded, apply_output_schema(dataset))
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from predictor_screening import screen_predictors
+
+FEATURES = ['feed_rate', 'potencia_motor', 'temp_cojinete_feed', 'vibracion']
+TARGETS = ['falla_en_7d', 'falla_en_30d']
+
+
+@pytest.fixture
+def screening_data(mill_data):
+    data = mill_data(hours=24 * 20)
+    rng = np.random.default_rng(5)
+    # Valores redondeados (muchos empates), con faltantes y desplazados en las filas con falla
+    data['falla_en_30d'] = data['falla_en_7d'] | (rng.random(len(data)) < 0.2)
+    data['vibracion'] = np.round(rng.normal(2, 0.5, len(data)) + 0.3 * data['falla_en_30d'], 1)
+    data.loc[rng.random(len(data)) < 0.03, 'vibracion'] = np.nan
+    data['feed_rate'] = np.round(data['feed_rate'])
+    return data
+
+
+def test_matches_scipy_per_mill_and_target(screening_data):
+    result = screen_predictors(screening_data, FEATURES, TARGETS, by='molino_id', n_workers=1)
+
+    for (mill, target, feature), row in result.iterrows():
+        rows = screening_data[screening_data['molino_id'] == mill]
+        x = rows[feature].to_numpy(dtype=float)
+        label = rows[target].to_numpy(dtype=bool)
+        with_failure, no_failure = x[label & ~np.isnan(x)], x[~label & ~np.isnan(x)]
+
+        mw = stats.mannwhitneyu(with_failure, no_failure, alternative='two-sided', method='asymptotic',
+                                use_continuity=True)
+        welch = stats.ttest_ind(with_failure, no_failure, equal_var=False)
+        assert (row['n_failure'], row['n_no_failure']) == (len(with_failure), len(no_failure))
+        np.testing.assert_allclose(row['auc'], mw.statistic / (len(with_failure) * len(no_failure)))
+        np.testing.assert_allclose(row['p_value'], mw.pvalue, rtol=1e-9)
+        np.testing.assert_allclose(row['t_statistic'], welch.statistic, rtol=1e-9)
+        np.testing.assert_allclose(row['welch_df'], welch.df, rtol=1e-9)
+        np.testing.assert_allclose(row['p_value_welch'], welch.pvalue, rtol=1e-9)
+        np.testing.assert_allclose(row['mean_with_failure'], with_failure.mean())
+        np.testing.assert_allclose(row['std_no_failure'], no_failure.std(ddof=1))
+
+
+def test_fleet_matches_scipy(screening_data):
+    result = screen_predictors(screening_data, FEATURES, TARGETS)
+
+    x = screening_data['vibracion'].to_numpy()
+    label = screening_data['falla_en_30d'].to_numpy()
+    mw = stats.mannwhitneyu(x[label & ~np.isnan(x)], x[~label & ~np.isnan(x)], method='asymptotic')
+    np.testing.assert_allclose(result.loc[('falla_en_30d', 'vibracion'), 'p_value'], mw.pvalue, rtol=1e-9)
+    assert result.loc[('falla_en_30d', 'vibracion'), 'significant']
+
+
+def test_same_result_for_any_worker_count(screening_data):
+    sequential = screen_predictors(screening_data, FEATURES, TARGETS, by='molino_id', n_workers=1)
+    parallel = screen_predictors(screening_data, FEATURES, TARGETS, by='molino_id', n_workers=2,
+                                 groups_per_task=1)
+
+    pd.testing.assert_frame_equal(sequential, parallel)
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rollups import LEVELS, RollupCube, _level_keys, molinos_rollups
+from utils import cached_data
+
+VARIABLES = ['feed_rate', 'potencia_motor', 'temp_cojinete_feed', 'falla_en_7d']
+STATS = ['count', 'sum', 'mean', 'std', 'min', 'max']
+
+
+def assert_same_cube(cube, expected):
+    for level in LEVELS:
+        for by_mill in (True, False):
+            pd.testing.assert_frame_equal(cube.query(VARIABLES, level=level, stats=STATS, by_mill=by_mill),
+                                          expected.query(VARIABLES, level=level, stats=STATS, by_mill=by_mill))
+
+
+@pytest.mark.parametrize('level', LEVELS)
+def test_query_matches_groupby(mill_data, level):
+    data = mill_data()
+    cube = RollupCube.build(data, VARIABLES)
+
+    keys = _level_keys(data, level).rename('clave')
+    values = data[VARIABLES].astype(float)
+    by_mill = values.groupby([data['molino_id'].rename('molino_id'), keys]).agg(STATS)
+    fleet = values.groupby(keys).agg(STATS)
+
+    result = cube.query(VARIABLES, level=level, stats=STATS)
+    np.testing.assert_allclose(result.to_numpy(), by_mill[result.columns].to_numpy(), rtol=1e-9)
+    result = cube.query(VARIABLES, level=level, stats=STATS, by_mill=False)
+    np.testing.assert_allclose(result.to_numpy(), fleet[result.columns].to_numpy(), rtol=1e-9)
+
+
+def test_update_matches_rebuild(mill_data, tmp_path):
+    data = mill_data()
+    # Cortes distintos por molino: cada uno llega hasta una hora diferente
+    cutoffs = data['molino_id'].map({'M1': '2023-02-10 00:00', 'M2': '2023-02-20 13:00', 'M3': '2023-01-31 00:00'})
+    first = data[data['timestamp'] < pd.to_datetime(cutoffs)]
+
+    cube = RollupCube.build(first, VARIABLES)
+    cube = RollupCube.load(cube.save(tmp_path / 'cube'))
+    added = cube.update(data)
+
+    assert added == len(data) - len(first)
+    assert cube.update(data) == 0
+    assert_same_cube(cube, RollupCube.build(data, VARIABLES))
+
+
+def test_molinos_rollups_updates_or_rebuilds(project, mill_data, monkeypatch, capsys):
+    import utils
+
+    source = project / 'data' / 'molinos_mineraperu_dataset.parquet'
+    data = mill_data(mills=('M1', 'M2', 'M3', 'M4'))
+    data[(data['timestamp'] < '2023-02-15') & (data['molino_id'] != 'M4')].to_parquet(source)
+    molinos_rollups()
+
+    # Llegan horas nuevas (y un molino nuevo): se leen solo las filas recientes
+    data.to_parquet(source)
+    with monkeypatch.context() as patch:
+        patch.setattr(utils, 'cached_data', lambda *args, **kwargs: pytest.fail("lectura completa"))
+        cube = molinos_rollups()
+    assert 'actualizado' in capsys.readouterr().out
+    assert_same_cube(cube, RollupCube.build(cached_data(source.name)))
+
+    # Cambia una hora ya agregada del mes frontera: se reconstruye
+    data.loc[(data['timestamp'] == '2023-03-10 05:00') & (data['molino_id'] == 'M2'), 'feed_rate'] += 50
+    data.to_parquet(source)
+    cube = molinos_rollups()
+    assert 'reconstruye' in capsys.readouterr().out
+    assert_same_cube(cube, RollupCube.build(cached_data(source.name)))
+
+    # Dataset regenerado con otra semilla y más horas: se reconstruye
+    mill_data(hours=24 * 80, mills=('M1', 'M2', 'M3', 'M4'), seed=1).to_parquet(source)
+    cube = molinos_rollups()
+    assert 'reconstruye' in capsys.readouterr().out
+    assert_same_cube(cube, RollupCube.build(cached_data(source.name)))
+    assert molinos_rollups().source_sha256 == cube.source_sha256
+
+
+def test_update_with_chunk_starting_mid_day(mill_data):
+    data = mill_data()
+    data['turno'] = data['turno'].astype(str)
+    # El bloque nuevo empieza en el turno C: sus códigos no pueden depender de los turnos presentes
+    first = data[data['timestamp'] < '2023-02-01 16:00']
+    only_c = data[(data['timestamp'] >= '2023-02-01 16:00') & (data['timestamp'] < '2023-02-02 00:00')]
+
+    cube = RollupCube.build(first, VARIABLES)
+    assert cube.update(only_c) == len(only_c)
+
+    counts = cube.query(['feed_rate'], level='shift', stats='count', by_mill=False)['feed_rate']
+    assert counts[pd.Timestamp('2023-02-01 16:00')] == len(only_c)
+    assert pd.Timestamp('2023-02-02 00:00') not in counts.index
+    assert_same_cube(cube, RollupCube.build(pd.concat([first, only_c]), VARIABLES))
@@ -0,0 +1,117 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from maquina_bolas_data_generator import ANOMALY_FEATURES, TREND_FEATURES
+from online_anomaly import OnlineAnomalyScorer
+from scoring_service import MODEL_FEATURES, FleetFeatureState, LatencyHistogram, RiskScoringService
+
+MILLS = ['M1', 'M2', 'M3']
+
+
+@pytest.fixture
+def sensor_frame():
+    """Registros horarios de 3 molinos con todas las señales de entrada del servicio (con faltantes)"""
+    rng = np.random.default_rng(0)
+    hours = 300
+    frame = pd.DataFrame({
+        'timestamp': np.repeat(pd.date_range('2023-01-01', periods=hours, freq='h'), len(MILLS)),
+        'molino_id': np.tile(MILLS, hours),
+    })
+    signals = {source for _, source, _, _ in TREND_FEATURES}
+    signals |= {source for _, sources in ANOMALY_FEATURES for source in sources}
+    signals |= set(MODEL_FEATURES) - {feature for feature, *_ in TREND_FEATURES} \
+        - {feature for feature, _ in ANOMALY_FEATURES}
+    for col in sorted(signals):
+        values = rng.normal(10, 2, len(frame))
+        values[rng.random(len(frame)) < 0.05] = np.nan
+        frame[col] = values
+    return frame
+
+
+def reference_features(frame):
+    """Tendencias con rolling de pandas y scores con OnlineAnomalyScorer('cumulative')"""
+    expected = pd.DataFrame(index=frame.index)
+    grouped = frame.groupby('molino_id')
+    for feature, source, window, min_periods in TREND_FEATURES:
+        expected[feature] = grouped[source].transform(lambda s: s.rolling(window, min_periods=min_periods).mean())
+    for feature, sources in ANOMALY_FEATURES:
+        scorer = OnlineAnomalyScorer('cumulative')
+        composite = frame[sources].to_numpy(dtype=float).mean(axis=1)  # como el generador: NaN si falta una señal
+        expected[feature] = [scorer.update(mill, value) for mill, value in zip(frame['molino_id'], composite)]
+    return expected
+
+
+class RecordingModel:
+    """Modelo de prueba que guarda las features recibidas"""
+
+    feature_columns = MODEL_FEATURES
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, X):
+        self.batches.append(X.copy())
+        return np.zeros((len(X), 2))
+
+
+def test_state_matches_rolling_and_online_scorer(sensor_frame):
+    state = FleetFeatureState()
+    expected = reference_features(sensor_frame)
+
+    results = []
+    for _, hour in sensor_frame.groupby('timestamp', sort=True):
+        idx = state.indices(hour['molino_id'])
+        features = state.update(idx, {col: hour[col].to_numpy(dtype=float) for col in hour.columns[2:]})
+        results.append(pd.DataFrame(features, index=hour.index))
+    result = pd.concat(results).loc[sensor_frame.index]
+
+    pd.testing.assert_frame_equal(result[expected.columns], expected, rtol=1e-9)
+
+
+def test_batches_with_repeated_mills_keep_time_order(sensor_frame):
+    records = sensor_frame.drop(columns='timestamp').to_dict(orient='records')
+    expected = reference_features(sensor_frame)
+
+    async def run(service):
+        # Todos los registros en un solo lote: cada molino aparece 300 veces
+        return await service.score_many(records)
+
+    model = RecordingModel()
+    service = RiskScoringService(model=model, max_batch_size=len(records) + 1, max_delay_ms=1.0)
+    responses = asyncio.run(run(service))
+
+    assert service.batch_sizes == [len(records)]
+    assert [response['molino_id'] for response in responses] == list(sensor_frame['molino_id'])
+    X = pd.DataFrame(np.vstack(model.batches), columns=MODEL_FEATURES)
+    checked = [col for col in expected.columns if col in MODEL_FEATURES]
+    pd.testing.assert_frame_equal(X[checked], expected[checked].reset_index(drop=True), rtol=1e-9)
+
+
+def test_invalid_records_fail_alone(sensor_frame):
+    records = sensor_frame.drop(columns='timestamp').head(30).to_dict(orient='records')
+    bad = {5: {**records[5], 'corriente_motor': 'n/a'}, 12: {'corriente_motor': 1.0}, 20: 'no es un registro'}
+    submitted = [bad.get(i, record) for i, record in enumerate(records)]
+
+    async def run(records):
+        service = RiskScoringService(model=RecordingModel(), max_batch_size=64)
+        return service, await asyncio.gather(*(service.submit(r) for r in records), return_exceptions=True)
+
+    service, results = asyncio.run(run(submitted))
+    _, clean = asyncio.run(run([record for i, record in enumerate(records) if i not in bad]))
+
+    assert all(isinstance(results[i], ValueError) for i in bad)
+    assert [r for i, r in enumerate(results) if i not in bad] == clean
+    assert service.batch_sizes == [len(records) - len(bad)]
+
+
+def test_latency_percentiles_do_not_exceed_max():
+    histogram = LatencyHistogram()
+    latencies = np.random.default_rng(0).uniform(1, 62.1, 1000)
+    histogram.record(latencies)
+
+    summary = histogram.summary()
+    assert summary['p50_ms'] <= summary['p90_ms'] <= summary['p99_ms'] <= histogram.max_ms
+    assert summary['p50_ms'] >= np.percentile(latencies, 50)
@@ -0,0 +1,68 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensor_replay import QueueSink, SensorReplay
+
+
+class FakeClock:
+    """Reloj simulado: sleep() avanza el tiempo sin esperar"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+
+
+class StampedQueue(asyncio.Queue):
+    """Cola que registra el instante (reloj simulado) en que entra cada registro"""
+
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+        self.sent_at = []
+
+    async def put(self, item):
+        self.sent_at.append((item['timestamp'], self.clock()))
+        await super().put(item)
+
+
+@pytest.mark.parametrize('speedup', [1.0, 60.0, 3600.0, 36_000.0])
+def test_no_block_spans_more_than_one_tick(mill_data, speedup):
+    data = mill_data(hours=24 * 40, mills=('M1', 'M2', 'M3', 'M4', 'M5', 'M6'))
+    clock = FakeClock()
+    queue = StampedQueue(clock)
+    replay = SensorReplay(data, [QueueSink(queue)], speedup=speedup, tick_seconds=0.5,
+                          clock=clock, sleep=clock.sleep)
+
+    stats = asyncio.run(replay.run())
+
+    assert stats['records'] == queue.qsize() == len(data)
+    start = data['timestamp'].iloc[0]
+    scheduled = np.array([(ts - start).total_seconds() / speedup for ts, _ in queue.sent_at])
+    sent = np.array([at for _, at in queue.sent_at])
+    # Ningún registro sale antes de su intervalo ni después de su hora programada
+    assert (scheduled - sent >= -1e-9).all()
+    assert (scheduled - sent < 0.5).all()
+    # Un bloque por intervalo de reloj que contiene alguna hora
+    assert stats['blocks'] == len(np.unique(np.floor(scheduled / 0.5)))
+
+
+def test_unpaced_replay_batches_by_rows(mill_data):
+    data = mill_data(hours=24 * 10)
+    queue = asyncio.Queue()
+    replay = SensorReplay(data, [QueueSink(queue)], speedup=None, max_block_rows=100)
+
+    blocks = [frame for frame, _ in replay._iter_blocks()]
+
+    assert sum(map(len, blocks)) == len(data)
+    assert all(len(frame) >= 100 for frame in blocks[:-1])
+    # Cada bloque contiene horas completas
+    assert all(frame['timestamp'].iloc[-1] != nxt['timestamp'].iloc[0] for frame, nxt in zip(blocks, blocks[1:]))
+    pd.testing.assert_frame_equal(pd.concat(blocks), data)